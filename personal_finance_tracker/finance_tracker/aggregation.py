@@ -0,0 +1,266 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import Sum
+
+from .models import DailyTransactionSummary
+
+
+"""
+This module computes the income/expense totals, daily series, monthly series and per-category totals
+shown on the dashboard.
+
+Each summary is built from a single grouped query that only projects the columns it needs (via
+`values_list`), and is then folded in Python into a compact structure that the dashboard and any
+JSON endpoint can share:
+
+    {
+        "total_income": Decimal,
+        "total_expenses": Decimal,
+        "daily": [(date, income, expenses), ...],      # sorted by date
+        "monthly": [(month, income, expenses), ...],   # month is the first day of the month
+        "categories": [(category_id, income, expenses), ...],
+    }
+"""
+
+ZERO = Decimal('0')
+
+
+def _fold(rows):
+    """
+    Folds (date, transaction_type, category_id, total) rows into a summary dictionary.
+
+    Args:
+        rows (iterable): Grouped rows. category_id may be None when categories are not tracked.
+
+    Returns:
+        dict: The summary structure described in the module docstring.
+    """
+    daily = {}
+    monthly = {}
+    categories = {}
+    total_income = ZERO
+    total_expenses = ZERO
+
+    for day, transaction_type, category_id, total in rows:
+        if transaction_type == 'income':
+            index = 0
+            total_income += total
+        elif transaction_type == 'expense':
+            index = 1
+            total_expenses += total
+        else:
+            continue
+
+        daily.setdefault(day, [ZERO, ZERO])[index] += total
+        monthly.setdefault(day.replace(day=1), [ZERO, ZERO])[index] += total
+        if category_id is not None:
+            categories.setdefault(category_id, [ZERO, ZERO])[index] += total
+
+    return {
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "daily": [(day, *daily[day]) for day in sorted(daily)],
+        "monthly": [(month, *monthly[month]) for month in sorted(monthly)],
+        "categories": [(category_id, *values) for category_id, values in categories.items()],
+    }
+
+
+def summarize_transactions(transactions):
+    """
+    Summarizes a Transaction queryset with one grouped query.
+
+    The queryset may already be filtered (by user, date range, account, ...). Rows are grouped by
+    date, transaction type and category, so the number of rows fetched is bounded by
+    days x categories rather than the number of transactions.
+
+    Args:
+        transactions (QuerySet): The transactions to summarize.
+
+    Returns:
+        dict: The summary structure described in the module docstring.
+    """
+    rows = transactions.order_by().values_list(
+        'date', 'transaction_type', 'category_id'
+    ).annotate(total=Sum('amount'))
+    return _fold(rows.iterator())
+
+
+def summarize_daily_rollups(user, start=None, end=None):
+    """
+    Summarizes a user's transactions from the daily rollup table with one query.
+
+    The rollup does not track categories, so the "categories" list of the result is always empty.
+
+    Args:
+        user (User): The user whose transactions are summarized.
+        start (date, optional): The first day to include.
+        end (date, optional): The last day to include.
+
+    Returns:
+        dict: The summary structure described in the module docstring.
+    """
+    summaries = DailyTransactionSummary.objects.filter(user=user)
+    if start:
+        summaries = summaries.filter(date__gte=start)
+    if end:
+        summaries = summaries.filter(date__lte=end)
+
+    rows = summaries.values_list('date', 'transaction_type', 'total')
+    return _fold((day, transaction_type, None, total) for day, transaction_type, total in rows.iterator())
+
+
+def build_chart_data(summary, include_daily=True):
+    """
+    Converts a summary into the JSON-serializable chart data used by the dashboard charts.
+
+    Args:
+        summary (dict): A summary returned by summarize_transactions or summarize_daily_rollups.
+        include_daily (bool): Whether to include the per-day series. The dashboard leaves it out and
+            fetches a downsampled series from the chart data endpoint instead.
+
+    Returns:
+        dict: Chart data with date labels, daily and monthly series, and income/expense totals.
+    """
+    chart_data = {
+        "total_income": float(summary["total_income"]),
+        "total_expenses": float(summary["total_expenses"]),
+        "months": [month.strftime("%b %Y") for month, _, _ in summary["monthly"]],
+        "monthly_income": [float(income) for _, income, _ in summary["monthly"]],
+        "monthly_expenses": [float(expenses) for _, _, expenses in summary["monthly"]],
+    }
+    if include_daily:
+        chart_data.update({
+            "dates": [day.strftime('%Y-%m-%d') for day, _, _ in summary["daily"]],
+            "income": [float(income) for _, income, _ in summary["daily"]],
+            "expenses": [float(expenses) for _, _, expenses in summary["daily"]],
+        })
+    return chart_data
+
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def choose_granularity(first_day, last_day):
+    """
+    Picks a bucket size for a date range so that the series stays readable.
+
+    Args:
+        first_day (date): The first day of the range.
+        last_day (date): The last day of the range.
+
+    Returns:
+        str: 'day' for up to three months, 'week' for up to two years, 'month' otherwise.
+    """
+    span = (last_day - first_day).days
+    if span <= 92:
+        return "day"
+    if span <= 730:
+        return "week"
+    return "month"
+
+
+def bucket_series(daily, granularity):
+    """
+    Re-buckets a daily (date, income, expenses) series by week or month.
+
+    Args:
+        daily (list): The "daily" list of a summary, sorted by date.
+        granularity (str): 'day', 'week' (buckets start on Monday) or 'month'.
+
+    Returns:
+        list: (bucket start date, income, expenses) tuples sorted by date.
+    """
+    if granularity == "day":
+        return list(daily)
+
+    buckets = {}
+    for day, income, expenses in daily:
+        if granularity == "week":
+            start = day - timedelta(days=day.weekday())
+        else:
+            start = day.replace(day=1)
+        bucket = buckets.setdefault(start, [ZERO, ZERO])
+        bucket[0] += income
+        bucket[1] += expenses
+    return [(start, *buckets[start]) for start in sorted(buckets)]
+
+
+def largest_triangle_three_buckets(xs, ys, threshold):
+    """
+    Selects the points of a series that best preserve its visual shape (LTTB downsampling).
+
+    The first and last points are always kept. The remaining points are split into threshold - 2
+    buckets and, from each bucket, the point forming the largest triangle with the previously
+    selected point and the average of the next bucket is kept.
+
+    Args:
+        xs (list): The x values (numbers, ascending).
+        ys (list): The y values.
+        threshold (int): The number of points to keep.
+
+    Returns:
+        list: The indices of the selected points, ascending.
+    """
+    count = len(xs)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+
+    bucket_size = (count - 2) / (threshold - 2)
+    selected = [0]
+    previous = 0
+    for bucket in range(threshold - 2):
+        # Average point of the next bucket (the last point for the final bucket)
+        next_start = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        next_count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / next_count
+        avg_y = sum(ys[next_start:next_end]) / next_count
+
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        best, best_area = start, -1
+        for i in range(start, end):
+            area = abs(
+                (xs[previous] - avg_x) * (ys[i] - ys[previous])
+                - (xs[previous] - xs[i]) * (avg_y - ys[previous])
+            )
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        previous = best
+
+    selected.append(count - 1)
+    return selected
+
+
+def downsample_series(series, max_points):
+    """
+    Reduces an (date, income, expenses) series to at most max_points points.
+
+    Income and expenses are downsampled separately with LTTB and the union of the selected dates is
+    kept, so the peaks of both lines survive. Each line gets ceil((max_points + 1) / 2) points: both
+    keep the first and last points, so the union holds at most max_points points. When the budget is
+    too small for that (max_points = 3), the interior points with the largest values are kept.
+
+    Args:
+        series (list): (date, income, expenses) tuples sorted by date.
+        max_points (int): The maximum number of points to return (at least 3).
+
+    Returns:
+        list: The selected (date, income, expenses) tuples, sorted by date. The first and last points
+        of the series are always included.
+    """
+    if len(series) <= max_points:
+        return list(series)
+
+    xs = [day.toordinal() for day, _, _ in series]
+    per_line = max(math.ceil((max_points + 1) / 2), 3)
+    keep = set(largest_triangle_three_buckets(xs, [float(income) for _, income, _ in series], per_line))
+    keep.update(largest_triangle_three_buckets(xs, [float(expenses) for _, _, expenses in series], per_line))
+
+    first, last = 0, len(series) - 1
+    interior = keep - {first, last}
+    if len(interior) > max_points - 2:
+        interior = sorted(interior, key=lambda i: (-max(abs(series[i][1]), abs(series[i][2])), i))[:max_points - 2]
+    return [series[i] for i in sorted({first, last, *interior})]
@@ -0,0 +1,268 @@
+import csv
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.conf import settings
+from django.db import transaction
+
+from . import rollups
+from .balances import apply_balance_deltas
+from .caching import bump_data_generation
+from .imports import (
+    CHUNK_SIZE, MAX_REPORTED_ERRORS, STATEMENT_PARSERS, chunked, fingerprint_chunk, insert_chunk,
+    load_lookups, resolve_backend, validate_chunk,
+)
+
+logger = logging.getLogger(__name__) #create logger specific to this module
+
+
+"""
+This module imports zip archives of statement files, such as a year of monthly statements.
+
+The members of an archive are parsed and validated in parallel by a pool of processes, since parsing
+and validation are CPU bound. The workers never touch the database: the user's category and account
+lookups are loaded once and sent to them, and they send back the validated, fingerprinted rows of
+their member.
+
+The rows of all the members are then merged into one import: they are ordered by date, rows that
+appear in several members (overlapping statements) are kept once, and everything is inserted in a
+single database transaction. The errors of all the members are merged into one report, prefixed
+with the member name. Like a single-file import, an archive is all or nothing. Files of the archive
+that are not statements are skipped with a warning instead.
+"""
+
+# Limits that protect the workers against oversized or malicious archives
+MAX_ARCHIVE_MEMBERS = 100
+MAX_ARCHIVE_UNCOMPRESSED_SIZE = 500 * 1024 * 1024
+
+
+def archive_members(archive):
+    """
+    Lists the statement files of an archive, in name order.
+
+    Folders and the metadata some archivers add (__MACOSX/, .DS_Store) are ignored. Other files that are
+    not statements, such as the READMEs and PDFs bank exports often include, are skipped with a warning.
+
+    Args:
+        archive (ZipFile): The open archive.
+
+    Returns:
+        tuple: (members, warnings), the names of the statement files and one message per skipped file.
+
+    Raises:
+        ValueError: If the archive has too many statement files, or they are too large to be imported.
+    """
+    members = []
+    warnings = []
+    infos = [
+        info for info in archive.infolist()
+        if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+        and not os.path.basename(info.filename).startswith(".")
+    ]
+    for info in sorted(infos, key=lambda info: info.filename):
+        extension = os.path.splitext(info.filename)[1].lower()
+        if extension in STATEMENT_PARSERS:
+            members.append(info)
+        else:
+            warnings.append(f"{info.filename}: Skipped, '{extension}' files are not statements.")
+    if len(members) > MAX_ARCHIVE_MEMBERS:
+        raise ValueError(f"The archive contains more than {MAX_ARCHIVE_MEMBERS} statement files.")
+    if sum(info.file_size for info in members) > MAX_ARCHIVE_UNCOMPRESSED_SIZE:
+        raise ValueError(
+            f"The archive expands to more than {MAX_ARCHIVE_UNCOMPRESSED_SIZE // (1024 * 1024)} MB."
+        )
+    return [info.filename for info in members], warnings
+
+
+def parse_member(path, member, user_id, categories, accounts):
+    """
+    Parses and validates one member of an archive. Runs in a worker process.
+
+    Args:
+        path (str): The path of the archive.
+        member (str): The name of the member.
+        user_id (int): The ID of the user importing the archive.
+        categories (dict): Category IDs by name.
+        accounts (dict): Account IDs by account number.
+
+    Returns:
+        dict: The outcome of the member, containing:
+            - rows (int): The number of rows read.
+            - valid (list): The field values of the valid rows in file order, with their fingerprint.
+              Empty as soon as the member has an error.
+            - duplicates (int): The number of rows dropped because the member lists their transaction
+              ID twice.
+            - errors (list): The first MAX_REPORTED_ERRORS error messages, prefixed with the member name.
+            - error_count (int): The total number of errors.
+    """
+    outcome = {'rows': 0, 'valid': [], 'duplicates': 0, 'errors': [], 'error_count': 0}
+    # Occurrences are counted per member, so that the same row in two overlapping statements gets
+    # the same fingerprint and is imported once
+    occurrences = {}
+    parser = STATEMENT_PARSERS[os.path.splitext(member)[1].lower()]
+    try:
+        with zipfile.ZipFile(path) as archive, archive.open(member) as file:
+            for chunk in chunked(parser(file)):
+                outcome['rows'] += len(chunk)
+                chunk_errors = []
+                valid = validate_chunk(chunk, categories, accounts, chunk_errors)
+                outcome['duplicates'] += fingerprint_chunk(user_id, valid, occurrences)
+                outcome['error_count'] += len(chunk_errors)
+                outcome['errors'].extend(
+                    f"{member}: {error}" for error in chunk_errors[:MAX_REPORTED_ERRORS - len(outcome['errors'])]
+                )
+                # Rows of a member with errors will not be imported, so do not send them back
+                if outcome['error_count']:
+                    outcome['valid'] = []
+                else:
+                    outcome['valid'].extend(valid)
+    except (csv.Error, UnicodeDecodeError, zipfile.BadZipFile) as e:
+        outcome['error_count'] += 1
+        outcome['errors'].append(f"{member}: Error processing file: {e}")
+    return outcome
+
+
+def _parse_workers():
+    """
+    Returns the number of processes that parse archive members.
+    """
+    return getattr(settings, "IMPORT_PARSE_WORKERS", None) or os.cpu_count() or 1
+
+
+def import_archive(user, path, chunk_size=CHUNK_SIZE, progress=None, backend='auto'):
+    """
+    Imports the statement files of a zip archive as one import.
+
+    Args:
+        user (User): The user importing transactions.
+        path (str): The path of the archive.
+        chunk_size (int): The number of rows inserted at a time.
+        progress (callable, optional): Called with the partial outcome after every parsed member and
+            every inserted chunk.
+        backend (str): How rows are inserted, one of imports.INSERT_BACKENDS.
+
+    Returns:
+        dict: The outcome of the import, see imports.run_import, plus:
+            - files (int): The number of statement files in the archive.
+            - duplicates (int): The number of rows dropped because another member contains them too
+              (or their own member lists them twice). They are also counted in `skipped`.
+            - warnings (list): One message per file of the archive that was skipped because it is not a
+              statement.
+    """
+    backend = resolve_backend(backend)
+    started = time.perf_counter()
+    result = {
+        'rows': 0, 'inserted': 0, 'skipped': 0, 'duplicates': 0, 'files': 0,
+        'errors': [], 'error_count': 0, 'warnings': [], 'backend': backend,
+    }
+
+    def add_errors(errors, count):
+        result['error_count'] += count
+        result['errors'].extend(errors[:MAX_REPORTED_ERRORS - len(result['errors'])])
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            members, result['warnings'] = archive_members(archive)
+        if not members:
+            add_errors(["The archive contains no statement files."], 1)
+    except (zipfile.BadZipFile, ValueError) as e:
+        members = []
+        add_errors([f"Error processing file: {e}"], 1)
+    result['files'] = len(members)
+
+    categories, accounts = load_lookups(user)
+    outcomes = []
+    if members:
+        workers = min(_parse_workers(), len(members))
+        # Workers are spawned rather than forked, since imports run in threads of the web process. A
+        # spawned worker starts from a fresh interpreter, so it sets Django up before loading this module.
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=django.setup
+        ) as pool:
+            futures = [
+                pool.submit(parse_member, path, member, user.pk, categories, accounts) for member in members
+            ]
+            # Collect in member order, so that rows keep a deterministic order
+            for future in futures:
+                outcome = future.result()
+                outcomes.append(outcome)
+                result['rows'] += outcome['rows']
+                add_errors(outcome['errors'], outcome['error_count'])
+                if progress:
+                    progress(result)
+
+    if not result['error_count']:
+        # Merge the members: ordered by date (the sort is stable, so rows of one day keep their
+        # member and file order) and without the rows that several members share
+        seen = set()
+        merged = []
+        for outcome in outcomes:
+            result['duplicates'] += outcome['duplicates']
+            result['skipped'] += outcome['duplicates']
+            for values in outcome['valid']:
+                if values['fingerprint'] in seen:
+                    result['duplicates'] += 1
+                    result['skipped'] += 1
+                    continue
+                seen.add(values['fingerprint'])
+                merged.append(values)
+        merged.sort(key=lambda values: values['date'])
+
+        balance_deltas = {}
+        rollup_deltas = {}
+        with transaction.atomic():
+            for chunk in chunked(merged, chunk_size):
+                inserted, skipped = insert_chunk(
+                    user, chunk, balance_deltas, rollup_deltas, batch_size=chunk_size, backend=backend
+                )
+                result['inserted'] += inserted
+                result['skipped'] += skipped
+                if progress:
+                    progress(result)
+            apply_balance_deltas(balance_deltas)
+            rollups.apply_deltas(rollup_deltas)
+
+    if result['inserted']:
+        # Bulk writes do not send post_save signals, so invalidate the user's cached data here
+        bump_data_generation(user.pk)
+
+    result['seconds'] = time.perf_counter() - started
+    result['rows_per_second'] = result['rows'] / result['seconds'] if result['seconds'] else 0.0
+    logger.info(
+        "Imported %s of %s rows from %s files (%s skipped, %s of them duplicates) for user %s in %.2fs",
+        result['inserted'], result['rows'], result['files'], result['skipped'], result['duplicates'],
+        user.pk, result['seconds'],
+    )
+    return result
+
+
+def import_archive_file(user, file, chunk_size=CHUNK_SIZE, progress=None, backend='auto'):
+    """
+    Imports an uploaded zip archive, which the workers need on disk.
+
+    Args:
+        user (User): The user importing transactions.
+        file (File): The archive, opened in binary mode. Files that are not on disk are copied to a
+            temporary file first.
+        chunk_size (int): The number of rows inserted at a time.
+        progress (callable, optional): Called with the partial outcome, see import_archive.
+        backend (str): How rows are inserted, one of imports.INSERT_BACKENDS.
+
+    Returns:
+        dict: The outcome of the import, see import_archive.
+    """
+    path = getattr(file, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return import_archive(user, path, chunk_size=chunk_size, progress=progress, backend=backend)
+
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".zip") as copy:
+        shutil.copyfileobj(file, copy)
+        copy.flush()
+        return import_archive(user, copy.name, chunk_size=chunk_size, progress=progress, backend=backend)
@@ -0,0 +1,290 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Max, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .caching import bump_account_generation
+from .models import Account, AccountBalanceSnapshot, Transaction
+
+
+"""
+This module is the ledger of account balances: every write to transactions goes through it to apply its
+effect on the balance of its account.
+
+Balances are never read, changed in Python and saved back, which loses updates when two requests
+write transactions of the same account at once. Instead the database applies each change atomically:
+
+    UPDATE account SET balance = balance + %s WHERE id = %s
+
+A single transaction write (Transaction.save and delete) applies the difference between the old and
+the new version of the row, one statement per affected account (two when the transaction moves to
+another account, none when neither the account, type nor amount changed).
+
+Bulk code paths (spreadsheet saves, imports) do not go through Transaction.save, so they accumulate a
+single signed delta per account and apply them all with one UPDATE statement instead of reading and
+saving the account once per transaction:
+
+    UPDATE account SET balance = balance + CASE id WHEN 1 THEN delta1 WHEN 2 THEN delta2 ... END
+    WHERE id IN (1, 2, ...)
+
+Deltas are kept per account and per transaction date, because a write dated on or before an account's
+latest balance snapshot (see AccountBalanceSnapshot) also shifts the snapshots from that date on. Writes
+dated after the latest snapshot, which are most of them, only cost a lookup of that snapshot's date.
+The same deltas tell which accounts' cached balance series are out of date (see caching.py).
+"""
+
+
+def balance_effect(transaction_type, amount):
+    """
+    Returns the signed effect of a transaction on its account's balance.
+
+    Args:
+        transaction_type (str): The type of the transaction (income or expense).
+        amount (Decimal): The amount of the transaction.
+
+    Returns:
+        Decimal: +amount for income, -amount for expense and 0 for any other type.
+    """
+    if transaction_type == "income":
+        return amount
+    if transaction_type == "expense":
+        return -amount
+    return Decimal('0')
+
+
+def signed_amount(prefix=""):
+    """
+    Returns the database expression of balance_effect, for sums of balances in SQL.
+
+    Args:
+        prefix (str): The path to the transaction from the queried model, e.g. 'transaction__' to sum
+            the transactions of accounts.
+
+    Returns:
+        Case: +amount for income, -amount for expense and 0 for any other type.
+    """
+    return Case(
+        When(**{f"{prefix}transaction_type": "income"}, then=F(f"{prefix}amount")),
+        When(**{f"{prefix}transaction_type": "expense"}, then=-F(f"{prefix}amount")),
+        default=Value(Decimal('0')),
+        output_field=_balance_output(),
+    )
+
+
+def _as_date(value):
+    """
+    Converts a transaction date (date, datetime or 'YYYY-MM-DD' string) to the date stored in the database.
+    """
+    return Transaction._meta.get_field('date').to_python(value)
+
+
+def record_balance(deltas, account_id, date, transaction_type, amount, sign=1):
+    """
+    Accumulates the effect of a single transaction into a deltas dictionary.
+
+    Args:
+        deltas (dict): Maps (account_id, date) to a Decimal balance delta.
+        account_id (int): The ID of the transaction's account, or None.
+        date (date or str): The date of the transaction.
+        transaction_type (str): The type of the transaction (income or expense).
+        amount (Decimal): The amount of the transaction.
+        sign (int): 1 when the transaction is being added, -1 when it is being removed.
+    """
+    if account_id is None:
+        return
+    key = (account_id, _as_date(date))
+    deltas[key] = deltas.get(key, Decimal('0')) + sign * balance_effect(transaction_type, Decimal(str(amount)))
+
+
+def account_totals(deltas):
+    """
+    Sums a deltas dictionary per account.
+
+    Args:
+        deltas (dict): Maps (account_id, date) to a Decimal balance delta.
+
+    Returns:
+        dict: Maps account IDs to their non-zero total delta.
+    """
+    totals = {}
+    for (account_id, _), delta in deltas.items():
+        totals[account_id] = totals.get(account_id, Decimal('0')) + delta
+    return {account_id: total for account_id, total in totals.items() if total}
+
+
+def adjust_balance(account_id, delta):
+    """
+    Adds a delta to the balance of an account, atomically.
+
+    Args:
+        account_id (int): The ID of the account.
+        delta (Decimal): The amount to add (negative to subtract).
+    """
+    Account.objects.filter(pk=account_id).update(balance=F('balance') + Value(delta, output_field=_balance_output()))
+
+
+def adjust_balances(deltas):
+    """
+    Applies accumulated deltas with one UPDATE per account, and shifts the affected snapshots.
+
+    Accounts are updated in ID order, so that two writers moving amounts in opposite directions between
+    the same accounts cannot deadlock.
+
+    Args:
+        deltas (dict): Maps (account_id, date) to a Decimal balance delta.
+    """
+    for account_id, total in sorted(account_totals(deltas).items()):
+        adjust_balance(account_id, total)
+    apply_snapshot_deltas(deltas)
+    invalidate_balance_series(deltas)
+
+
+def apply_transaction_change(before=None, after=None):
+    """
+    Applies the change of a single transaction to the balances of its accounts.
+
+    The old version of the transaction is reverted and the new one applied, so a change of account, type
+    or amount moves the right amounts. Only the accounts whose balance actually changes are updated.
+
+    Args:
+        before (tuple, optional): (account_id, date, transaction_type, amount) of the transaction as
+            stored before the write, or None for a new transaction.
+        after (tuple, optional): (account_id, date, transaction_type, amount) of the transaction after
+            the write, or None for a deleted transaction.
+    """
+    deltas = {}
+    if before:
+        record_balance(deltas, *before, sign=-1)
+    if after:
+        record_balance(deltas, *after)
+    adjust_balances(deltas)
+
+
+def _balance_output():
+    """
+    Returns the output field of balance expressions, matching Account.balance.
+    """
+    balance_field = Account._meta.get_field('balance')
+    return DecimalField(max_digits=balance_field.max_digits, decimal_places=balance_field.decimal_places)
+
+
+def _case_update(queryset, field, deltas):
+    """
+    Adds a delta per primary key to a field with a single UPDATE ... CASE statement.
+    """
+    queryset.filter(pk__in=deltas).update(**{field: F(field) + Case(
+        *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+        output_field=_balance_output(),
+    )})
+
+
+def apply_balance_deltas(deltas):
+    """
+    Applies accumulated deltas with a single set-based UPDATE, and shifts the affected snapshots.
+
+    Args:
+        deltas (dict): Maps (account_id, date) to a Decimal balance delta.
+    """
+    totals = account_totals(deltas)
+    if totals:
+        _case_update(Account.objects.all(), 'balance', totals)
+    apply_snapshot_deltas(deltas)
+    invalidate_balance_series(deltas)
+
+
+def invalidate_balance_series(deltas):
+    """
+    Invalidates the cached balance series of the accounts that the accumulated deltas change.
+
+    A transaction that moves to another date changes the history of its account but not its balance,
+    so every account with a non-zero delta on any date is invalidated. This happens once the database
+    transaction commits, so that a series computed from the old rows meanwhile is not cached as current.
+
+    Args:
+        deltas (dict): Maps (account_id, date) to a Decimal balance delta.
+    """
+    account_ids = {account_id for (account_id, _), delta in deltas.items() if delta}
+    if not account_ids:
+        return
+
+    def bump():
+        for account_id in account_ids:
+            bump_account_generation(account_id)
+    transaction.on_commit(bump)
+
+
+def apply_snapshot_deltas(deltas):
+    """
+    Shifts the balance snapshots that the accumulated deltas land before.
+
+    A delta dated D changes the closing balance of every snapshot dated D or later. Deltas dated after
+    the latest snapshot of their account change nothing.
+
+    Args:
+        deltas (dict): Maps (account_id, date) to a Decimal balance delta.
+    """
+    by_account = {}
+    for (account_id, date), delta in deltas.items():
+        if delta:
+            by_account.setdefault(account_id, []).append((date, delta))
+    if not by_account:
+        return
+    latest = dict(
+        AccountBalanceSnapshot.objects.filter(account_id__in=by_account).values_list('account_id').annotate(
+            latest=Max('date')
+        ).order_by()
+    )
+
+    shifts = {}
+    for account_id, dated in by_account.items():
+        dated = sorted((date, delta) for date, delta in dated if account_id in latest and date <= latest[account_id])
+        if not dated:
+            continue
+        snapshots = AccountBalanceSnapshot.objects.filter(
+            account_id=account_id, date__gte=dated[0][0]
+        ).order_by('date').values_list('pk', 'date')
+        # Every snapshot moves by the deltas dated on or before it
+        shift = Decimal('0')
+        position = 0
+        for pk, snapshot_date in snapshots:
+            while position < len(dated) and dated[position][0] <= snapshot_date:
+                shift += dated[position][1]
+                position += 1
+            if shift:
+                shifts[pk] = shift
+    if shifts:
+        _case_update(AccountBalanceSnapshot.objects.all(), 'balance', shifts)
+
+
+def reconcile_balances(accounts=None):
+    """
+    Recomputes the balance of accounts from their transactions and reports the ones that drifted.
+
+    The expected balance is the opening balance plus the sum of the account's transactions, computed
+    for every account by one grouped query.
+
+    Args:
+        accounts (QuerySet, optional): The accounts to check. Defaults to every account.
+
+    Returns:
+        tuple: (checked, drifted), the number of accounts checked and a list with one dict per drifted
+        account, containing the account, its stored and expected balances and the drift (stored - expected).
+    """
+    accounts = Account.objects.all() if accounts is None else accounts
+    ledger = accounts.annotate(
+        ledger=Coalesce(Sum(signed_amount('transaction__')), Value(Decimal('0')), output_field=_balance_output())
+    ).order_by('pk')
+
+    checked = 0
+    drifted = []
+    for account in ledger:
+        checked += 1
+        expected = account.opening_balance + account.ledger
+        if account.balance != expected:
+            drifted.append({
+                'account': account,
+                'stored': account.balance,
+                'expected': expected,
+                'drift': account.balance - expected,
+            })
+    return checked, drifted
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import Budget, Transaction
+
+
+"""
+This module evaluates a user's budgets against their spending.
+
+Spending for every budget is computed with a single grouped query: one conditional sum per budget
+period that is in use (weekly, monthly, yearly), grouped by category. This replaces running one
+aggregate query per budget.
+"""
+
+
+def period_start(period, today):
+    """
+    Returns the first day of the budget period that contains `today`.
+
+    Args:
+        period (str): The budget period ('weekly', 'monthly' or 'yearly').
+        today (date): The day to evaluate the budget on.
+
+    Returns:
+        date: Monday of the current week, the first of the current month or January 1st of the current year.
+    """
+    if period == 'weekly':
+        return today - timedelta(days=today.weekday())
+    if period == 'yearly':
+        return today.replace(month=1, day=1)
+    return today.replace(day=1)
+
+
+def evaluate_budgets(user, budgets=None, today=None):
+    """
+    Computes spent, remaining and progress for all of a user's budgets.
+
+    Args:
+        user (User): The user whose budgets are evaluated.
+        budgets (iterable, optional): The budgets to evaluate (with their category selected).
+            Defaults to all of the user's budgets.
+        today (date, optional): The day to evaluate the budgets on. Defaults to the current date.
+
+    Returns:
+        list: One dictionary per budget, in the same order as `budgets`, containing:
+            - id (int): The budget's category ID.
+            - budget_id (int): The budget's ID.
+            - name (str): The budget's category name.
+            - period (str): The budget period.
+            - budget (float): The budgeted amount.
+            - spent (float): The amount spent in the current period.
+            - progress (float): The percentage of the budget spent.
+            - remaining (float): The amount left to spend in the current period.
+    """
+    if budgets is None:
+        budgets = Budget.objects.filter(user=user).select_related('category')
+    budgets = list(budgets)
+    if not budgets:
+        return []
+
+    today = today or timezone.now().date()
+    starts = {budget.period: period_start(budget.period, today) for budget in budgets}
+
+    # One conditional sum per period in use, so every budget is evaluated by the same query
+    spent_rows = Transaction.objects.filter(
+        user=user,
+        transaction_type='expense',
+        category_id__in={budget.category_id for budget in budgets},
+        date__gte=min(starts.values()),
+        date__lte=today,
+    ).values('category_id').annotate(**{
+        f'spent_{period}': Sum('amount', filter=Q(date__gte=start))
+        for period, start in starts.items()
+    }).order_by()
+    spent_by_category = {row['category_id']: row for row in spent_rows}
+
+    budget_data = []
+    for budget in budgets:
+        spent = spent_by_category.get(budget.category_id, {}).get(f'spent_{budget.period}') or 0
+        progress = float(spent) / float(budget.amount) if budget.amount else 0
+        budget_data.append({
+            'id': budget.category.id,
+            'budget_id': budget.id,
+            'name': budget.category.name,
+            'period': budget.period,
+            'budget': float(budget.amount),
+            'spent': float(spent),
+            'progress': progress * 100,
+            'remaining': float(budget.amount) - float(spent),
+        })
+    return budget_data
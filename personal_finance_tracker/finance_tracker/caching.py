@@ -0,0 +1,266 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+"""
+This module caches per-user computed data (such as the dashboard context) in Django's cache framework.
+
+Every user has a "data generation" counter that is bumped whenever one of their transactions, accounts,
+categories, budgets, subscriptions or custom notifications is written. Cached values are stored under a
+key that includes the current generation, so a write makes every older entry unreachable without
+having to track and delete individual keys. Old entries simply expire. The generation moves once the
+write commits: a bump inside the writer's transaction would let a request that still reads the old
+rows cache them under the new generation.
+
+Balance series are cached per account instead, under an account generation that is only bumped when
+the balance history of that account changes (see balances.py), so editing one account's transactions
+keeps the other accounts' series cached.
+
+Autocomplete candidates are cached per user and prefix. Since a prefix grows one keystroke at a time,
+the candidates of a longer prefix are usually filtered from those of a shorter one, without a query.
+"""
+
+GENERATION_KEY = "finance_tracker:generation:{user_id}"
+DASHBOARD_KEY = "finance_tracker:dashboard:{user_id}:{generation}:{day}"
+STATS_KEY = "finance_tracker:dashboard_cache:{outcome}"
+ACCOUNT_GENERATION_KEY = "finance_tracker:account_generation:{account_id}"
+BALANCE_SERIES_KEY = "finance_tracker:balance_series:{account_id}:{generation}:{granularity}:{start}:{end}"
+AUTOCOMPLETE_KEY = "finance_tracker:autocomplete:{user_id}:{generation}:{prefix}"
+
+# How long a computed dashboard context may be served, even if no write bumps the generation
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 60 * 10)
+# Balance series only change with their account's generation, so they are kept longer
+BALANCE_SERIES_CACHE_TIMEOUT = getattr(settings, "BALANCE_SERIES_CACHE_TIMEOUT", 60 * 60 * 24)
+# Autocomplete candidates are only needed while the user is typing
+AUTOCOMPLETE_CACHE_TIMEOUT = getattr(settings, "AUTOCOMPLETE_CACHE_TIMEOUT", 60 * 10)
+
+
+def _new_generation():
+    """
+    Returns a fresh generation number.
+
+    Generations are seeded from the clock so that a counter that was evicted from the cache never
+    restarts at a value that an older cached entry might still be stored under.
+    """
+    return int(time.time() * 1000)
+
+
+def get_data_generation(user_id):
+    """
+    Returns the current data generation of a user, creating it if needed.
+
+    Args:
+        user_id (int): The ID of the user.
+
+    Returns:
+        int: The user's current data generation.
+    """
+    key = GENERATION_KEY.format(user_id=user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_data_generation(user_id):
+    """
+    Invalidates every cached value of a user by moving them to a new data generation.
+
+    The generation moves when the current database transaction commits, or right away outside of one.
+
+    Args:
+        user_id (int): The ID of the user whose data changed.
+    """
+    key = GENERATION_KEY.format(user_id=user_id)
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The counter does not exist (yet, or anymore), so start a new one
+            cache.set(key, _new_generation(), timeout=None)
+    transaction.on_commit(bump)
+
+
+def get_account_generations(account_ids):
+    """
+    Returns the current generation of several accounts with one cache lookup, creating the missing ones.
+
+    Args:
+        account_ids (iterable): The IDs of the accounts.
+
+    Returns:
+        dict: Maps account IDs to their current generation.
+    """
+    keys = {account_id: ACCOUNT_GENERATION_KEY.format(account_id=account_id) for account_id in account_ids}
+    found = cache.get_many(keys.values())
+    generations = {}
+    for account_id, key in keys.items():
+        if key not in found:
+            cache.add(key, _new_generation(), timeout=None)
+            found[key] = cache.get(key)
+        generations[account_id] = found[key]
+    return generations
+
+
+def bump_account_generation(account_id):
+    """
+    Invalidates the cached balance series of an account.
+
+    Args:
+        account_id (int): The ID of the account whose balance history changed.
+    """
+    key = ACCOUNT_GENERATION_KEY.format(account_id=account_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_generation(), timeout=None)
+
+
+def get_balance_series(accounts, granularity, start, end, build):
+    """
+    Returns the cached balance series of accounts, computing the missing ones together.
+
+    Args:
+        accounts (list): The accounts.
+        granularity (str): The bucket size of the series.
+        start (date): The first day of the series, or None.
+        end (date): The last day of the series, or None.
+        build (callable): Called with the list of accounts whose series are not cached, returns their
+            series by account ID. Its result must be picklable.
+
+    Returns:
+        dict: The series of every account, by account ID.
+    """
+    generations = get_account_generations(account.pk for account in accounts)
+    keys = {
+        account.pk: BALANCE_SERIES_KEY.format(
+            account_id=account.pk, generation=generations[account.pk], granularity=granularity,
+            start=start.isoformat() if start else "", end=end.isoformat() if end else "",
+        )
+        for account in accounts
+    }
+    cached = cache.get_many(keys.values())
+    series = {account_id: cached[key] for account_id, key in keys.items() if key in cached}
+
+    missing = [account for account in accounts if account.pk not in series]
+    if missing:
+        built = build(missing)
+        cache.set_many({keys[account_id]: values for account_id, values in built.items()}, BALANCE_SERIES_CACHE_TIMEOUT)
+        series.update(built)
+    return series
+
+
+def _autocomplete_key(user_id, generation, prefix):
+    """
+    Returns the cache key of a prefix. The prefix is hashed, since cache keys cannot hold arbitrary text.
+    """
+    digest = hashlib.blake2b(prefix.encode(), digest_size=16).hexdigest()
+    return AUTOCOMPLETE_KEY.format(user_id=user_id, generation=generation, prefix=digest)
+
+
+def get_autocomplete(user_id, prefix, min_length, build):
+    """
+    Returns the cached autocomplete candidates of a prefix, computing and caching them on a miss.
+
+    The entries of the prefix and of its shorter prefixes (down to min_length characters) are fetched
+    with one cache lookup. If the prefix is not cached but a shorter one is, and that entry holds every
+    description starting with it, the candidates are filtered from it instead of being built.
+
+    Args:
+        user_id (int): The ID of the user typing.
+        prefix (str): The lower-cased prefix.
+        min_length (int): The length of the shortest prefix that is cached.
+        build (callable): Returns the candidates of the prefix when they cannot be found in the cache:
+            a dict of `descriptions` ((text, count) pairs), `categories` (names) and `complete`
+            (whether `descriptions` is exhaustive). Its result must be picklable.
+
+    Returns:
+        dict: The candidates of the prefix, as returned by build.
+    """
+    generation = get_data_generation(user_id)
+    keys = {
+        length: _autocomplete_key(user_id, generation, prefix[:length])
+        for length in range(len(prefix), min_length - 1, -1)
+    }
+    cached = cache.get_many(keys.values())
+    key = keys[len(prefix)]
+    if key in cached:
+        return cached[key]
+
+    for shorter_key in keys.values():
+        entry = cached.get(shorter_key)
+        if entry is not None and entry['complete']:
+            candidates = {
+                'descriptions': [
+                    (text, count) for text, count in entry['descriptions'] if text.lower().startswith(prefix)
+                ],
+                'categories': [name for name in entry['categories'] if name.lower().startswith(prefix)],
+                'complete': True,
+            }
+            break
+    else:
+        candidates = build()
+    cache.set(key, candidates, AUTOCOMPLETE_CACHE_TIMEOUT)
+    return candidates
+
+
+def _count(outcome):
+    """
+    Increments the hit or miss counter of the dashboard cache.
+    """
+    key = STATS_KEY.format(outcome=outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_cache_stats():
+    """
+    Returns the hit/miss counters of the dashboard cache.
+
+    Returns:
+        dict: The number of hits and misses and the resulting hit rate.
+    """
+    hits = cache.get(STATS_KEY.format(outcome="hits"), 0)
+    misses = cache.get(STATS_KEY.format(outcome="misses"), 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else None,
+    }
+
+
+def get_dashboard_context(user, today, build):
+    """
+    Returns the cached dashboard context of a user, computing and caching it on a miss.
+
+    The context is keyed by the user's data generation and by the current day, because budget periods
+    and upcoming subscriptions depend on the date.
+
+    Args:
+        user (User): The user whose dashboard is being rendered.
+        today (date): The current date.
+        build (callable): Computes the context when it is not cached. Its result must be picklable.
+
+    Returns:
+        dict: The dashboard context.
+    """
+    key = DASHBOARD_KEY.format(
+        user_id=user.pk, generation=get_data_generation(user.pk), day=today.isoformat()
+    )
+    context = cache.get(key)
+    if context is None:
+        _count("misses")
+        context = build()
+        cache.set(key, context, DASHBOARD_CACHE_TIMEOUT)
+    else:
+        _count("hits")
+    return context
@@ -0,0 +1,124 @@
+import logging
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from . import rollups
+from .balances import adjust_balances, signed_amount
+from .caching import bump_data_generation
+from .imports import chunked
+from .models import Transaction
+
+logger = logging.getLogger(__name__) #create logger specific to this module
+
+
+"""
+This module deletes transactions in bulk.
+
+A queryset delete sends post_delete for every row, and the handler reverts each row's balance and
+rollup on its own: deleting 5,000 transactions costs 5,000 account updates. Instead:
+
+    1. The transactions are locked, so that their values cannot change until they are deleted.
+    2. Their effect on balances is summed per account by grouped queries over the locked IDs, and
+       reverted with one UPDATE per account. Their rollups are reverted the same way, per day.
+    3. The rows are deleted in batches of DELETE_BATCH_SIZE, without signals or cascade (see
+       raw_delete_transactions).
+
+When a whole user is deleted, their accounts and rollups go away too, so purge_user skips the balance
+and rollup maintenance entirely. (Deleting a single account keeps its transactions, which only lose
+their account, so it has no balance maintenance to skip.)
+"""
+
+# Number of transactions deleted per DELETE statement
+DELETE_BATCH_SIZE = 1000
+
+
+def raw_delete_transactions(ids, batch_size=DELETE_BATCH_SIZE):
+    """
+    Deletes transactions by ID in batches, without sending signals.
+
+    This is the only place that deletes transactions behind the ORM's back: the callers revert the
+    balances and rollups of the rows themselves. It does not cascade, which is only safe because no
+    model references transactions. The test suite fails as soon as one does (see
+    BulkDeleteTests.test_nothing_references_transactions).
+
+    Args:
+        ids (list): The IDs of the transactions.
+        batch_size (int): The number of transactions deleted per statement.
+
+    Returns:
+        int: The number of transactions deleted.
+    """
+    deleted = 0
+    for batch in chunked(ids, batch_size):
+        rows = Transaction.objects.filter(pk__in=batch)
+        deleted += rows._raw_delete(rows.db)
+    return deleted
+
+
+def bulk_delete_transactions(transactions, batch_size=DELETE_BATCH_SIZE):
+    """
+    Deletes transactions and reverts their effect on account balances and daily rollups.
+
+    Args:
+        transactions (QuerySet): The transactions to delete.
+        batch_size (int): The number of transactions deleted per statement.
+
+    Returns:
+        int: The number of transactions deleted.
+    """
+    with transaction.atomic():
+        # Lock in ID order, like single deletes of the same rows would
+        ids = list(transactions.select_for_update().order_by('pk').values_list('pk', flat=True))
+        if not ids:
+            return 0
+        # Sum the locked rows only: re-running the caller's filter could match rows committed since
+        balance_deltas = {}
+        rollup_deltas = {}
+        for batch in chunked(ids, batch_size):
+            locked = Transaction.objects.filter(pk__in=batch)
+            # Revert the balances, one statement per account. The totals are kept per date for the
+            # balance snapshots that the transactions land before.
+            for account_id, date, total in locked.filter(account__isnull=False).values_list(
+                'account_id', 'date'
+            ).annotate(total=Sum(signed_amount())).order_by():
+                balance_deltas[(account_id, date)] = balance_deltas.get((account_id, date), 0) - total
+            for row in locked.values('user_id', 'date', 'transaction_type').annotate(
+                total=Sum('amount'), count=Count('id')
+            ).order_by():
+                delta = rollup_deltas.setdefault((row['user_id'], row['date'], row['transaction_type']), [0, 0])
+                delta[0] -= row['total']
+                delta[1] -= row['count']
+        adjust_balances(balance_deltas)
+        user_ids = {user_id for user_id, _, _ in rollup_deltas}
+
+        deleted = raw_delete_transactions(ids, batch_size)
+        rollups.apply_deltas(rollup_deltas)
+
+    # Raw deletes do not send post_delete signals, so invalidate the users' cached data here
+    for user_id in user_ids:
+        bump_data_generation(user_id)
+    logger.info("Deleted %s transactions of users %s", deleted, sorted(user_ids))
+    return deleted
+
+
+def purge_user(user, batch_size=DELETE_BATCH_SIZE):
+    """
+    Deletes a user and all their data.
+
+    The user's transactions are deleted first, in batches and without reverting them: their accounts
+    and rollups are deleted along with the user. The remaining data is deleted by the usual cascade.
+
+    Args:
+        user (User): The user to delete.
+        batch_size (int): The number of transactions deleted per statement.
+
+    Returns:
+        int: The number of transactions deleted.
+    """
+    user_id = user.pk
+    with transaction.atomic():
+        ids = list(Transaction.objects.filter(user=user).order_by('pk').values_list('pk', flat=True))
+        deleted = raw_delete_transactions(ids, batch_size)
+        user.delete()
+    logger.info("Purged user %s and their %s transactions", user_id, deleted)
+    return deleted
@@ -1,13 +1,22 @@
 from django import forms
 from .models import Transaction, Account, Category, User, Subscription, Budget, CustomNotification
 from django.contrib.auth.password_validation import validate_password
+from django.conf import settings
 from django.core.exceptions import ValidationError
 
+import codecs
 import csv
 import mimetypes
+import os
+import zipfile
 
 from .validation import validate_transaction_data
 
+# Columns every uploaded CSV file must have (category, account and method are optional)
+REQUIRED_CSV_COLUMNS = ("date", "transaction_type", "amount", "description")
+# Statement formats accepted for upload, by file extension (see imports.STATEMENT_PARSERS)
+STATEMENT_EXTENSIONS = (".csv", ".ofx", ".qfx", ".qif", ".zip")
+
 
 
 
@@ -189,25 +198,83 @@ class CategoryForm(forms.ModelForm):
         return cleaned_data
         
 
+def check_statement_file(file, file_name):
+    """
+    Checks the type and the header of an uploaded statement file.
+
+    The rows are validated by the import pipeline as they are inserted, so only the beginning of the
+    file is read.
+
+    Args:
+        file (File): The statement file, opened in binary mode. It is rewound afterwards.
+        file_name (str): The name of the file.
+
+    Raises:
+        ValidationError: If the file type is not supported or its header is not valid.
+    """
+    # Validate file type
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in STATEMENT_EXTENSIONS:
+        raise forms.ValidationError("Only CSV, OFX, QFX, QIF and ZIP files are allowed.")
+
+    # Check MIME type - ensure it is a valid csv
+    mime_type, _ = mimetypes.guess_type(file_name)
+    if extension == ".csv" and mime_type != "text/csv":
+        raise forms.ValidationError("The uploaded file is not a valid CSV file.")
+
+    # Validate the header
+    if extension in (".ofx", ".qfx"):
+        head = file.read(4096)
+        file.seek(0)
+        if b"<OFX" not in head.upper():
+            raise forms.ValidationError("The uploaded file is not a valid OFX file.")
+        return
+    if extension == ".zip":
+        # The members are checked when the archive is imported
+        valid_archive = zipfile.is_zipfile(file)
+        file.seek(0)
+        if not valid_archive:
+            raise forms.ValidationError("The uploaded file is not a valid ZIP archive.")
+        return
+    if extension == ".qif":
+        head = file.read(4096)
+        file.seek(0)
+        if not head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"!"):
+            raise forms.ValidationError("The uploaded file is not a valid QIF file.")
+        return
+
+    try:
+        header = next(csv.reader(codecs.getreader("utf-8-sig")(file)), None)
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise forms.ValidationError(f"Error processing file: {e}")
+    finally:
+        file.seek(0)
+
+    missing = [column for column in REQUIRED_CSV_COLUMNS if column not in (header or [])]
+    if missing:
+        raise forms.ValidationError(f"The CSV file is missing the column(s): {', '.join(missing)}.")
+
+
 class CSVUploadForm(forms.Form):
     """
-    A form for uploading CSV files.
+    A form for uploading statement files: CSV, OFX/QFX or QIF, or a zip archive of them.
 
-    - Validates the uploaded file type, size, and contents.
-    - Processes each row in the CSV file and validates the data.
+    - Validates the uploaded file type, size, and header (see check_statement_file).
+    - The rows themselves are validated while they are imported, a chunk at a time with
+      validation.validate_transaction_columns (see imports.import_statement), so the file is never
+      loaded into memory as a whole.
 
     Attributes:
-        file (FileField): The uploaded CSV file.
-        validated_rows (list): A list of validated rows from the CSV file.
+        file (FileField): The uploaded statement file.
 
     Methods:
-        clean_file(): Validates the uploaded file and processes its contents.
+        clean_file(): Validates the uploaded file and its header.
     """
     file = forms.FileField(
         required=True,
-        label="Upload CSV File",
+        label="Upload Statement File (CSV, OFX, QFX, QIF, or a ZIP of them)",
         widget=forms.ClearableFileInput(attrs={
-            "accept": ".csv",
+            "accept": ",".join(STATEMENT_EXTENSIONS),
             "class": "form-control"
         })
         )
@@ -215,64 +282,21 @@ class CSVUploadForm(forms.Form):
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop("user", None)  # Pass the user to the form
         super().__init__(*args, **kwargs)
-        self.validated_rows = []  # Store validated rows here
 
     def clean_file(self):
         file = self.cleaned_data.get("file")
 
-        # Validate file type
-        if not file.name.endswith(".csv"):
-            raise forms.ValidationError("Only CSV files are allowed.")
-
-        # Check MIME type - ensure it is a valid csv
-        mime_type, _ = mimetypes.guess_type(file.name)
-        if mime_type != "text/csv":
-            raise forms.ValidationError("The uploaded file is not a valid CSV file.")
-
-        # Validate file size
-        max_file_size = 10 * 1024 * 1024  # 5 MB
+        # Validate file size. Uploads are streamed to a temporary file rather than held in memory,
+        # larger files can be sent in parts through the chunked upload API (see uploads.py)
+        max_file_size = settings.STATEMENT_UPLOAD_MAX_SIZE
         if file.size > max_file_size:
-            raise forms.ValidationError("The uploaded file is too large. Maximum size allowed is 5 MB.")
-
-        # Validate File Contents Row by Row
-        try:
-            decoded_file = file.read().decode("utf-8").splitlines()
-            reader = csv.DictReader(decoded_file)
-            errors = []
-
-            for row_number, row in enumerate(reader, start=1):
-                # Resolve and Validate category
-                category_value = row.get("category")
-                if category_value:
-                    try:
-                        row["category"] = Category.objects.get(name=category_value, user=self.user)
-                    except Category.DoesNotExist:
-                        errors.append(f"Row {row_number}: Invalid category '{category_value}'.")
-
-                # Resolve and Validate account
-                account_value = row.get("account")
-                if account_value:
-                    try:
-                        row["account"] = Account.objects.get(account_number=account_value, user=self.user)
-                    except Account.DoesNotExist:
-                        errors.append(f"Row {row_number}: Invalid account '{account_value}'.")
-
-                try:
-                    validate_transaction_data(row)
-                except ValidationError as e:
-                    errors.append(f"Row {row_number}: {', '.join(e.messages)}")
-
-                #store row data 
-                self.validated_rows.append(row)
-
-        except Exception as e:
-            errors.append(f"Error processing file: {e}")
-
-        if errors:
-            raise forms.ValidationError(errors)
+            raise forms.ValidationError(
+                f"The uploaded file is too large. Maximum size allowed is {max_file_size // (1024 * 1024)} MB."
+            )
 
+        check_statement_file(file, file.name)
         return file
-    
+
 
 class TransactionQueryForm(forms.Form):
     """
@@ -280,6 +304,7 @@ class TransactionQueryForm(forms.Form):
 
     Attributes:
         keyword (CharField): A keyword to search in transaction descriptions or categories.
+        search_mode (ChoiceField): How the keyword is matched: by words, or by similar text (fuzzy).
         date_range (ChoiceField): A predefined date range for filtering transactions.
         start_date (DateField): The start date for a custom date range.
         end_date (DateField): The end date for a custom date range.
@@ -294,6 +319,16 @@ class TransactionQueryForm(forms.Form):
         label="Keyword Search", 
         widget=forms.TextInput(attrs={"placeholder": "Search by description or category", "class": "form-control"})
     )
+    search_mode = forms.ChoiceField(
+        required=False,
+        label="Match",
+        choices=[
+            ("keyword", "Words"),
+            ("similar", "Similar text"),
+        ],
+        widget=forms.Select(attrs={"class": "form-select", "style": "max-width: 10rem;"}),
+        initial="keyword"
+    )
     date_range = forms.ChoiceField(
         required=False,
         label="Date Range",
@@ -0,0 +1,520 @@
+import codecs
+import csv
+import hashlib
+import logging
+import os
+import time
+from decimal import Decimal
+from django.db import IntegrityError, connection, transaction
+
+from . import rollups
+from .balances import apply_balance_deltas, record_balance
+from .caching import bump_data_generation
+from .models import Account, Category, Transaction
+from .statements import iter_ofx_rows, iter_qif_rows
+from .validation import parse_iso_date, rows_to_columns, validate_transaction_columns
+
+logger = logging.getLogger(__name__) #create logger specific to this module
+
+
+"""
+This module imports transactions from uploaded statement files.
+
+An import is a pipeline of generators, so only one chunk of rows is held in memory at a time:
+
+    parse (iter_csv_rows, statements.iter_ofx_rows, statements.iter_qif_rows) -> chunk (chunked)
+        -> validate (validate_chunk)
+        -> fingerprint (fingerprint_chunk) -> insert (insert_chunk)
+
+- The upload is decoded incrementally, line by line, instead of being read and split as a whole.
+- Category names and account numbers are resolved from dictionaries loaded once per import.
+- Rows are validated and inserted one chunk at a time. On PostgreSQL (with psycopg 3) the rows are
+  streamed into the table with COPY ... FROM STDIN, elsewhere they are inserted with bulk_create.
+- Every imported row carries a fingerprint, unique per user, so re-importing an overlapping
+  statement skips the rows that were already imported. OFX rows are fingerprinted by the bank's
+  transaction ID (FITID), other rows by their content. Already imported fingerprints are looked up
+  with one query per chunk, and a FITID repeated within the statement is imported once. When a
+  concurrent import of the same statement commits the same fingerprints first, the chunk is rolled
+  back to a savepoint and inserted again without them.
+- Account balances are adjusted with one set-based UPDATE at the end of the import, and the daily
+  rollups once per day.
+
+Imports are all or nothing: every row is validated, but once an invalid row is found no more rows
+are inserted and the rows already inserted are rolled back.
+"""
+
+CHUNK_SIZE = 1000
+# Only the first errors are kept, so a completely wrong file does not fill the memory with messages
+MAX_REPORTED_ERRORS = 100
+
+# Shortest account number matched against the end of a statement's account ID
+STATEMENT_ACCOUNT_MIN_SUFFIX = 4
+
+# CSV columns that are copied to the transaction (category and account are resolved separately)
+CSV_FIELDS = ('date', 'transaction_type', 'amount', 'description', 'method')
+
+# Insert backends: COPY ... FROM STDIN, bulk_create, or COPY whenever the database supports it
+INSERT_BACKENDS = ('auto', 'copy', 'bulk')
+# Attempts at inserting a chunk whose rows a concurrent import inserted meanwhile
+INSERT_ATTEMPTS = 3
+# Transaction columns written by COPY, in order (the id comes from the table's sequence)
+COPY_COLUMNS = (
+    'user_id', 'account_id', 'category_id', 'amount', 'transaction_type',
+    'method', 'date', 'description', 'version', 'fingerprint',
+)
+
+
+def iter_csv_rows(file, encoding='utf-8-sig'):
+    """
+    Reads the rows of an uploaded CSV file without loading the whole file.
+
+    Args:
+        file (File): The uploaded file, opened in binary mode.
+        encoding (str): The file encoding. The default also strips a byte order mark.
+
+    Yields:
+        tuple: (row_number, row), where row_number starts at 1 and row maps column names to values.
+    """
+    reader = csv.DictReader(codecs.getreader(encoding)(file))
+    for row_number, row in enumerate(reader, start=1):
+        yield row_number, row
+
+
+def chunked(rows, size=CHUNK_SIZE):
+    """
+    Groups an iterable into lists of at most `size` items.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_lookups(user):
+    """
+    Loads the dictionaries used to resolve the category and account columns of an import.
+
+    Args:
+        user (User): The user importing transactions.
+
+    Returns:
+        tuple: (categories, accounts), mapping category names and account numbers to IDs.
+    """
+    categories = {}
+    for category_id, name in Category.objects.filter(user=user).order_by('id').values_list('id', 'name'):
+        categories.setdefault(name, category_id)
+    accounts = dict(Account.objects.filter(user=user).values_list('account_number', 'id'))
+    return categories, accounts
+
+
+def match_statement_account(statement_account, accounts):
+    """
+    Matches the bank's account ID of a statement (the ACCTID of OFX files) to one of the user's accounts.
+
+    Bank account IDs are often longer than the account numbers users enter (branch and bank codes, zero
+    padding), so an account matches when its number is the whole ID or, if it is at least
+    STATEMENT_ACCOUNT_MIN_SUFFIX characters long, the end of it. Statements that match no account, or
+    several, are imported without an account rather than rejected.
+
+    Args:
+        statement_account (str): The account ID of the statement.
+        accounts (dict): Account IDs by account number.
+
+    Returns:
+        int: The ID of the matching account, or None.
+    """
+    if statement_account in accounts:
+        return accounts[statement_account]
+    matches = [
+        account_id for account_number, account_id in accounts.items()
+        if len(account_number) >= STATEMENT_ACCOUNT_MIN_SUFFIX and statement_account.endswith(account_number)
+    ]
+    return matches[0] if len(matches) == 1 else None
+
+
+def validate_chunk(chunk, categories, accounts, errors):
+    """
+    Validates a chunk of rows and converts the valid ones into transaction field values.
+
+    The transaction fields of the whole chunk are checked at once with validate_transaction_columns.
+
+    Args:
+        chunk (list): (row_number, row) pairs.
+        categories (dict): Category IDs by name.
+        accounts (dict): Account IDs by account number.
+        errors (list): Receives one message per invalid row.
+
+    Returns:
+        list: The field values of the valid rows, as dictionaries.
+    """
+    valid = []
+    column_errors = validate_transaction_columns(rows_to_columns([row for _, row in chunk]))
+    for (row_number, row), validation_errors in zip(chunk, column_errors):
+        row_errors = []
+
+        # Resolve and Validate category
+        category_id = None
+        category_value = row.get("category")
+        if category_value:
+            category_id = categories.get(category_value)
+            if category_id is None:
+                row_errors.append(f"Row {row_number}: Invalid category '{category_value}'.")
+
+        # Resolve and Validate account
+        account_id = None
+        account_value = row.get("account")
+        if account_value:
+            account_id = accounts.get(account_value)
+            if account_id is None:
+                row_errors.append(f"Row {row_number}: Invalid account '{account_value}'.")
+        elif row.get("statement_account"):
+            account_id = match_statement_account(row["statement_account"], accounts)
+
+        if validation_errors:
+            row_errors.append(f"Row {row_number}: {', '.join(validation_errors)}")
+
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+
+        values = {field: row[field] for field in CSV_FIELDS if row.get(field)}
+        try:
+            values['date'] = parse_iso_date(values['date'])
+            values['amount'] = Decimal(values['amount'])
+            if not values['amount'].is_finite():
+                raise ValueError(values['amount'])
+        except (KeyError, ValueError, ArithmeticError):
+            errors.append(f"Row {row_number}: Invalid data.")
+            continue
+        values['transaction_type'] = values['transaction_type'].lower()
+        values['category_id'] = category_id
+        values['account_id'] = account_id
+        if row.get('fitid'):
+            values['fitid'] = row['fitid']
+            values['statement_account'] = row.get('statement_account', '')
+        valid.append(values)
+    return valid
+
+
+def normalize_description(description):
+    """
+    Normalizes a description for fingerprinting: lowercase, with runs of whitespace collapsed.
+    """
+    return " ".join((description or "").lower().split())
+
+
+def fingerprint_chunk(user_id, valid, occurrences):
+    """
+    Adds a fingerprint to the field values of a chunk of valid rows.
+
+    Rows with a bank transaction ID (the FITID of OFX statements) are fingerprinted by the user, the
+    statement's account ID and that ID, which the bank guarantees to be unique and stable across
+    downloads. A transaction ID seen before in the import is the same transaction listed twice, so
+    that row is removed from the chunk.
+
+    Other rows get a SHA-256 of the user, account, date, signed amount and normalized description,
+    plus the occurrence index of that combination within the import. The index tells apart genuinely
+    repeated rows of one statement (two identical coffees on the same day), while importing the same
+    statement again produces the same fingerprints.
+
+    Args:
+        user_id (int): The ID of the user importing transactions.
+        valid (list): The field values of the valid rows of the chunk.
+        occurrences (dict): The number of times each combination (and each transaction ID) has been seen
+            so far in this import. It is shared by all the chunks of an import and keyed by a short
+            digest to stay compact.
+
+    Returns:
+        int: The number of rows removed because their transaction ID was repeated.
+    """
+    kept = []
+    for values in valid:
+        fitid = values.pop('fitid', None)
+        statement_account = values.pop('statement_account', '')
+        if fitid:
+            content = f"{user_id}|{statement_account}|fitid:{fitid}"
+            key = hashlib.blake2b(content.encode(), digest_size=8).digest()
+            if key in occurrences:
+                continue
+            occurrences[key] = 1
+            values['fingerprint'] = hashlib.sha256(content.encode()).hexdigest()
+            kept.append(values)
+            continue
+
+        signed_amount = values['amount'] if values['transaction_type'] == 'income' else -values['amount']
+        content = "|".join((
+            str(user_id),
+            str(values['account_id'] or ''),
+            values['date'].isoformat(),
+            f"{signed_amount:.2f}",
+            normalize_description(values.get('description')),
+        ))
+        key = hashlib.blake2b(content.encode(), digest_size=8).digest()
+        occurrence = occurrences.get(key, 0)
+        occurrences[key] = occurrence + 1
+        values['fingerprint'] = hashlib.sha256(f"{content}|{occurrence}".encode()).hexdigest()
+        kept.append(values)
+
+    repeated = len(valid) - len(kept)
+    valid[:] = kept
+    return repeated
+
+
+def copy_supported():
+    """
+    Returns whether the database connection can stream rows with COPY ... FROM STDIN.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    # imported here because it requires a PostgreSQL driver, which SQLite setups may not install
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return is_psycopg3
+
+
+def resolve_backend(backend):
+    """
+    Resolves the insert backend of an import.
+
+    Args:
+        backend (str): One of INSERT_BACKENDS.
+
+    Returns:
+        str: 'copy' or 'bulk'.
+
+    Raises:
+        ValueError: If the backend is unknown, or is 'copy' and the database does not support it.
+    """
+    if backend not in INSERT_BACKENDS:
+        raise ValueError(f"Unknown insert backend '{backend}'.")
+    if backend == 'auto':
+        return 'copy' if copy_supported() else 'bulk'
+    if backend == 'copy' and not copy_supported():
+        raise ValueError("The COPY backend requires PostgreSQL with psycopg 3.")
+    return backend
+
+
+def copy_rows(user, rows):
+    """
+    Streams transaction rows into the transaction table with COPY ... FROM STDIN.
+
+    COPY skips the ORM entirely (no model instances, no per-row INSERT), so it is the fastest way to
+    load large backfills. Like bulk_create, it sends no signals, so the caller maintains the balances
+    and rollups.
+
+    Args:
+        user (User): The owner of the transactions.
+        rows (list): The field values of the transactions, as produced by validate_chunk.
+    """
+    table = connection.ops.quote_name(Transaction._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(column) for column in COPY_COLUMNS)
+    # cursor.copy is the driver's own method, so its errors are converted to Django's here
+    with connection.cursor() as cursor, connection.wrap_database_errors:
+        with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+            for values in rows:
+                copy.write_row((
+                    user.pk,
+                    values['account_id'],
+                    values['category_id'],
+                    values['amount'],
+                    values['transaction_type'],
+                    values.get('method'),
+                    values['date'],
+                    values.get('description'),
+                    1,
+                    values.get('fingerprint'),
+                ))
+
+
+def insert_chunk(user, valid, balance_deltas, rollup_deltas, batch_size=CHUNK_SIZE, backend='bulk'):
+    """
+    Inserts the fingerprinted rows of a chunk that were not imported before.
+
+    A concurrent import of the same statement may insert the same fingerprints between the lookup and
+    the insert. The unique constraint then makes this insert wait for the other import and fail once
+    it commits, so the chunk is rolled back to its savepoint and inserted again without the rows the
+    other import committed, which count as skipped.
+
+    Args:
+        user (User): The user importing transactions.
+        valid (list): The field values of the valid rows of the chunk, with their fingerprint.
+        balance_deltas (dict): Receives the balance change of every inserted row, by account ID and date.
+        rollup_deltas (dict): Receives the rollup change of every inserted row.
+        batch_size (int): The number of rows per INSERT statement (bulk backend only).
+        backend (str): 'copy' or 'bulk', see resolve_backend.
+
+    Returns:
+        tuple: (inserted, skipped), the number of rows inserted and skipped as already imported.
+    """
+    for attempt in range(1, INSERT_ATTEMPTS + 1):
+        existing = set(Transaction.objects.filter(
+            user=user, fingerprint__in=[values['fingerprint'] for values in valid]
+        ).values_list('fingerprint', flat=True)) if valid else set()
+        new_rows = [values for values in valid if values['fingerprint'] not in existing]
+        try:
+            with transaction.atomic():
+                if backend == 'copy':
+                    copy_rows(user, new_rows)
+                else:
+                    Transaction.objects.bulk_create(
+                        [Transaction(user=user, **values) for values in new_rows], batch_size=batch_size
+                    )
+            break
+        except IntegrityError:
+            if attempt == INSERT_ATTEMPTS:
+                raise
+            logger.info("Rows of user %s were imported concurrently, retrying the chunk", user.pk)
+
+    for values in new_rows:
+        record_balance(
+            balance_deltas, values['account_id'], values['date'], values['transaction_type'], values['amount']
+        )
+        rollups.record_transaction(
+            rollup_deltas, user.pk, values['date'], values['transaction_type'], values['amount']
+        )
+    return len(new_rows), len(valid) - len(new_rows)
+
+
+def run_import(user, rows, chunk_size=CHUNK_SIZE, progress=None, backend='auto'):
+    """
+    Validates and inserts a stream of imported rows.
+
+    Args:
+        user (User): The user importing transactions.
+        rows (iterable): (row_number, row) pairs, such as the output of iter_csv_rows.
+        chunk_size (int): The number of rows validated and inserted at a time.
+        progress (callable, optional): Called with the partial outcome after every chunk.
+        backend (str): How rows are inserted, one of INSERT_BACKENDS.
+
+    Returns:
+        dict: The outcome of the import, containing:
+            - rows (int): The number of rows read.
+            - inserted (int): The number of transactions created (0 if there were errors).
+            - skipped (int): The number of rows skipped because they were already imported (or listed
+              twice in the statement).
+            - errors (list): The first MAX_REPORTED_ERRORS error messages.
+            - error_count (int): The total number of errors.
+            - warnings (list): Messages about parts of the file that were left out without failing the
+              import (see archives.import_archive). Always empty for a single statement file.
+            - seconds (float): The duration of the import.
+            - rows_per_second (float): The import throughput.
+            - backend (str): The insert backend used, 'copy' or 'bulk'.
+    """
+    backend = resolve_backend(backend)
+    started = time.perf_counter()
+    result = {
+        'rows': 0, 'inserted': 0, 'skipped': 0, 'errors': [], 'error_count': 0, 'warnings': [], 'backend': backend,
+    }
+    categories, accounts = load_lookups(user)
+    occurrences = {}
+    balance_deltas = {}
+    rollup_deltas = {}
+
+    with transaction.atomic():
+        try:
+            for chunk in chunked(rows, chunk_size):
+                result['rows'] += len(chunk)
+                chunk_errors = []
+                valid = validate_chunk(chunk, categories, accounts, chunk_errors)
+                repeated = fingerprint_chunk(user.pk, valid, occurrences)
+                if chunk_errors:
+                    result['error_count'] += len(chunk_errors)
+                    result['errors'].extend(chunk_errors[:MAX_REPORTED_ERRORS - len(result['errors'])])
+                if result['error_count']:
+                    # The import will be rolled back, so only keep validating
+                    if progress:
+                        progress(result)
+                    continue
+
+                inserted, skipped = insert_chunk(
+                    user, valid, balance_deltas, rollup_deltas, batch_size=chunk_size, backend=backend
+                )
+                result['inserted'] += inserted
+                result['skipped'] += skipped + repeated
+                if progress:
+                    progress(result)
+        except (csv.Error, UnicodeDecodeError) as e:
+            result['error_count'] += 1
+            result['errors'].append(f"Error processing file: {e}")
+
+        if result['error_count']:
+            transaction.set_rollback(True)
+            result['inserted'] = result['skipped'] = 0
+        else:
+            apply_balance_deltas(balance_deltas)
+            rollups.apply_deltas(rollup_deltas)
+
+    if result['inserted']:
+        # Bulk writes do not send post_save signals, so invalidate the user's cached data here
+        bump_data_generation(user.pk)
+
+    result['seconds'] = time.perf_counter() - started
+    result['rows_per_second'] = result['rows'] / result['seconds'] if result['seconds'] else 0.0
+    logger.info(
+        "Imported %s of %s rows (%s already imported) for user %s in %.2fs (%.0f rows/sec, %s)",
+        result['inserted'], result['rows'], result['skipped'], user.pk, result['seconds'], result['rows_per_second'],
+        backend,
+    )
+    return result
+
+
+def import_csv(user, file, chunk_size=CHUNK_SIZE, progress=None, backend='auto'):
+    """
+    Imports the transactions of an uploaded CSV file.
+
+    Args:
+        user (User): The user importing transactions.
+        file (File): The uploaded CSV file.
+        chunk_size (int): The number of rows validated and inserted at a time.
+        progress (callable, optional): Called with the partial outcome after every chunk.
+        backend (str): How rows are inserted, one of INSERT_BACKENDS.
+
+    Returns:
+        dict: The outcome of the import, see run_import.
+    """
+    file.seek(0)
+    return run_import(user, iter_csv_rows(file), chunk_size=chunk_size, progress=progress, backend=backend)
+
+
+# Statement parsers by file extension
+STATEMENT_PARSERS = {
+    '.csv': iter_csv_rows,
+    '.ofx': iter_ofx_rows,
+    '.qfx': iter_ofx_rows,
+    '.qif': iter_qif_rows,
+}
+
+
+def import_statement(user, file, file_name, chunk_size=CHUNK_SIZE, progress=None, backend='auto'):
+    """
+    Imports the transactions of an uploaded statement file, parsed according to its extension.
+
+    Zip archives of statement files are imported as a whole, see archives.import_archive.
+
+    Args:
+        user (User): The user importing transactions.
+        file (File): The statement file, opened in binary mode.
+        file_name (str): The name of the file, whose extension is one of STATEMENT_PARSERS or '.zip'.
+        chunk_size (int): The number of rows validated and inserted at a time.
+        progress (callable, optional): Called with the partial outcome after every chunk.
+        backend (str): How rows are inserted, one of INSERT_BACKENDS.
+
+    Returns:
+        dict: The outcome of the import, see run_import.
+
+    Raises:
+        ValueError: If the file type is not supported.
+    """
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension == '.zip':
+        from .archives import import_archive_file  # imported here because archives depends on this module
+        return import_archive_file(user, file, chunk_size=chunk_size, progress=progress, backend=backend)
+    if extension not in STATEMENT_PARSERS:
+        raise ValueError(f"Unsupported statement file type '{extension}'.")
+    file.seek(0)
+    return run_import(
+        user, STATEMENT_PARSERS[extension](file), chunk_size=chunk_size, progress=progress, backend=backend
+    )
@@ -0,0 +1,268 @@
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .imports import MAX_REPORTED_ERRORS, import_statement
+from .models import ImportJob
+
+logger = logging.getLogger(__name__) #create logger specific to this module
+
+
+"""
+This module runs statement imports in the background.
+
+An upload is spooled to IMPORT_SPOOL_DIR and recorded as a pending ImportJob, so the upload request
+returns immediately. The job is then imported either by a thread pool inside the web process
+(IMPORT_JOBS_IN_PROCESS) or by the `process_import_jobs` management command.
+
+The import itself runs in a single database transaction, so its progress is not visible in the
+ImportJob row until it finishes. Live progress is published in the cache instead, under PROGRESS_KEY.
+
+A worker that dies mid-import (a restart, the OOM killer) leaves its job "running" and its spooled file
+in place. Jobs queued to the in-process thread pool are also lost on restart, and stay "pending".
+`process_import_jobs` recovers both: it imports pending jobs, and first re-queues the jobs that have
+been running for longer than IMPORT_JOB_TIMEOUT (see reclaim_stale_jobs). Deployments that import
+in process should still run it periodically, e.g. from cron.
+"""
+
+PROGRESS_KEY = "finance_tracker:import_progress:{job_id}"
+PROGRESS_TIMEOUT = 60 * 60
+# Fields of a job that record the outcome of its import
+RESULT_FIELDS = (
+    "rows_parsed", "rows_inserted", "rows_skipped", "error_count", "errors", "warnings", "rows_per_second",
+    "status", "finished_at",
+)
+
+_executor = None
+
+
+def _get_executor():
+    """
+    Returns the thread pool that runs imports in the web process, creating it on first use.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "IMPORT_WORKERS", 2), thread_name_prefix="import"
+        )
+    return _executor
+
+
+def spool_upload(uploaded_file):
+    """
+    Writes an uploaded file to the spool directory, chunk by chunk.
+
+    Args:
+        uploaded_file (UploadedFile): The uploaded file.
+
+    Returns:
+        str: The path of the spooled file.
+    """
+    spool_dir = Path(settings.IMPORT_SPOOL_DIR)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    path = spool_dir / f"{uuid.uuid4().hex}{Path(uploaded_file.name).suffix}"
+    with open(path, "wb") as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    return str(path)
+
+
+def create_import_job(user, uploaded_file):
+    """
+    Spools an uploaded file and queues it for import.
+
+    Args:
+        user (User): The user importing the file.
+        uploaded_file (UploadedFile): The uploaded statement file.
+
+    Returns:
+        ImportJob: The pending job.
+    """
+    return queue_import_job(user, uploaded_file.name, spool_upload(uploaded_file))
+
+
+def queue_import_job(user, file_name, file_path):
+    """
+    Queues a spooled statement file for import.
+
+    Args:
+        user (User): The user importing the file.
+        file_name (str): The name of the uploaded file, whose extension selects the parser.
+        file_path (str): The path of the spooled file, which is removed once it has been imported.
+
+    Returns:
+        ImportJob: The pending job.
+    """
+    job = ImportJob.objects.create(user=user, file_name=file_name, file_path=file_path)
+    if getattr(settings, "IMPORT_JOBS_IN_PROCESS", True):
+        # Only hand the job to a worker thread once the job row is visible to other connections
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def _run_in_thread(job_id):
+    """
+    Runs an import job in a worker thread, which needs its own database connection.
+    """
+    close_old_connections()
+    try:
+        process_import_job(job_id)
+    except Exception:
+        logger.exception("Import job %s crashed", job_id)
+    finally:
+        close_old_connections()
+
+
+def _publish_progress(job_id, result):
+    """
+    Publishes the partial outcome of a running import.
+    """
+    cache.set(PROGRESS_KEY.format(job_id=job_id), {
+        "rows_parsed": result["rows"],
+        "rows_inserted": result["inserted"],
+        "rows_skipped": result["skipped"],
+        "error_count": result["error_count"],
+    }, PROGRESS_TIMEOUT)
+
+
+def process_import_job(job_id):
+    """
+    Imports the file of a pending job and records the outcome on the job.
+
+    The job is claimed with a conditional UPDATE, so a job is never processed twice when several
+    workers run at the same time. The outcome is only recorded if the job was not reclaimed meanwhile
+    (see reclaim_stale_jobs), in which case the file belongs to the new run.
+
+    Args:
+        job_id (int): The ID of the job.
+
+    Returns:
+        bool: Whether the job was claimed and processed by this call.
+    """
+    started_at = timezone.now()
+    claimed = ImportJob.objects.filter(pk=job_id, status="pending").update(
+        status="running", started_at=started_at, attempts=F("attempts") + 1
+    )
+    if not claimed:
+        return False
+
+    job = ImportJob.objects.select_related("user").get(pk=job_id)
+    try:
+        with open(job.file_path, "rb") as file:
+            result = import_statement(
+                job.user, file, job.file_name, progress=lambda partial: _publish_progress(job_id, partial)
+            )
+        job.rows_parsed = result["rows"]
+        job.rows_inserted = result["inserted"]
+        job.rows_skipped = result["skipped"]
+        job.error_count = result["error_count"]
+        job.errors = result["errors"]
+        job.warnings = result["warnings"]
+        job.rows_per_second = result["rows_per_second"]
+        job.status = "failed" if result["error_count"] else "completed"
+    except Exception as e:
+        logger.exception("Import job %s failed", job_id)
+        job.error_count += 1
+        job.errors = (job.errors + [f"Error processing file: {e}"])[:MAX_REPORTED_ERRORS]
+        job.status = "failed"
+    finally:
+        job.finished_at = timezone.now()
+        recorded = ImportJob.objects.filter(pk=job_id, status="running", started_at=started_at).update(
+            **{field: getattr(job, field) for field in RESULT_FIELDS}
+        )
+        cache.delete(PROGRESS_KEY.format(job_id=job_id))
+        # The statement is not kept once it has been imported
+        if recorded and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        elif not recorded:
+            logger.warning("Import job %s was reclaimed while it ran, its outcome is dropped", job_id)
+    return True
+
+
+def reclaim_stale_jobs():
+    """
+    Recovers the jobs whose worker died: the jobs still running IMPORT_JOB_TIMEOUT seconds after they
+    started.
+
+    A stale job is re-queued, so that the next worker imports its spooled file from the start (the
+    interrupted import was rolled back with its transaction). A job that has already been started
+    IMPORT_JOB_MAX_ATTEMPTS times is failed instead, and its spooled file removed, so a file that
+    kills its worker is not retried forever.
+
+    Returns:
+        tuple: (requeued, failed), the number of jobs re-queued and failed.
+    """
+    now = timezone.now()
+    stale = ImportJob.objects.filter(
+        status="running", started_at__lt=now - timedelta(seconds=settings.IMPORT_JOB_TIMEOUT)
+    )
+    failed = 0
+    exhausted = stale.filter(attempts__gte=settings.IMPORT_JOB_MAX_ATTEMPTS).values_list("pk", "file_path")
+    for job_id, file_path in exhausted:
+        # Failed one at a time, so that only the files of the jobs failed by this call are removed
+        if stale.filter(pk=job_id).update(
+            status="failed", finished_at=now, error_count=F("error_count") + 1,
+            errors=["The import was interrupted and could not be completed. Please upload the file again."],
+        ):
+            failed += 1
+            if os.path.exists(file_path):
+                os.remove(file_path)
+    requeued = stale.update(status="pending", started_at=None)
+    if requeued or failed:
+        logger.warning("Re-queued %s and failed %s stale import jobs", requeued, failed)
+    return requeued, failed
+
+
+def get_job_progress(job):
+    """
+    Returns the progress of an import job, combining the job row with the live progress in the cache.
+
+    Args:
+        job (ImportJob): The job.
+
+    Returns:
+        dict: The job's id, status, row counts (parsed, inserted, skipped as already imported), errors so
+        far and, once finished, its warnings and throughput.
+    """
+    progress = {
+        "id": job.pk,
+        "file_name": job.file_name,
+        "status": job.status,
+        "rows_parsed": job.rows_parsed,
+        "rows_inserted": job.rows_inserted,
+        "rows_skipped": job.rows_skipped,
+        "error_count": job.error_count,
+        "errors": job.errors,
+        "warnings": job.warnings,
+        "rows_per_second": job.rows_per_second,
+        "finished": job.is_finished,
+    }
+    if job.status == "running":
+        progress.update(cache.get(PROGRESS_KEY.format(job_id=job.pk), {}))
+    return progress
+
+
+def process_pending_jobs(limit=None):
+    """
+    Processes pending jobs in upload order.
+
+    Args:
+        limit (int, optional): The maximum number of jobs to process.
+
+    Returns:
+        int: The number of jobs processed.
+    """
+    processed = 0
+    pending = ImportJob.objects.filter(status="pending").order_by("created_at").values_list("pk", flat=True)
+    for job_id in pending[:limit] if limit else pending:
+        if process_import_job(job_id):
+            processed += 1
+    return processed
@@ -0,0 +1,97 @@
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+from django.test.utils import CaptureQueriesContext
+from finance_tracker.aggregation import summarize_daily_rollups, summarize_transactions
+from finance_tracker.models import Account, Category, Transaction, User
+from finance_tracker.rollups import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the dashboard aggregation paths (query count and wall time) at several data sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[10_000, 100_000, 1_000_000],
+            help='Number of transactions to benchmark with (one run per value)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>10} {'path':<20} {'queries':>8} {'seconds':>10}")
+        for row_count in options['rows']:
+            # Everything created for the benchmark is rolled back at the end of each run
+            with transaction.atomic():
+                user = self.seed(row_count)
+                for name, func in (
+                    ("legacy (per-row)", self.legacy_dashboard),
+                    ("grouped query", lambda u: summarize_transactions(Transaction.objects.filter(user=u))),
+                    ("daily rollup", summarize_daily_rollups),
+                ):
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        func(user)
+                        elapsed = time.perf_counter() - start
+                    self.stdout.write(f"{row_count:>10} {name:<20} {len(queries):>8} {elapsed:>10.3f}")
+                transaction.set_rollback(True)
+
+    def seed(self, row_count):
+        """Creates a throwaway user with row_count transactions spread over five years."""
+        user = User.objects.create_user(
+            username="benchmark_user", email="benchmark@example.com", name="Benchmark", password=None
+        )
+        account = Account.objects.create(user=user, account_type="checking", account_number="BENCH0001")
+        categories = [
+            Category.objects.create(user=user, name=name, type=category_type)
+            for name, category_type in (("Salary", "income"), ("Groceries", "expense"), ("Rent", "expense"))
+        ]
+
+        first_day = date.today() - timedelta(days=5 * 365)
+        batch = []
+        for _ in range(row_count):
+            category = random.choice(categories)
+            batch.append(Transaction(
+                user=user,
+                account=account,
+                category=category,
+                amount=Decimal(random.randint(100, 500_000)) / 100,
+                transaction_type=category.type,
+                date=first_day + timedelta(days=random.randint(0, 5 * 365)),
+                description=f"{category.name} transaction",
+            ))
+            if len(batch) == 10_000:
+                Transaction.objects.bulk_create(batch)
+                batch = []
+        Transaction.objects.bulk_create(batch)
+
+        # bulk_create bypasses Transaction.save, so build the rollup in one pass
+        rebuild_daily_summaries(user=user)
+        return user
+
+    def legacy_dashboard(self, user):
+        """The dashboard aggregation as it was before the aggregation module was introduced."""
+        transactions = Transaction.objects.filter(user=user).order_by('date')
+        transactions.filter(transaction_type='income').aggregate(Sum('amount'))
+        transactions.filter(transaction_type='expense').aggregate(Sum('amount'))
+        list(Transaction.objects.filter(user=user).annotate(
+            month=TruncMonth('date')
+        ).values('month').annotate(
+            income=Sum('amount', filter=Q(transaction_type='income')),
+            expenses=Sum('amount', filter=Q(transaction_type='expense'))
+        ).order_by('month'))
+
+        aggregated_data = defaultdict(lambda: {"income": 0, "expenses": 0})
+        for t in transactions:
+            date_str = t.date.strftime('%Y-%m-%d')
+            if t.transaction_type == 'income':
+                aggregated_data[date_str]["income"] += float(t.amount)
+            elif t.transaction_type == 'expense':
+                aggregated_data[date_str]["expenses"] += float(t.amount)
@@ -0,0 +1,75 @@
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from finance_tracker.imports import copy_supported, run_import
+from finance_tracker.models import Account, Category, User
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the import insert backends (COPY vs bulk INSERTs) at several data sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[10_000, 100_000],
+            help='Number of rows to import (one run per value and backend)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5_000,
+            help='Number of rows validated and inserted at a time'
+        )
+
+    def handle(self, *args, **options):
+        backends = ['bulk', 'copy'] if copy_supported() else ['bulk']
+        if 'copy' not in backends:
+            self.stdout.write(self.style.WARNING("COPY needs PostgreSQL with psycopg 3, only benchmarking bulk INSERTs."))
+
+        self.stdout.write(f"{'rows':>10} {'backend':<8} {'queries':>8} {'seconds':>10} {'rows/sec':>10}")
+        for row_count in options['rows']:
+            for backend in backends:
+                # Everything created for the benchmark is rolled back at the end of each run
+                with transaction.atomic():
+                    user = self.seed()
+                    reset_queries()
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        result = run_import(user, self.rows(row_count), chunk_size=options['chunk_size'], backend=backend)
+                        elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f"{row_count:>10} {backend:<8} {len(queries):>8} {elapsed:>10.3f} {row_count / elapsed:>10.0f}"
+                    )
+                    if result['inserted'] != row_count:
+                        self.stderr.write(f"Expected {row_count} inserted rows, got {result['inserted']}: {result['errors'][:5]}")
+                    transaction.set_rollback(True)
+
+    def seed(self):
+        """Creates a throwaway user with an account and a few categories to import into."""
+        user = User.objects.create_user(
+            username="benchmark_user", email="benchmark@example.com", name="Benchmark", password=None
+        )
+        Account.objects.create(user=user, account_type="checking", account_number="BENCH0001")
+        for name, category_type in (("Salary", "income"), ("Groceries", "expense"), ("Rent", "expense")):
+            Category.objects.create(user=user, name=name, type=category_type)
+        return user
+
+    def rows(self, row_count):
+        """Generates row_count CSV-like rows spread over the last five years."""
+        categories = (("Salary", "income"), ("Groceries", "expense"), ("Rent", "expense"))
+        first_day = date.today() - timedelta(days=5 * 365)
+        for row_number in range(1, row_count + 1):
+            name, transaction_type = random.choice(categories)
+            yield row_number, {
+                "date": (first_day + timedelta(days=random.randint(0, 5 * 365))).isoformat(),
+                "transaction_type": transaction_type,
+                "amount": f"{random.randint(100, 500_000) / 100:.2f}",
+                "description": f"{name} transaction {row_number}",
+                "category": name,
+                "account": "BENCH0001",
+            }
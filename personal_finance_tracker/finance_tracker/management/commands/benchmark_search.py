@@ -0,0 +1,105 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from finance_tracker.models import Account, Category, Transaction, User
+from finance_tracker.search import full_text_search_supported, search_transactions
+
+MERCHANTS = [
+    "Walmart Supercenter", "Tim Hortons", "Starbucks Coffee", "Shell Gas Station", "Costco Wholesale",
+    "Amazon Marketplace", "Netflix Subscription", "Hydro One Bill", "Rogers Wireless", "Loblaws Grocery",
+    "Canadian Tire", "Shoppers Drug Mart", "Uber Trip", "Air Canada Flight", "Payroll Deposit",
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the keyword search of query_transactions: ILIKE scans against full-text search (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[10_000, 100_000, 1_000_000],
+            help='Number of transactions to benchmark with (one run per value)'
+        )
+        parser.add_argument(
+            '--keywords',
+            nargs='+',
+            default=["coffee", "walm", "grocery", "netflix subscription", "zzz"],
+            help='Keywords to search for'
+        )
+
+    def handle(self, *args, **options):
+        if not full_text_search_supported():
+            raise CommandError("Full-text search requires PostgreSQL.")
+
+        self.stdout.write(f"{'rows':>10} {'keyword':<22} {'path':<10} {'matches':>8} {'seconds':>10}")
+        for row_count in options['rows']:
+            # Everything created for the benchmark is rolled back at the end of each run
+            with transaction.atomic():
+                user = self.seed(row_count)
+                for keyword in options['keywords']:
+                    for name, func in (("ilike", self.ilike_page), ("full-text", self.full_text_page)):
+                        start = time.perf_counter()
+                        matches = func(user, keyword)
+                        elapsed = time.perf_counter() - start
+                        self.stdout.write(f"{row_count:>10} {keyword:<22} {name:<10} {matches:>8} {elapsed:>10.3f}")
+                transaction.set_rollback(True)
+
+    def seed(self, row_count):
+        """Creates a throwaway user with row_count transactions spread over five years."""
+        user = User.objects.create_user(
+            username="benchmark_user", email="benchmark@example.com", name="Benchmark", password=None
+        )
+        account = Account.objects.create(user=user, account_type="checking", account_number="BENCH0001")
+        categories = [
+            Category.objects.create(user=user, name=name, type=category_type)
+            for name, category_type in (
+                ("Salary", "income"), ("Groceries", "expense"), ("Rent", "expense"), ("Dining Out", "expense"),
+            )
+        ]
+
+        first_day = date.today() - timedelta(days=5 * 365)
+        batch = []
+        for i in range(row_count):
+            category = random.choice(categories)
+            batch.append(Transaction(
+                user=user,
+                account=account,
+                category=category,
+                amount=Decimal(random.randint(100, 500_000)) / 100,
+                transaction_type=category.type,
+                date=first_day + timedelta(days=random.randint(0, 5 * 365)),
+                description=f"{random.choice(MERCHANTS)} #{i % 9973}",
+            ))
+            if len(batch) == 10_000:
+                Transaction.objects.bulk_create(batch)
+                batch = []
+        Transaction.objects.bulk_create(batch)
+
+        # Give the planner statistics about the new rows, as autovacuum would
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(Transaction._meta.db_table)}")
+        return user
+
+    def ilike_page(self, user, keyword):
+        """The keyword search as it was before full-text search: the match count and the first page."""
+        transactions = Transaction.objects.filter(user=user).filter(
+            Q(description__icontains=keyword) | Q(category__name__icontains=keyword)
+        ).order_by('-date', '-id')
+        matches = transactions.count()
+        list(transactions[:20])
+        return matches
+
+    def full_text_page(self, user, keyword):
+        """The ranked full-text search of query_transactions: the match count and the first page."""
+        transactions = search_transactions(Transaction.objects.filter(user=user), keyword).order_by(
+            '-rank', '-date', '-id'
+        )
+        matches = transactions.count()
+        list(transactions[:20])
+        return matches
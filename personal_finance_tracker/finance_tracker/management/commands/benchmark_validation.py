@@ -0,0 +1,70 @@
+import random
+import time
+from datetime import date, timedelta
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from finance_tracker.validation import rows_to_columns, validate_transaction_columns, validate_transaction_data
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks per-row transaction validation against the column-wise batch validator'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[1_000, 10_000, 100_000],
+            help='Number of rows to validate (one run per value)'
+        )
+        parser.add_argument(
+            '--invalid-ratio',
+            type=float,
+            default=0.1,
+            help='Share of generated rows that are invalid'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>10} {'path':<12} {'seconds':>10} {'rows/sec':>12}")
+        for row_count in options['rows']:
+            rows = self.rows(row_count, options['invalid_ratio'])
+
+            start = time.perf_counter()
+            per_row = []
+            for row in rows:
+                try:
+                    validate_transaction_data(row)
+                    per_row.append([])
+                except ValidationError as e:
+                    per_row.append(e.messages)
+            per_row_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch = validate_transaction_columns(rows_to_columns(rows))
+            batch_elapsed = time.perf_counter() - start
+
+            for name, elapsed in (("per-row", per_row_elapsed), ("column-wise", batch_elapsed)):
+                self.stdout.write(f"{row_count:>10} {name:<12} {elapsed:>10.3f} {row_count / elapsed:>12.0f}")
+            if per_row != batch:
+                self.stderr.write("The two validators reported different errors.")
+
+    def rows(self, row_count, invalid_ratio):
+        """Generates CSV-like rows over the last five years, a share of them invalid."""
+        first_day = date.today() - timedelta(days=5 * 365)
+        invalid_values = (
+            ("date", "2024-13-01"), ("date", ""), ("transaction_type", "transfer"),
+            ("amount", "abc"), ("amount", "2000000"), ("description", ""),
+        )
+        rows = []
+        for i in range(row_count):
+            row = {
+                "date": (first_day + timedelta(days=random.randint(0, 5 * 365))).isoformat(),
+                "transaction_type": random.choice(("income", "expense")),
+                "amount": f"{random.randint(100, 500_000) / 100:.2f}",
+                "description": f"Transaction {i}",
+            }
+            if random.random() < invalid_ratio:
+                field, value = random.choice(invalid_values)
+                row[field] = value
+            rows.append(row)
+        return rows
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from finance_tracker.imports import CHUNK_SIZE, INSERT_BACKENDS, import_statement
+from finance_tracker.models import User
+
+
+class Command(BaseCommand):
+    help = 'Imports a statement file (CSV, OFX, QFX or QIF) for a user and reports the import throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'file',
+            type=str,
+            help='Path of the statement file to import (.csv, .ofx, .qfx or .qif)'
+        )
+        parser.add_argument(
+            '--email',
+            type=str,
+            required=True,
+            help='Email address of the user who owns the transactions'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Number of rows validated and inserted at a time'
+        )
+        parser.add_argument(
+            '--backend',
+            choices=INSERT_BACKENDS,
+            default='auto',
+            help='How rows are inserted: COPY (PostgreSQL only), bulk INSERTs, or COPY when available'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with the email '{options['email']}' exists.")
+
+        try:
+            with open(options['file'], 'rb') as file:
+                result = import_statement(
+                    user, file, options['file'], chunk_size=options['chunk_size'], backend=options['backend']
+                )
+        except OSError as e:
+            raise CommandError(f"Could not read '{options['file']}': {e}")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for warning in result['warnings']:
+            self.stderr.write(self.style.WARNING(warning))
+        for error in result['errors']:
+            self.stderr.write(error)
+        if result['error_count']:
+            raise CommandError(
+                f"{result['error_count']} error(s) found in {result['rows']} rows. No transactions were imported."
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['inserted']} transactions ({result['skipped']} already imported rows skipped) "
+            f"in {result['seconds']:.2f}s "
+            f"({result['rows_per_second']:.0f} rows/sec, {result['backend']} backend)."
+        ))
@@ -0,0 +1,37 @@
+import time
+from django.core.management.base import BaseCommand
+from finance_tracker.jobs import process_pending_jobs, reclaim_stale_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports the pending uploaded statement files (use with IMPORT_JOBS_IN_PROCESS = False), after '
+        're-queueing the jobs whose worker died'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs instead of exiting once the queue is empty'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls when --loop is used'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeued, failed = reclaim_stale_jobs()
+            if requeued or failed:
+                self.stdout.write(self.style.WARNING(
+                    f"Re-queued {requeued} and failed {failed} import job(s) whose worker died."
+                ))
+            processed = process_pending_jobs()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} import job(s)."))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from finance_tracker.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Removes abandoned or failed chunked uploads and their spooled parts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=None,
+            help='Remove uploads that have not received a part for this many hours (default: CHUNKED_UPLOAD_EXPIRY_HOURS)'
+        )
+
+    def handle(self, *args, **options):
+        removed = purge_stale_uploads(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} stale upload(s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from finance_tracker.models import User
+from finance_tracker.rollups import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily transaction rollup table used by the dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            type=str,
+            help='Only rebuild the rollup rows of the user with this email address'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['email']:
+            try:
+                user = User.objects.get(email=options['email'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with the email '{options['email']}' exists.")
+
+        count = rebuild_daily_summaries(user=user)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily summary rows."))
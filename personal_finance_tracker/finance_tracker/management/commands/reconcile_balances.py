@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from finance_tracker.balances import adjust_balance, reconcile_balances
+from finance_tracker.caching import bump_data_generation
+from finance_tracker.models import Account, User
+
+
+class Command(BaseCommand):
+    help = 'Recomputes every account balance from its transactions and reports the accounts that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            type=str,
+            help='Only check the accounts of the user with this email address'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Set the drifted balances to their recomputed value'
+        )
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.all()
+        if options['email']:
+            try:
+                accounts = accounts.filter(user=User.objects.get(email=options['email']))
+            except User.DoesNotExist:
+                raise CommandError(f"No user with the email '{options['email']}' exists.")
+
+        checked, drifted = reconcile_balances(accounts)
+        if drifted:
+            self.stdout.write(f"{'account':>10} {'user':>8} {'stored':>16} {'expected':>16} {'drift':>16}")
+        for row in drifted:
+            account = row['account']
+            self.stdout.write(
+                f"{account.account_number:>10} {account.user_id:>8} "
+                f"{row['stored']:>16} {row['expected']:>16} {row['drift']:>16}"
+            )
+            if options['fix']:
+                # Corrected by the drift rather than overwritten, so that concurrent writes are kept
+                adjust_balance(account.pk, -row['drift'])
+                bump_data_generation(account.user_id)
+
+        if drifted and not options['fix']:
+            raise CommandError(
+                f"{len(drifted)} of {checked} account balance(s) drifted from their transactions. "
+                "Run again with --fix to correct them."
+            )
+        fixed = f", {len(drifted)} corrected" if drifted else ""
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} account balance(s){fixed}."))
@@ -0,0 +1,36 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from finance_tracker.models import Account, User
+from finance_tracker.snapshots import take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the month-end balance snapshots used to answer historical balance queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            type=str,
+            help='Only snapshot the accounts of the user with this email address'
+        )
+        parser.add_argument(
+            '--through',
+            type=str,
+            help='Last month to snapshot, as YYYY-MM-DD (default: the previous month)'
+        )
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.all()
+        if options['email']:
+            try:
+                accounts = accounts.filter(user=User.objects.get(email=options['email']))
+            except User.DoesNotExist:
+                raise CommandError(f"No user with the email '{options['email']}' exists.")
+
+        try:
+            through = date.fromisoformat(options['through']) if options['through'] else None
+        except ValueError:
+            raise CommandError(f"Invalid date '{options['through']}', expected YYYY-MM-DD.")
+
+        count = take_snapshots(accounts, through=through)
+        self.stdout.write(self.style.SUCCESS(f"Took {count} balance snapshots."))
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_daily_summaries(apps, schema_editor):
+    """Backfill the rollup table from the existing transactions."""
+    Transaction = apps.get_model('finance_tracker', 'Transaction')
+    DailyTransactionSummary = apps.get_model('finance_tracker', 'DailyTransactionSummary')
+    rows = Transaction.objects.values('user_id', 'date', 'transaction_type').annotate(
+        total=Sum('amount'), count=Count('id')
+    ).order_by()
+    DailyTransactionSummary.objects.bulk_create(
+        (DailyTransactionSummary(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_tracker', '0010_customnotification_notification_datetime_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTransactionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date', 'transaction_type')},
+            },
+        ),
+        migrations.RunPython(populate_daily_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_tracker', '0012_transaction_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
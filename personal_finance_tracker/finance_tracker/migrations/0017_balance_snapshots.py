@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:56
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+def populate_opening_balances(apps, schema_editor):
+    """Backfill the opening balances as the current balances minus the sum of the existing transactions."""
+    Account = apps.get_model('finance_tracker', 'Account')
+    balance = DecimalField(max_digits=20, decimal_places=2)
+    signed = Case(
+        When(transaction__transaction_type='income', then=F('transaction__amount')),
+        When(transaction__transaction_type='expense', then=-F('transaction__amount')),
+        default=Value(Decimal('0')),
+        output_field=balance,
+    )
+    accounts = list(Account.objects.annotate(
+        ledger=Coalesce(Sum(signed), Value(Decimal('0')), output_field=balance)
+    ))
+    for account in accounts:
+        account.opening_balance = account.balance - account.ledger
+    Account.objects.bulk_update(accounts, ['opening_balance'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_tracker', '0016_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='opening_balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=20),
+        ),
+        migrations.CreateModel(
+            name='AccountBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='finance_tracker.account')),
+            ],
+            options={
+                'unique_together': {('account', 'date')},
+            },
+        ),
+        migrations.RunPython(populate_opening_balances, migrations.RunPython.noop),
+    ]
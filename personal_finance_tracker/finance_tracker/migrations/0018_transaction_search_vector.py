@@ -0,0 +1,77 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:12
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# The search document of a transaction: its description (weight A) and its category name (weight B).
+# Row triggers keep it current on every write, including COPY imports and bulk updates, and a rename
+# of a category refreshes the transactions of that category.
+CREATE_SEARCH_TRIGGERS = """
+CREATE FUNCTION finance_tracker_transaction_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT name FROM finance_tracker_category WHERE id = NEW.category_id), ''
+        )), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER finance_tracker_transaction_search_vector_trg
+    BEFORE INSERT OR UPDATE OF description, category_id ON finance_tracker_transaction
+    FOR EACH ROW EXECUTE FUNCTION finance_tracker_transaction_search_vector();
+
+CREATE FUNCTION finance_tracker_category_search_vector() RETURNS trigger AS $$
+BEGIN
+    UPDATE finance_tracker_transaction SET category_id = category_id WHERE category_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER finance_tracker_category_search_vector_trg
+    AFTER UPDATE OF name ON finance_tracker_category
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION finance_tracker_category_search_vector();
+
+UPDATE finance_tracker_transaction SET description = description;
+
+CREATE INDEX transaction_search_vector_idx ON finance_tracker_transaction USING gin (search_vector);
+"""
+
+DROP_SEARCH_TRIGGERS = """
+DROP INDEX IF EXISTS transaction_search_vector_idx;
+DROP TRIGGER IF EXISTS finance_tracker_category_search_vector_trg ON finance_tracker_category;
+DROP FUNCTION IF EXISTS finance_tracker_category_search_vector();
+DROP TRIGGER IF EXISTS finance_tracker_transaction_search_vector_trg ON finance_tracker_transaction;
+DROP FUNCTION IF EXISTS finance_tracker_transaction_search_vector();
+"""
+
+
+def create_search_triggers(apps, schema_editor):
+    """Create the search triggers and index, and fill the search vectors (PostgreSQL only)."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEARCH_TRIGGERS)
+
+
+def drop_search_triggers(apps, schema_editor):
+    """Drop the search triggers and index (PostgreSQL only)."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_TRIGGERS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_tracker', '0017_balance_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:03
+
+from django.db import migrations
+
+
+# The indexes cover the upper-cased text, which is what Django's case-insensitive lookups (icontains,
+# istartswith) compare, and which similarity searches use too (trigrams ignore case)
+CREATE_TRIGRAM_INDEXES = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX transaction_description_trgm_idx ON finance_tracker_transaction
+    USING gin (UPPER(description::text) gin_trgm_ops);
+
+CREATE INDEX category_name_trgm_idx ON finance_tracker_category
+    USING gin (UPPER(name::text) gin_trgm_ops);
+"""
+
+DROP_TRIGRAM_INDEXES = """
+DROP INDEX IF EXISTS category_name_trgm_idx;
+DROP INDEX IF EXISTS transaction_description_trgm_idx;
+"""
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Create the trigram indexes (PostgreSQL with the pg_trgm extension available only)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        available = cursor.fetchone() is not None
+    if available:
+        schema_editor.execute(CREATE_TRIGRAM_INDEXES)
+    # Otherwise similarity search falls back to keyword search (see search.py)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """Drop the trigram indexes, leaving the extension installed."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRIGRAM_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_tracker', '0018_transaction_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_tracker', '0020_transaction_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chunkedupload',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
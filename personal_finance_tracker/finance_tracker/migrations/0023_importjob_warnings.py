@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_tracker', '0022_importjob_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='warnings',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
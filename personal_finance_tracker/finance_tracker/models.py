@@ -1,12 +1,14 @@
 from django.db import models, transaction
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.conf import settings
 from decimal import Decimal
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.core.validators import MinValueValidator, MaxValueValidator
 import calendar
+import uuid
 from datetime import date
 
 
@@ -81,6 +83,8 @@ class Account(models.Model):
         user (ForeignKey): The user who owns the account.
         account_type (CharField): The type of account (e.g., checking, savings).
         balance (DecimalField): The current balance of the account.
+        opening_balance (DecimalField): The balance of the account before its first transaction, so
+            that balance = opening_balance + the sum of its transactions (see balances.py).
         created_at (DateTimeField): The date and time when the account was created.
         account_number (CharField): The unique account number.
         transit_number (CharField): The transit number for the account.
@@ -98,11 +102,27 @@ class Account(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     account_type = models.CharField(max_length=50, choices=ACCOUNT_TYPES)
     balance = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    opening_balance = models.DecimalField(max_digits=20, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     account_number = models.CharField(max_length=10, unique=True)
     transit_number = models.CharField(max_length=10, default="00000")
     institution_number = models.CharField(max_length=10, default="00000")
 
+    def save(self, *args, **kwargs):
+        """
+        Extends the default save method.
+
+        - Records the initial balance of a new account as its opening balance, since it has no
+          transactions yet.
+
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        if self._state.adding and not self.opening_balance:
+            self.opening_balance = self.balance
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Account: {self.account_number}, Balance: {self.balance}, Type: {self.account_type}"
 
@@ -143,6 +163,11 @@ class Transaction(models.Model):
         method (CharField): The method of the transaction (e.g., branch, ATM).
         date (DateField): The date of the transaction.
         description (TextField): A description of the transaction.
+        version (PositiveIntegerField): Incremented on every update, used to detect concurrent edits.
+        fingerprint (CharField): Content fingerprint of imported transactions, used to skip rows that
+            were already imported. Empty for transactions entered by hand.
+        search_vector (SearchVectorField): The full-text search document of the description and the
+            category name. Maintained by database triggers on PostgreSQL (see search.py), empty elsewhere.
     """
 
     TRANSACTION_TYPES = [
@@ -150,7 +175,8 @@ class Transaction(models.Model):
         ("expense", "Expense"),
     ]
 
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Not indexed on its own: every index below starts with the user
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
     account = models.ForeignKey(
         Account, on_delete=models.SET_NULL, null=True, blank=True
     )
@@ -173,75 +199,163 @@ class Transaction(models.Model):
  
     date = models.DateField(default=timezone.now, editable=True)
     description = models.TextField(max_length=255, null=True, blank=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    fingerprint = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        # Matched to the hot queries, see QueryPlanTests
+        indexes = [
+            # A user's transactions by date: date ranges (calendar feed, query page), the dashboard list
+            # and the (date, id) keyset pages of the timeline and query page, read in index order
+            models.Index(fields=['user', 'date', 'id'], name='transaction_user_date_id_idx'),
+            # Spending per category over a period (budget evaluation), answered from the index alone,
+            # and the dashboard's category filter
+            models.Index(
+                fields=['user', 'category', 'transaction_type', 'date', 'amount'], name='transaction_user_category_idx'
+            ),
+            # The GIN index of search_vector is PostgreSQL only, so it is created by migration 0018
+            # rather than declared here
+        ]
+        constraints = [
+            # An imported row can only be imported once (hand-entered transactions have no fingerprint)
+            models.UniqueConstraint(fields=['user', 'fingerprint'], name='transaction_user_fingerprint_uniq'),
+        ]
 
     def save(self, *args, **kwargs):
         """
         Extends the default save method.
 
         - Ensures the amount is a Decimal.
-        - Updates the associated account's balance based on the transaction type.
-        - Handles both new transactions and updates to existing transactions.
+        - Updates the associated account's balance based on the transaction type (see balances.py).
+        - Keeps the daily rollup table in sync with the transaction.
+        - Increments the version of updated transactions.
+        - Handles both new transactions and updates to existing transactions. The original row is locked
+          while it is updated, so that concurrent updates of the same transaction are applied one after
+          the other and each one reverts what the previous one applied.
 
         Args:
             *args: Variable length argument list.
             **kwargs: Arbitrary keyword arguments.
+
+        Raises:
+            Transaction.DoesNotExist: If the transaction being updated was deleted.
         """
 
         # Ensure amount is a Decimal
         if isinstance(self.amount, str):
             self.amount = Decimal(self.amount)
-        # Check if this is a new transaction or an update
-        is_new = self.pk is None
-        if not is_new:
-            # Fetch the original transaction from the database
-            original = Transaction.objects.get(pk=self.pk)
-            # Revert the original transaction's effect on the account balance
-            if original.account:
-                if original.transaction_type == "income":
-                    original.account.balance -= original.amount
-                elif original.transaction_type == "expense":
-                    original.account.balance += original.amount
-                original.account.save()
-
-        # Apply the new transaction's effect on the account balance
-        if self.account:
-            with transaction.atomic():
-                account = Account.objects.select_for_update().get(pk=self.account.pk)
-                if self.transaction_type == "income":
-                    account.balance += self.amount
-                elif self.transaction_type == "expense":
-                    account.balance -= self.amount
-                account.save()
+        from . import rollups  # imported here because rollups depends on this module
+        from .balances import apply_transaction_change  # imported here because balances depends on this module
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Fetch the original transaction from the database
+            original = None
+            if self.pk is not None:
+                original = Transaction.objects.select_for_update().only(
+                    "user_id", "account_id", "amount", "transaction_type", "date", "version"
+                ).get(pk=self.pk)
+
+            rollup_deltas = {}
+            if original:
+                self.version = original.version + 1
+                rollups.record_transaction(
+                    rollup_deltas, original.user_id, original.date, original.transaction_type, original.amount, sign=-1
+                )
+
+            super().save(*args, **kwargs)
+
+            apply_transaction_change(
+                (original.account_id, original.date, original.transaction_type, original.amount) if original else None,
+                (self.account_id, self.date, self.transaction_type, self.amount),
+            )
+            rollups.record_transaction(rollup_deltas, self.user_id, self.date, self.transaction_type, self.amount)
+            rollups.apply_deltas(rollup_deltas)
 
     def delete(self, *args, **kwargs):
         """
         Extends the default delete method.
 
-        - Reverts the transaction's effect on the associated account's balance.
-        - Deletes the transaction from the database.
+        - Reloads the stored values of the transaction, so that the post_delete handler reverts what is
+          actually stored (the instance may be stale). The handler reverts the transaction's effect on
+          the associated account's balance.
+        - Deletes the transaction from the database. A transaction that was already deleted (e.g. by a
+          concurrent request) is left alone, so that its effect is not reverted twice.
 
         Args:
             *args: Variable length argument list.
             **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            tuple: The number of objects deleted and a dictionary with the number of deletions per object type.
         """
+        with transaction.atomic():
+            stored = Transaction.objects.select_for_update().filter(pk=self.pk).values(
+                "user_id", "account_id", "amount", "transaction_type", "date"
+            ).first()
+            if stored is None:
+                return 0, {}
+            for field, value in stored.items():
+                setattr(self, field, value)
+            return super().delete(*args, **kwargs)
 
-        # Ensure amount is a Decimal
-        if isinstance(self.amount, str):
-            self.amount = Decimal(self.amount)
-        # Revert the transaction's effect on the account balance before deletion
-        if self.account:
-            if self.transaction_type == "income":
-                self.account.balance -= self.amount
-            elif self.transaction_type == "expense":
-                self.account.balance += self.amount
-            self.account.save()
+    def __str__(self):
+        return f"{self.user.email} - {self.transaction_type} - {self.amount}"
 
-        super().delete(*args, **kwargs)
+
+class DailyTransactionSummary(models.Model):
+    """
+    Per-user, per-day, per-type rollup of transaction amounts.
+
+    Maintained incrementally by the rollups module whenever transactions are saved, deleted or
+    imported, so the dashboard can chart a user's history without scanning every transaction.
+
+    Attributes:
+        user (ForeignKey): The user who owns the summarized transactions.
+        date (DateField): The day being summarized.
+        transaction_type (CharField): The type of transaction summarized (income or expense).
+        total (DecimalField): The sum of the amounts of the summarized transactions.
+        count (IntegerField): The number of summarized transactions.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    date = models.DateField()
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date', 'transaction_type')
 
     def __str__(self):
-        return f"{self.user.email} - {self.transaction_type} - {self.amount}"
+        return f"{self.user_id} - {self.date} - {self.transaction_type}: {self.total} ({self.count})"
+
+
+class AccountBalanceSnapshot(models.Model):
+    """
+    The balance of an account at the end of a day, usually a month end.
+
+    Snapshots are checkpoints for historical balances: the balance on any date is the nearest snapshot
+    plus the transactions in between (see snapshots.balance_as_of), instead of a sum over the whole
+    history of the account. They are taken by the take_balance_snapshots command and shifted by every
+    write that lands on or before their date (see balances.py).
+
+    Attributes:
+        account (ForeignKey): The account.
+        date (DateField): The day whose closing balance is recorded.
+        balance (DecimalField): The balance of the account at the end of the day, including every
+            transaction dated on or before it.
+    """
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="snapshots")
+    date = models.DateField()
+    balance = models.DecimalField(max_digits=20, decimal_places=2)
+
+    class Meta:
+        unique_together = ('account', 'date')
+
+    def __str__(self):
+        return f"{self.account_id} - {self.date}: {self.balance}"
 
 
 @receiver(post_delete, sender=Transaction)
@@ -251,7 +365,10 @@ def update_account_balance_on_delete(sender, instance, **kwargs):
 
     - If the transaction is of type "income", the transaction amount is subtracted from the account balance.
     - If the transaction is of type "expense", the transaction amount is added back to the account balance.
-    - Ensures that the account balance remains accurate after the transaction is removed.
+    - Ensures that the account balance remains accurate after the transaction is removed. This is the
+      only place a deleted transaction is reverted, for instance and queryset deletes alike.
+    - Removes the transaction from the daily rollup table. Queryset deletes also send this signal
+      for every row, so bulk deletes keep the rollup current as well.
 
     Args:
         sender (Model): The model class that triggered the signal (Transaction in this case).
@@ -261,14 +378,13 @@ def update_account_balance_on_delete(sender, instance, **kwargs):
     Returns:
         None
     """
-    if instance.account:
-        if isinstance(instance.amount, str):
-            instance.amount = Decimal(instance.amount)
-        if instance.transaction_type == "income":
-            instance.account.balance -= instance.amount
-        elif instance.transaction_type == "expense":
-            instance.account.balance += instance.amount
-        instance.account.save()
+    if isinstance(instance.amount, str):
+        instance.amount = Decimal(instance.amount)
+    from .balances import apply_transaction_change  # imported here because balances depends on this module
+    apply_transaction_change((instance.account_id, instance.date, instance.transaction_type, instance.amount))
+
+    from . import rollups  # imported here because rollups depends on this module
+    rollups.remove_transactions([instance])
 
 
 
@@ -438,6 +554,141 @@ class CustomNotification(models.Model):
     
     
 
+class ImportJob(models.Model):
+    """
+    Represents a statement file imported in the background.
+
+    The uploaded file is spooled to disk and imported by a worker (see jobs.py), while the upload page
+    polls the job's progress.
+
+    Attributes:
+        user (ForeignKey): The user importing the file.
+        file_name (CharField): The name of the uploaded file.
+        file_path (CharField): Where the uploaded file is spooled until it is imported.
+        status (CharField): pending, running, completed or failed.
+        rows_parsed (IntegerField): The number of rows read from the file.
+        rows_inserted (IntegerField): The number of transactions created.
+        rows_skipped (IntegerField): The number of rows skipped because they were already imported.
+        error_count (IntegerField): The number of invalid rows.
+        errors (JSONField): The first error messages.
+        warnings (JSONField): Messages about files of an archive that were skipped.
+        rows_per_second (FloatField): The import throughput.
+        attempts (IntegerField): The number of times a worker started importing the file.
+        created_at (DateTimeField): When the file was uploaded.
+        started_at (DateTimeField): When a worker last started importing the file.
+        finished_at (DateTimeField): When the import completed or failed.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    rows_parsed = models.IntegerField(default=0)
+    rows_inserted = models.IntegerField(default=0)
+    rows_skipped = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    warnings = models.JSONField(default=list, blank=True)
+    rows_per_second = models.FloatField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker picks up pending jobs in upload order
+            models.Index(fields=['status', 'created_at'], name='importjob_status_created_idx'),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in ("completed", "failed")
+
+    def __str__(self):
+        return f"{self.user_id} - {self.file_name} ({self.status})"
+
+
+class ChunkedUpload(models.Model):
+    """
+    Represents a statement file uploaded in parts, which can be resumed after a failure.
+
+    The parts are appended to a spool file (see uploads.py). Once every byte has been received and the
+    file's checksum matches, the file is handed to an ImportJob.
+
+    Attributes:
+        id (UUIDField): The upload's ID, used in its URLs.
+        user (ForeignKey): The user uploading the file.
+        file_name (CharField): The name of the uploaded file.
+        file_path (CharField): Where the parts are spooled.
+        size (BigIntegerField): The size of the whole file, in bytes.
+        checksum (CharField): The SHA-256 of the whole file, as announced by the client, or computed
+            once the file is complete.
+        offset (BigIntegerField): The number of bytes received so far.
+        status (CharField): uploading, completed or failed.
+        job (ForeignKey): The import job of the completed file.
+        created_at (DateTimeField): When the upload started.
+        updated_at (DateTimeField): When the last part was received.
+    """
+
+    STATUS_CHOICES = [
+        ("uploading", "Uploading"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    size = models.BigIntegerField()
+    checksum = models.CharField(max_length=64, blank=True)
+    offset = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="uploading")
+    job = models.ForeignKey(ImportJob, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+    def __str__(self):
+        return f"{self.user_id} - {self.file_name} ({self.offset}/{self.size})"
+
+
+def bump_user_data_generation(sender, instance, **kwargs):
+    """
+    Invalidates the cached data of the user who owns a saved or deleted object, once the write commits.
+
+    Connected to post_save and post_delete of every model that the cached dashboard context is
+    computed from. Writes that bypass signals (queryset.update, bulk_create) must call
+    caching.bump_data_generation themselves.
+
+    Args:
+        sender (Model): The model class that triggered the signal.
+        instance (Model): The saved or deleted instance. Must have a user_id.
+        **kwargs: Additional keyword arguments.
+
+    Returns:
+        None
+    """
+    from .caching import bump_data_generation  # imported here to keep models free of cache setup
+    bump_data_generation(instance.user_id)
+
+
+for cached_model in (Transaction, Account, Category, Budget, Subscription, CustomNotification):
+    post_save.connect(bump_user_data_generation, sender=cached_model)
+    post_delete.connect(bump_user_data_generation, sender=cached_model)
+
+
 #implement the following models in the future...
 class Debt(models.Model):
     DEBT_TYPES = [
@@ -0,0 +1,181 @@
+from decimal import Decimal
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+
+from .models import DailyTransactionSummary, Transaction
+
+
+"""
+This module maintains the DailyTransactionSummary rollup table.
+
+Every code path that creates, changes or removes transactions reports the change here as a set of
+(user, date, transaction type) deltas, so the rollup always mirrors the Transaction table and the
+dashboard can be served in O(days) instead of O(transactions).
+"""
+
+# Number of days added per INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 500
+
+
+def _as_date(value):
+    """
+    Converts a transaction date (date, datetime or 'YYYY-MM-DD' string) to the date stored in the database.
+    """
+    return Transaction._meta.get_field('date').to_python(value)
+
+
+def record_transaction(deltas, user_id, date, transaction_type, amount, sign=1):
+    """
+    Accumulates the effect of a single transaction into a deltas dictionary.
+
+    Args:
+        deltas (dict): Maps (user_id, date, transaction_type) to a [total, count] pair.
+        user_id (int): The ID of the user who owns the transaction.
+        date (date or str): The date of the transaction.
+        transaction_type (str): The type of the transaction (income or expense).
+        amount (Decimal or str): The amount of the transaction.
+        sign (int): 1 when the transaction is being added, -1 when it is being removed.
+    """
+    key = (user_id, _as_date(date), transaction_type)
+    entry = deltas.setdefault(key, [Decimal('0'), 0])
+    entry[0] += sign * Decimal(str(amount))
+    entry[1] += sign
+
+
+def transaction_deltas(transactions, sign=1):
+    """
+    Builds a deltas dictionary for an iterable of Transaction instances.
+
+    Args:
+        transactions (iterable): The Transaction instances being added or removed.
+        sign (int): 1 when the transactions are being added, -1 when they are being removed.
+
+    Returns:
+        dict: Maps (user_id, date, transaction_type) to a [total, count] pair.
+    """
+    deltas = {}
+    for t in transactions:
+        record_transaction(deltas, t.user_id, t.date, t.transaction_type, t.amount, sign)
+    return deltas
+
+
+def _upsert_additions(additions):
+    """
+    Adds (user_id, date, transaction_type, total, count) rows to the rollup table with one
+    INSERT ... ON CONFLICT DO UPDATE statement per batch, creating the missing days and adding to the
+    existing ones. Large imports touch thousands of days, which would otherwise cost a statement each.
+    """
+    qn = connection.ops.quote_name
+    table = qn(DailyTransactionSummary._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} ({qn('user_id')}, {qn('date')}, {qn('transaction_type')}, {qn('total')}, {qn('count')}) "
+        "VALUES {values} "
+        f"ON CONFLICT ({qn('user_id')}, {qn('date')}, {qn('transaction_type')}) DO UPDATE SET "
+        f"{qn('total')} = {table}.{qn('total')} + EXCLUDED.{qn('total')}, "
+        f"{qn('count')} = {table}.{qn('count')} + EXCLUDED.{qn('count')}"
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(additions), UPSERT_BATCH_SIZE):
+            batch = additions[start:start + UPSERT_BATCH_SIZE]
+            params = []
+            for user_id, date, transaction_type, total, count in batch:
+                params.extend((
+                    user_id,
+                    connection.ops.adapt_datefield_value(date),
+                    transaction_type,
+                    connection.ops.adapt_decimalfield_value(total, 20, 2),
+                    count,
+                ))
+            cursor.execute(sql.format(values=", ".join(["(%s, %s, %s, %s, %s)"] * len(batch))), params)
+
+
+def apply_deltas(deltas):
+    """
+    Applies accumulated deltas to the rollup table.
+
+    Days that only gain transactions are upserted in batches where the database supports
+    INSERT ... ON CONFLICT (PostgreSQL, SQLite). Every other affected day is updated with a single
+    UPDATE using F() expressions, and the row is created if it does not exist yet. Days whose count
+    drops to zero are removed.
+
+    Days are written in key order, so that concurrent writers lock the rollup rows they share in the
+    same order and cannot deadlock (e.g. two transactions switching types in opposite directions).
+
+    Args:
+        deltas (dict): Maps (user_id, date, transaction_type) to a [total, count] pair.
+    """
+    upsert = connection.features.supports_update_conflicts_with_target
+    additions = []
+    for (user_id, date, transaction_type), (total, count) in sorted(deltas.items()):
+        if not total and not count:
+            continue
+        if upsert and count > 0:
+            additions.append((user_id, date, transaction_type, total, count))
+            continue
+        if additions:
+            # Write the days before this one first, to keep the key order
+            _upsert_additions(additions)
+            additions = []
+
+        summaries = DailyTransactionSummary.objects.filter(
+            user_id=user_id, date=date, transaction_type=transaction_type
+        )
+        updated = summaries.update(total=F('total') + total, count=F('count') + count)
+        if not updated and count > 0:
+            try:
+                with transaction.atomic():
+                    DailyTransactionSummary.objects.create(
+                        user_id=user_id, date=date, transaction_type=transaction_type, total=total, count=count
+                    )
+            except IntegrityError:
+                # Another request created the row first, so fold our delta into it instead
+                summaries.update(total=F('total') + total, count=F('count') + count)
+
+        if count < 0:
+            summaries.filter(count__lte=0).delete()
+
+    if additions:
+        _upsert_additions(additions)
+
+
+def add_transactions(transactions):
+    """
+    Adds the effect of newly created transactions to the rollup table.
+    """
+    apply_deltas(transaction_deltas(transactions, sign=1))
+
+
+def remove_transactions(transactions):
+    """
+    Removes the effect of deleted transactions from the rollup table.
+    """
+    apply_deltas(transaction_deltas(transactions, sign=-1))
+
+
+def rebuild_daily_summaries(user=None):
+    """
+    Recomputes the rollup table from the Transaction table with a single grouped query.
+
+    Args:
+        user (User, optional): Only rebuild the rows of this user. Rebuilds every user when omitted.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    transactions = Transaction.objects.all()
+    summaries = DailyTransactionSummary.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+        summaries = summaries.filter(user=user)
+
+    rows = transactions.values('user_id', 'date', 'transaction_type').annotate(
+        total=Sum('amount'), count=Count('id')
+    ).order_by()
+
+    with transaction.atomic():
+        summaries.delete()
+        created = DailyTransactionSummary.objects.bulk_create(
+            (DailyTransactionSummary(**row) for row in rows.iterator()),
+            batch_size=1000,
+        )
+    return len(created)
@@ -0,0 +1,206 @@
+import re
+import time
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection, connections
+from django.db.models import Count, F, FloatField, Q, Value
+from django.db.models.functions import Greatest, Upper
+
+from .caching import get_autocomplete
+from .models import Category, Transaction
+
+
+"""
+This module searches transactions by keyword.
+
+On PostgreSQL, every transaction stores the full-text document of its description (weight A) and its
+category name (weight B) in Transaction.search_vector, behind a GIN index. Database triggers created
+by migration 0018 keep it current on every write (saves, bulk inserts, COPY imports, category renames),
+so no code path has to maintain it. Keywords match the beginning of words, so "groc" finds "Groceries",
+and the matches are ranked with ts_rank: description hits rank above category hits. Full-text search
+ignores stop words, so keywords made only of them ("the", "at") use the substring match below.
+
+Bank exports are noisy ("AMZN MKTP CA*2K3"), so similar_transactions matches keywords by trigram word
+similarity instead: "amazon mktp" finds the variants above. Transaction descriptions and category
+names have pg_trgm GIN indexes on their upper-cased text (migration 0019), which serve similarity
+matches as well as the case-insensitive substring and prefix filters Django generates (icontains,
+istartswith).
+
+autocomplete suggests descriptions and category names for the add-transaction and spreadsheet forms
+from the prefix typed so far, through a per-user prefix cache (see caching.get_autocomplete).
+
+Other databases (SQLite in development) fall back to a case-insensitive substring match of the
+description and the category name, which reads every transaction of the user. So does similarity
+search on a PostgreSQL server without the pg_trgm extension.
+"""
+
+# The text search configuration of the search vectors (stemming and stop words)
+SEARCH_CONFIG = 'english'
+WORD = re.compile(r"\w+")
+
+# Shortest prefix that gets suggestions, and number of suggestions of each kind
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_LIMIT = 10
+# Number of description candidates cached per prefix. Longer prefixes are filtered from the candidates
+# of a shorter one, as long as it had fewer than this (see caching.get_autocomplete).
+AUTOCOMPLETE_CANDIDATES = 200
+
+# Seconds before a missing PostgreSQL extension is looked up again, since it can be installed while the
+# server runs. Installed extensions are remembered for the life of the process.
+EXTENSION_RECHECK_SECONDS = 60
+# (found, monotonic time of the lookup) by (database alias, extension name)
+_extensions = {}
+
+
+def full_text_search_supported():
+    """
+    Returns whether the database stores search vectors.
+    """
+    return connection.vendor == 'postgresql'
+
+
+def _has_extension(alias, name):
+    """
+    Returns whether a PostgreSQL extension is installed in a database.
+
+    An installed extension is only looked up once per process, a missing one every
+    EXTENSION_RECHECK_SECONDS.
+    """
+    found, checked_at = _extensions.get((alias, name), (False, None))
+    if found or (checked_at is not None and time.monotonic() - checked_at < EXTENSION_RECHECK_SECONDS):
+        return found
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = %s", [name])
+        found = cursor.fetchone() is not None
+    _extensions[(alias, name)] = (found, time.monotonic())
+    return found
+
+
+def trigram_search_supported():
+    """
+    Returns whether the database can match text by trigram similarity (PostgreSQL with pg_trgm).
+    """
+    return connection.vendor == 'postgresql' and _has_extension(connection.alias, 'pg_trgm')
+
+
+def keyword_query(keyword):
+    """
+    Builds the full-text query of a keyword: every word of it, as a prefix.
+
+    Args:
+        keyword (str): The keyword entered by the user.
+
+    Returns:
+        SearchQuery: The query, or None if the keyword contains no word, or only stop words (the query
+        would then be empty and match nothing).
+    """
+    words = WORD.findall(keyword)
+    if not words:
+        return None
+    # Only word characters remain, so the raw query cannot contain tsquery operators
+    raw = " & ".join(f"{word}:*" for word in words)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT numnode(to_tsquery(%s::regconfig, %s))", [SEARCH_CONFIG, raw])
+        if not cursor.fetchone()[0]:
+            return None
+    return SearchQuery(raw, config=SEARCH_CONFIG, search_type='raw')
+
+
+def search_transactions(transactions, keyword):
+    """
+    Filters transactions by keyword.
+
+    Args:
+        transactions (QuerySet): The transactions to search.
+        keyword (str): The keyword entered by the user.
+
+    Returns:
+        QuerySet: The matching transactions, annotated with their `rank`, higher for better matches.
+        Substring matches all rank 0.
+    """
+    query = keyword_query(keyword) if full_text_search_supported() else None
+    if query is None:
+        return transactions.filter(
+            Q(description__icontains=keyword) | Q(category__name__icontains=keyword)
+        ).annotate(rank=Value(0.0, output_field=FloatField()))
+    return transactions.filter(search_vector=query).annotate(rank=SearchRank(F('search_vector'), query))
+
+
+def similar_transactions(transactions, keyword):
+    """
+    Filters transactions whose description or category name contains words similar to a keyword.
+
+    Falls back to search_transactions without pg_trgm.
+
+    Args:
+        transactions (QuerySet): The transactions to search.
+        keyword (str): The keyword entered by the user.
+
+    Returns:
+        QuerySet: The matching transactions, annotated with their `rank`, the word similarity (0 to 1)
+        of the keyword to their description or category name.
+    """
+    if not trigram_search_supported():
+        return search_transactions(transactions, keyword)
+    # The upper-cased text is what the trigram indexes cover. Trigrams ignore case anyway.
+    categories = Category.objects.filter(TrigramWordSimilar(Upper('name'), keyword)).values('pk')
+    return transactions.filter(
+        Q(TrigramWordSimilar(Upper('description'), keyword)) | Q(category__in=categories)
+    ).annotate(rank=Greatest(
+        TrigramWordSimilarity(keyword, Upper('description')),
+        TrigramWordSimilarity(keyword, Upper('category__name')),
+    ))
+
+
+def autocomplete_candidates(user, prefix):
+    """
+    Looks up the autocomplete candidates of a prefix in the database.
+
+    Args:
+        user (User): The user typing.
+        prefix (str): The lower-cased prefix.
+
+    Returns:
+        dict: The candidates, containing:
+            - descriptions (list): (description, number of transactions) pairs for up to
+              AUTOCOMPLETE_CANDIDATES descriptions starting with the prefix, most used first.
+            - categories (list): The names of the user's categories starting with the prefix.
+            - complete (bool): Whether `descriptions` holds every description starting with the prefix.
+    """
+    descriptions = list(
+        Transaction.objects.filter(user=user, description__istartswith=prefix).values_list('description').annotate(
+            uses=Count('id')
+        ).order_by('-uses', 'description')[:AUTOCOMPLETE_CANDIDATES]
+    )
+    categories = list(
+        Category.objects.filter(user=user, name__istartswith=prefix).order_by('name').values_list('name', flat=True)
+    )
+    return {
+        'descriptions': descriptions,
+        'categories': categories,
+        'complete': len(descriptions) < AUTOCOMPLETE_CANDIDATES,
+    }
+
+
+def autocomplete(user, prefix):
+    """
+    Suggests descriptions and category names that start with what the user typed.
+
+    Args:
+        user (User): The user typing.
+        prefix (str): The text typed so far.
+
+    Returns:
+        dict: Up to AUTOCOMPLETE_LIMIT `descriptions` (most used first) and `categories` (by name).
+        Both are empty for prefixes shorter than AUTOCOMPLETE_MIN_LENGTH.
+    """
+    prefix = prefix.strip().lower()
+    if len(prefix) < AUTOCOMPLETE_MIN_LENGTH:
+        return {'descriptions': [], 'categories': []}
+    candidates = get_autocomplete(
+        user.pk, prefix, AUTOCOMPLETE_MIN_LENGTH, lambda: autocomplete_candidates(user, prefix)
+    )
+    return {
+        'descriptions': [description for description, _ in candidates['descriptions'][:AUTOCOMPLETE_LIMIT]],
+        'categories': candidates['categories'][:AUTOCOMPLETE_LIMIT],
+    }
@@ -0,0 +1,169 @@
+import calendar
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DateField, F, Sum, Window
+from django.db.models.functions import RowNumber, Trunc, TruncMonth
+from django.utils import timezone
+
+from .balances import signed_amount
+from .models import Account, AccountBalanceSnapshot, Transaction
+
+logger = logging.getLogger(__name__) #create logger specific to this module
+
+
+"""
+This module answers "what was the balance of this account on date X" without summing its whole history.
+
+Month-end balances are stored as AccountBalanceSnapshot checkpoints by take_snapshots (run it monthly,
+see the take_balance_snapshots command). Writes dated on or before a snapshot shift it (see balances.py),
+so the snapshots stay exact between runs. balance_as_of then starts from the snapshot nearest to the
+requested date and only sums the transactions between the two, a few weeks of them at most.
+
+balance_series charts the balance of accounts over time. The running balance is computed by the
+database with a window function, and only the last row of every bucket is fetched:
+
+    SELECT account_id, bucket, running FROM (
+        SELECT account_id, date_trunc(<granularity>, date) AS bucket,
+               SUM(<signed amount>) OVER (PARTITION BY account_id ORDER BY date, id) AS running,
+               ROW_NUMBER() OVER (PARTITION BY account_id, <bucket> ORDER BY date DESC, id DESC) AS position
+        FROM transaction WHERE ...
+    ) WHERE position = 1
+"""
+
+
+def month_end(day):
+    """
+    Returns the last day of the month of a date.
+    """
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def last_closed_month_end():
+    """
+    Returns the last day of the previous month, the latest month end that can no longer gain
+    transactions dated today.
+    """
+    return timezone.localdate().replace(day=1) - timedelta(days=1)
+
+
+def take_snapshots(accounts=None, through=None):
+    """
+    Recomputes the month-end balance snapshots of accounts from their transactions.
+
+    The monthly totals of every account come from one grouped query. Each account gets a snapshot at
+    every month end from its first transaction to `through`, replacing its previous snapshots. The
+    accounts are locked meanwhile, so that concurrent writes wait and then shift the new snapshots.
+
+    Args:
+        accounts (QuerySet, optional): The accounts to snapshot. Defaults to every account.
+        through (date, optional): The last month end to snapshot. Defaults to the end of the previous month.
+
+    Returns:
+        int: The number of snapshots written.
+    """
+    accounts = Account.objects.all() if accounts is None else accounts
+    through = month_end(through) if through else last_closed_month_end()
+
+    with transaction.atomic():
+        opening = dict(accounts.select_for_update().order_by('pk').values_list('pk', 'opening_balance'))
+        monthly = Transaction.objects.filter(account__in=list(opening), date__lte=through).annotate(
+            month=TruncMonth('date')
+        ).values_list('account_id', 'month').annotate(total=Sum(signed_amount())).order_by('account_id', 'month')
+
+        totals = {}
+        for account_id, month, total in monthly:
+            totals.setdefault(account_id, {})[month] = total
+
+        snapshots = []
+        for account_id, months in totals.items():
+            balance = opening[account_id]
+            month = min(months)
+            while month <= through:
+                balance += months.get(month, Decimal('0'))
+                snapshots.append(AccountBalanceSnapshot(account_id=account_id, date=month_end(month), balance=balance))
+                month = month_end(month) + timedelta(days=1)
+
+        AccountBalanceSnapshot.objects.filter(account_id__in=list(opening)).delete()
+        AccountBalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+    logger.info("Took %s balance snapshots of %s accounts through %s", len(snapshots), len(opening), through)
+    return len(snapshots)
+
+
+def balance_as_of(account, day):
+    """
+    Returns the balance of an account at the end of a day.
+
+    Starts from the nearest snapshot, before or after the day, and adds or removes the transactions
+    in between. Accounts without snapshots are summed from their opening balance.
+
+    Args:
+        account (Account): The account.
+        day (date): The day.
+
+    Returns:
+        Decimal: The balance, including every transaction dated on or before the day.
+    """
+    ledger = Transaction.objects.filter(account=account)
+    previous = account.snapshots.filter(date__lte=day).order_by('-date').values_list('date', 'balance').first()
+    following = account.snapshots.filter(date__gt=day).order_by('date').values_list('date', 'balance').first()
+
+    if previous and (not following or day - previous[0] <= following[0] - day):
+        start, balance = previous
+        total = ledger.filter(date__gt=start, date__lte=day).aggregate(total=Sum(signed_amount()))['total']
+        return balance + (total or Decimal('0'))
+    if following:
+        end, balance = following
+        total = ledger.filter(date__gt=day, date__lte=end).aggregate(total=Sum(signed_amount()))['total']
+        return balance - (total or Decimal('0'))
+    total = ledger.filter(date__lte=day).aggregate(total=Sum(signed_amount()))['total']
+    return account.opening_balance + (total or Decimal('0'))
+
+
+
+def balance_series(accounts, granularity, start=None, end=None):
+    """
+    Returns the closing balance of accounts at the end of every day, week or month with transactions.
+
+    The running sums start at the balance of each account on the eve of `start` (see balance_as_of), so
+    a date range does not need the transactions before it.
+
+    Args:
+        accounts (list): The accounts.
+        granularity (str): 'day', 'week' (buckets start on Monday) or 'month'.
+        start (date, optional): The first day of the series. Defaults to the first transaction.
+        end (date, optional): The last day of the series. Defaults to the last transaction.
+
+    Returns:
+        dict: Maps account IDs to a dict containing:
+            - start_balance (Decimal): The balance before the first bucket.
+            - points (list): (bucket start date, closing balance) tuples sorted by date, for the
+              buckets with transactions.
+    """
+    series = {
+        account.pk: {
+            'start_balance': balance_as_of(account, start - timedelta(days=1)) if start else account.opening_balance,
+            'points': [],
+        }
+        for account in accounts
+    }
+    transactions = Transaction.objects.filter(account__in=list(series))
+    if start:
+        transactions = transactions.filter(date__gte=start)
+    if end:
+        transactions = transactions.filter(date__lte=end)
+
+    bucket = Trunc('date', granularity, output_field=DateField())
+    rows = transactions.annotate(
+        bucket=bucket,
+        running=Window(Sum(signed_amount()), partition_by=[F('account_id')], order_by=[F('date').asc(), F('id').asc()]),
+        position=Window(
+            RowNumber(), partition_by=[F('account_id'), bucket], order_by=[F('date').desc(), F('id').desc()]
+        ),
+    ).filter(position=1).order_by('account_id', 'bucket').values_list('account_id', 'bucket', 'running')
+
+    for account_id, day, running in rows:
+        series[account_id]['points'].append((day, series[account_id]['start_balance'] + running))
+    return series
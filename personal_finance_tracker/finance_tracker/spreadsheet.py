@@ -0,0 +1,376 @@
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import rollups
+from .balances import apply_balance_deltas, record_balance
+from .caching import bump_data_generation
+from .deletions import raw_delete_transactions
+from .models import Account, Category, Transaction
+from .validation import rows_to_columns, validate_transaction_columns
+
+
+"""
+This module serves and applies the changes made in the spreadsheet editor.
+
+The editor loads its rows in blocks as it scrolls (see spreadsheet_window), with sorting and filtering
+done by the database. Account and category labels are sent once per block, as a dictionary keyed by ID,
+instead of being repeated on every row.
+
+The editor only sends the rows that were inserted, updated or deleted, and every updated or deleted
+row carries the version of the transaction it was loaded with. The whole batch is applied with a
+fixed number of queries: the user's accounts and categories are loaded once into dictionaries, the
+edited transactions are locked and loaded with one query, new rows are written with bulk_create,
+changed rows with bulk_update, deleted rows with one DELETE, and every affected account receives a
+single aggregated balance delta.
+
+The inserted and updated rows are checked against the transaction rules with one call to
+validate_transaction_columns. The batch is all or nothing: if any row is invalid, or any updated or deleted row is stale (its
+transaction was changed or deleted since the editor loaded it), nothing is written.
+"""
+
+# Sort keys accepted by spreadsheet_window, mapped to the fields they order by
+SORT_FIELDS = {
+    'date': 'date',
+    'amount': 'amount',
+    'description': 'description',
+    'account': 'account__account_number',
+    'category': 'category__name',
+    'type': 'transaction_type',
+}
+SPREADSHEET_BLOCK_SIZE = 200
+MAX_BLOCK_SIZE = 1000
+
+SPREADSHEET_FIELDS = ['date', 'account', 'category', 'description', 'amount', 'transaction_type', 'version']
+BATCH_SIZE = 500
+
+
+def _as_id(value):
+    """
+    Converts an ID sent by the spreadsheet (int or numeric string) to an int, keeping None for blanks.
+    """
+    if value in (None, ''):
+        return None
+    return int(value)
+
+
+def _row_number(row_data, position):
+    """
+    Returns the row number shown in messages: the grid row sent by the editor, or the row's position.
+    """
+    try:
+        return int(row_data.get('row'))
+    except (TypeError, ValueError):
+        return position + 1
+
+
+def _clean_row(row_data, accounts, categories):
+    """
+    Converts a posted row into transaction field values.
+
+    Args:
+        row_data (dict): The posted row, with date, account_id, category_id, description, amount and
+            transaction_type.
+        accounts (dict): The user's accounts by ID.
+        categories (dict): The user's categories by ID.
+
+    Returns:
+        tuple: (values, error). values is a dictionary of field values, or None when the row is invalid,
+        in which case error describes the problem.
+    """
+    if not row_data.get('date') or row_data.get('amount') is None:
+        return None, "Missing required fields (date, amount)."
+
+    account_id = row_data.get('account_id')
+    category_id = row_data.get('category_id')
+    try:
+        account_id = _as_id(account_id)
+        category_id = _as_id(category_id)
+        values = {
+            'date': Transaction._meta.get_field('date').to_python(row_data.get('date')),
+            'account_id': account_id,
+            'category_id': category_id,
+            'description': row_data.get('description', ''),
+            'amount': Decimal(str(row_data.get('amount'))),
+            'transaction_type': (row_data.get('transaction_type') or 'expense').lower(),
+        }
+    except ValidationError as e:
+        return None, f"Invalid data - {', '.join(e.messages)} for data: {row_data}"
+    except (ValueError, TypeError, InvalidOperation) as e:
+        return None, f"Invalid data - {str(e)} for data: {row_data}"
+
+    if account_id is not None and account_id not in accounts:
+        return None, f"Account ID '{account_id}' not found or does not belong to you."
+    if category_id is not None and category_id not in categories:
+        return None, f"Category ID '{category_id}' not found or does not belong to you."
+    return values, None
+
+
+def _validation_data(row_data):
+    """
+    Returns the fields of a posted row checked by the transaction validation rules, with the same
+    defaults as _clean_row.
+    """
+    return {
+        'date': row_data.get('date'),
+        'transaction_type': row_data.get('transaction_type') or 'expense',
+        'amount': row_data.get('amount'),
+        'description': row_data.get('description', ''),
+    }
+
+
+def _versioned_rows(rows, errors, offset):
+    """
+    Reads the (row number, transaction ID, version, row data) of updated or deleted rows.
+
+    Rows without a valid ID and version are reported in errors.
+    """
+    versioned = []
+    for i, row_data in enumerate(rows):
+        row_data = row_data or {}
+        row = _row_number(row_data, offset + i)
+        try:
+            transaction_id = _as_id(row_data.get('id'))
+            version = _as_id(row_data.get('version'))
+        except (TypeError, ValueError):
+            transaction_id = version = None
+        if transaction_id is None or version is None:
+            errors.append(f"Row {row}: Missing transaction ID or version.")
+            continue
+        versioned.append((row, transaction_id, version, row_data))
+    return versioned
+
+
+def sync_spreadsheet_changes(user, inserted=(), updated=(), deleted=()):
+    """
+    Applies a batch of spreadsheet changes.
+
+    Args:
+        user (User): The user saving the spreadsheet.
+        inserted (list): New rows, each a dictionary with date, account_id, category_id, description,
+            amount and transaction_type. Completely empty rows are ignored.
+        updated (list): Changed rows, with the same fields plus the transaction's id and version.
+        deleted (list): Removed rows, each a dictionary with the transaction's id and version.
+
+    Returns:
+        dict: The outcome of the batch, containing:
+            - created (list): The IDs of the created transactions, in the order of `inserted`.
+            - versions (dict): The new version of every updated transaction, by ID.
+            - deleted (int): The number of deleted transactions.
+            - errors (list): Row errors. When not empty, nothing was saved.
+            - conflicts (list): Stale rows, each with the transaction's id, its current version (None
+              if it was deleted) and a message. When not empty, nothing was saved.
+    """
+    result = {'created': [], 'versions': {}, 'deleted': 0, 'errors': [], 'conflicts': []}
+    errors = result['errors']
+
+    accounts = {account.id: account for account in Account.objects.filter(user=user)}
+    categories = {category.id: category for category in Category.objects.filter(user=user)}
+
+    # (row, row_data, transaction_id, version) of the inserted and updated rows, validated as one batch
+    edited_rows = []
+    for i, row_data in enumerate(inserted):
+        row_data = row_data or {}
+        if not row_data.get('date') and row_data.get('amount') is None:
+            # Truly empty new row, skip
+            continue
+        edited_rows.append((_row_number(row_data, i), row_data, None, None))
+    for row, transaction_id, version, row_data in _versioned_rows(updated, errors, len(inserted)):
+        edited_rows.append((row, row_data, transaction_id, version))
+
+    column_errors = validate_transaction_columns(
+        rows_to_columns([_validation_data(row_data) for _, row_data, _, _ in edited_rows])
+    )
+    new_rows = []
+    changed_rows = []
+    for (row, row_data, transaction_id, version), validation_errors in zip(edited_rows, column_errors):
+        values, error = _clean_row(row_data, accounts, categories)
+        if not error and validation_errors:
+            error = f"Validation Error - {', '.join(validation_errors)}"
+        if error:
+            errors.append(f"Row {row}: {error}")
+        elif transaction_id is None:
+            new_rows.append(values)
+        else:
+            changed_rows.append((row, transaction_id, version, values))
+
+    removed_rows = _versioned_rows(deleted, errors, len(inserted) + len(updated))
+
+    seen_ids = set()
+    for row, transaction_id, _, _ in changed_rows + removed_rows:
+        if transaction_id in seen_ids:
+            errors.append(f"Row {row}: Transaction ID '{transaction_id}' is changed more than once.")
+        seen_ids.add(transaction_id)
+
+    if errors or not (new_rows or changed_rows or removed_rows):
+        return result
+
+    with transaction.atomic():
+        # Lock the edited transactions so that their versions cannot change until the batch is written
+        existing = Transaction.objects.select_for_update().filter(
+            user=user, id__in=seen_ids
+        ).in_bulk() if seen_ids else {}
+
+        for row, transaction_id, version, _ in changed_rows + removed_rows:
+            current = existing.get(transaction_id)
+            if current is None:
+                result['conflicts'].append({
+                    'id': transaction_id,
+                    'version': None,
+                    'message': f"Row {row}: Transaction ID '{transaction_id}' no longer exists.",
+                })
+            elif current.version != version:
+                result['conflicts'].append({
+                    'id': transaction_id,
+                    'version': current.version,
+                    'message': f"Row {row}: Transaction ID '{transaction_id}' was changed in another session.",
+                })
+        if result['conflicts']:
+            return result
+
+        rollup_deltas = {}
+        balance_deltas = {}
+        transactions_to_create = []
+        transactions_to_update = []
+
+        for values in new_rows:
+            transactions_to_create.append(Transaction(user=user, **values))
+
+        for _, transaction_id, _, values in changed_rows:
+            t_instance = existing[transaction_id]
+            # Revert the old values before applying the new ones
+            record_balance(
+                balance_deltas, t_instance.account_id, t_instance.date, t_instance.transaction_type, t_instance.amount, sign=-1
+            )
+            rollups.record_transaction(
+                rollup_deltas, user.pk, t_instance.date, t_instance.transaction_type, t_instance.amount, sign=-1
+            )
+            for field, value in values.items():
+                setattr(t_instance, field, value)
+            t_instance.version += 1
+            transactions_to_update.append(t_instance)
+
+        for t in transactions_to_create + transactions_to_update:
+            record_balance(balance_deltas, t.account_id, t.date, t.transaction_type, t.amount)
+            rollups.record_transaction(rollup_deltas, user.pk, t.date, t.transaction_type, t.amount)
+
+        removed_ids = [transaction_id for _, transaction_id, _, _ in removed_rows]
+        for transaction_id in removed_ids:
+            t_instance = existing[transaction_id]
+            record_balance(
+                balance_deltas, t_instance.account_id, t_instance.date, t_instance.transaction_type, t_instance.amount, sign=-1
+            )
+            rollups.record_transaction(
+                rollup_deltas, user.pk, t_instance.date, t_instance.transaction_type, t_instance.amount, sign=-1
+            )
+
+        Transaction.objects.bulk_create(transactions_to_create, batch_size=BATCH_SIZE)
+        Transaction.objects.bulk_update(transactions_to_update, SPREADSHEET_FIELDS, batch_size=BATCH_SIZE)
+        if removed_ids:
+            # A raw delete skips the per-row post_delete handler, whose balance and rollup updates are
+            # already part of the aggregated deltas
+            result['deleted'] = raw_delete_transactions(removed_ids, batch_size=BATCH_SIZE)
+        apply_balance_deltas(balance_deltas)
+        rollups.apply_deltas(rollup_deltas)
+
+    # Bulk writes do not send post_save signals, so invalidate the user's cached data here
+    bump_data_generation(user.pk)
+    result['created'] = [t.id for t in transactions_to_create]
+    result['versions'] = {t.id: t.version for t in transactions_to_update}
+    return result
+
+
+def account_label(account):
+    """
+    Returns the label of an account in the spreadsheet's account dropdown.
+    """
+    if account.institution_number:
+        name = str(account.institution_number)
+    else:
+        number = account.account_number
+        name = f"Account ending in {number[-4:] if number and len(number) >= 4 else number}"
+    return f"{name} ({account.account_number})"
+
+
+def spreadsheet_window(user, offset=0, limit=SPREADSHEET_BLOCK_SIZE, sort='date', order='desc', filters=None):
+    """
+    Returns one block of the spreadsheet's rows, sorted and filtered by the database.
+
+    Args:
+        user (User): The user whose transactions are shown.
+        offset (int): The index of the first row of the block.
+        limit (int): The number of rows in the block (at most MAX_BLOCK_SIZE).
+        sort (str): One of the SORT_FIELDS keys. Rows with equal keys are ordered by ID.
+        order (str): 'asc' or 'desc'.
+        filters (dict, optional): Any of:
+            - q (str): Text the description must contain.
+            - account (int): Only rows of this account.
+            - category (int or 'none'): Only rows of this category, or uncategorized rows.
+            - type (str): Only income or expense rows.
+            - start (date), end (date): Only rows between these days (inclusive).
+
+    Returns:
+        dict: The block, containing:
+            - offset (int): The index of the first row.
+            - rows (list): [id, version, date, account_id, category_id, description, amount, type] lists.
+            - accounts (dict): The label of every account used in the block, by ID.
+            - categories (dict): The name of every category used in the block, by ID.
+            - total (int): The number of matching rows. Only counted for the first block.
+
+    Raises:
+        ValueError: If the sort key or order is not supported.
+    """
+    if sort not in SORT_FIELDS or order not in ('asc', 'desc'):
+        raise ValueError("Unsupported sort order.")
+    filters = filters or {}
+    limit = min(max(limit, 1), MAX_BLOCK_SIZE)
+    offset = max(offset, 0)
+
+    transactions = Transaction.objects.filter(user=user)
+    if filters.get('q'):
+        transactions = transactions.filter(description__icontains=filters['q'])
+    if filters.get('account'):
+        transactions = transactions.filter(account_id=filters['account'])
+    if filters.get('category') == 'none':
+        transactions = transactions.filter(category__isnull=True)
+    elif filters.get('category'):
+        transactions = transactions.filter(category_id=filters['category'])
+    if filters.get('type'):
+        transactions = transactions.filter(transaction_type=filters['type'])
+    if filters.get('start'):
+        transactions = transactions.filter(date__gte=filters['start'])
+    if filters.get('end'):
+        transactions = transactions.filter(date__lte=filters['end'])
+
+    prefix = '-' if order == 'desc' else ''
+    rows = transactions.order_by(prefix + SORT_FIELDS[sort], prefix + 'id').values_list(
+        'id', 'version', 'date', 'account_id', 'category_id', 'description', 'amount', 'transaction_type'
+    )[offset:offset + limit]
+
+    block = []
+    account_ids = set()
+    category_ids = set()
+    for transaction_id, version, day, account_id, category_id, description, amount, transaction_type in rows:
+        block.append([
+            transaction_id, version, day.strftime('%Y-%m-%d'), account_id, category_id,
+            description, float(amount), transaction_type,
+        ])
+        account_ids.add(account_id)
+        category_ids.add(category_id)
+    account_ids.discard(None)
+    category_ids.discard(None)
+
+    window = {
+        'offset': offset,
+        'rows': block,
+        'accounts': {
+            account.id: account_label(account)
+            for account in Account.objects.filter(user=user, id__in=account_ids)
+        } if account_ids else {},
+        'categories': dict(
+            Category.objects.filter(user=user, id__in=category_ids).values_list('id', 'name')
+        ) if category_ids else {},
+    }
+    if offset == 0:
+        window['total'] = len(block) if len(block) < limit else transactions.count()
+    return window
@@ -0,0 +1,235 @@
+import codecs
+import html
+import re
+from decimal import Decimal, InvalidOperation
+
+
+"""
+This module parses bank statement exports in the OFX/QFX and QIF formats.
+
+Both parsers are incremental: OFX files are tokenized tag by tag from fixed-size blocks (like a SAX
+parser, no document tree is built) and QIF files are read line by line, so multi-megabyte statements
+are parsed in constant memory. They yield (row_number, row) pairs with the same columns as an
+uploaded CSV file (date, transaction_type, amount, description), so the rows go through the same
+validation and insert pipeline as CSV imports (see imports.run_import).
+
+OFX rows also carry the bank's unique transaction ID (FITID) as `fitid`, which the import uses as the
+row fingerprint instead of the row content, and the bank's account ID (ACCTID) as `statement_account`.
+Bank account IDs rarely equal the account numbers users enter, so the import matches them to an
+account leniently instead of rejecting the rows (see imports.match_statement_account).
+"""
+
+# Size of the blocks read from OFX files
+READ_BLOCK_SIZE = 64 * 1024
+
+# OFX tags, with their text up to the next tag. OFX 1.x (SGML) leaves most elements unclosed, OFX 2.x
+# (XML) closes them, so text is only ever read from opening tags.
+OFX_TOKEN = re.compile(r"<(/?)([A-Za-z0-9_.]+)[^>]*>([^<]*)")
+# The character set of an OFX file, declared in the SGML header or the XML declaration
+OFX_CHARSET = re.compile(rb"CHARSET:\s*([A-Za-z0-9-]+)|encoding=[\"']([A-Za-z0-9_-]+)[\"']")
+
+# QIF sections that contain transactions (the others list accounts, categories, memorized payees...)
+QIF_TRANSACTION_TYPES = ('bank', 'cash', 'ccard', 'oth a', 'oth l', 'invoice')
+QIF_DATE = re.compile(r"^(\d{1,2})[/.-](\d{1,2})(?:[/.-]|')(\d{2}|\d{4})$")
+
+
+def _ofx_encoding(head):
+    """
+    Returns the text encoding of an OFX file from its first bytes.
+
+    OFX 1.x headers declare a Windows code page (CHARSET:1252) and OFX 2.x an XML encoding. Anything
+    unknown is read as UTF-8.
+    """
+    match = OFX_CHARSET.search(head)
+    if match:
+        charset = (match.group(1) or match.group(2)).decode("ascii").lower()
+        if charset.isdigit():
+            charset = f"cp{charset}"
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def _ofx_date(value):
+    """
+    Converts an OFX date (YYYYMMDD, optionally followed by a time and a time zone) to 'YYYY-MM-DD'.
+    Malformed dates are returned as they are, so that validation reports them.
+    """
+    if len(value) >= 8 and value[:8].isdigit():
+        return f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+    return value
+
+
+def _signed_row(row_number, amount, row):
+    """
+    Splits a signed statement amount into the transaction type and the amount of a row.
+    Amounts that are not numbers are kept as they are, so that validation reports them.
+    """
+    if "," in amount:
+        if "." in amount and amount.rindex(",") < amount.rindex("."):
+            amount = amount.replace(",", "")  # 1,234.56
+        else:
+            amount = amount.replace(".", "").replace(",", ".")  # 1.234,56 or 1234,56
+    try:
+        value = Decimal(amount)
+    except InvalidOperation:
+        row.update(transaction_type="expense", amount=amount)
+        return row_number, row
+    row.update(transaction_type="income" if value >= 0 else "expense", amount=str(abs(value)))
+    return row_number, row
+
+
+def _ofx_tokens(file):
+    """
+    Tokenizes an OFX file block by block.
+
+    Yields:
+        tuple: (closing, tag, text) for every tag, where closing is '/' for closing tags and text is
+        the text that follows the tag.
+    """
+    head = file.read(READ_BLOCK_SIZE)
+    decoder = codecs.getincrementaldecoder(_ofx_encoding(head))(errors="replace")
+    buffer = ""
+    block = head
+    while block:
+        buffer += decoder.decode(block)
+        # The last tag of the buffer may be cut in the middle, so it waits for the next block
+        cut = buffer.rfind("<")
+        if cut > 0:
+            yield from OFX_TOKEN.findall(buffer, 0, cut)
+            buffer = buffer[cut:]
+        block = file.read(READ_BLOCK_SIZE)
+    buffer += decoder.decode(b"", final=True)
+    yield from OFX_TOKEN.findall(buffer)
+
+
+def iter_ofx_rows(file):
+    """
+    Reads the transactions of an OFX or QFX statement without building the document tree.
+
+    Args:
+        file (File): The statement file, opened in binary mode.
+
+    Yields:
+        tuple: (row_number, row), where row_number counts the statement transactions from 1 and row has
+        the columns of a CSV import plus `fitid` and `statement_account`.
+    """
+    account = ""
+    current = None
+    row_number = 0
+    for closing, tag, text in _ofx_tokens(file):
+        tag = tag.upper()
+        if closing:
+            if tag == "STMTTRN" and current is not None:
+                row_number += 1
+                yield _ofx_row(row_number, current, account)
+                current = None
+        elif tag == "STMTTRN":
+            current = {}
+        elif current is not None:
+            current[tag] = html.unescape(text.strip())
+        elif tag == "ACCTID":
+            account = html.unescape(text.strip())
+
+    # OFX 1.x allows the last transaction to be left unclosed at the end of a truncated file
+    if current:
+        row_number += 1
+        yield _ofx_row(row_number, current, account)
+
+
+def _ofx_row(row_number, fields, account):
+    """
+    Converts the fields of an OFX STMTTRN element into an import row.
+    """
+    name = fields.get("NAME", "")
+    memo = fields.get("MEMO", "")
+    description = name if not memo or memo == name else f"{name} - {memo}" if name else memo
+    return _signed_row(row_number, fields.get("TRNAMT", ""), {
+        "date": _ofx_date(fields.get("DTPOSTED", "")),
+        "description": description,
+        "statement_account": account,
+        "fitid": fields.get("FITID", ""),
+    })
+
+
+def _qif_date(value):
+    """
+    Converts a QIF date to 'YYYY-MM-DD'.
+
+    QIF dates are month first, with an apostrophe before the year for dates after 1999 in Quicken's
+    own exports (1/5'25, 01/05/2025, 1/5/25). Two-digit years below 70 are read as 20xx. Other dates,
+    including ISO dates, are returned as they are, so that validation reports the malformed ones.
+    """
+    value = value.replace(" ", "")
+    match = QIF_DATE.match(value)
+    if not match:
+        return value
+    month, day, year = (int(part) for part in match.groups())
+    if year < 100:
+        year += 2000 if "'" in value or year < 70 else 1900
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def iter_qif_rows(file, encoding="utf-8-sig"):
+    """
+    Reads the transactions of a QIF statement line by line.
+
+    Only the transactions of bank, cash, credit card and asset/liability sections are read; account
+    lists, categories and memorized transactions are skipped. Split lines are ignored, the transaction
+    total is imported. QIF categories are not mapped, because they rarely match the user's categories.
+
+    Args:
+        file (File): The statement file, opened in binary mode.
+        encoding (str): The file encoding. Undecodable bytes are replaced.
+
+    Yields:
+        tuple: (row_number, row), where row_number counts the statement transactions from 1 and row has
+        the columns of a CSV import.
+    """
+    in_transactions = False
+    fields = {}
+    row_number = 0
+    for line in codecs.getreader(encoding)(file, errors="replace"):
+        line = line.rstrip("\r\n")
+        if not line:
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == "!":
+            header = value.lower()
+            if header.startswith("type:"):
+                in_transactions = header[5:].strip() in QIF_TRANSACTION_TYPES
+            elif header.startswith(("option:", "clear:")):
+                # Options do not start a new section
+                continue
+            else:
+                in_transactions = False
+            fields = {}
+        elif not in_transactions:
+            continue
+        elif code == "^":
+            if fields:
+                row_number += 1
+                yield _qif_row(row_number, fields)
+            fields = {}
+        elif code in "DTUPM":
+            # T and U both hold the amount, the first one wins
+            fields.setdefault("T" if code == "U" else code, value)
+
+    if in_transactions and fields:
+        row_number += 1
+        yield _qif_row(row_number, fields)
+
+
+def _qif_row(row_number, fields):
+    """
+    Converts the fields of a QIF record into an import row.
+    """
+    payee = fields.get("P", "")
+    memo = fields.get("M", "")
+    description = payee if not memo or memo == payee else f"{payee} - {memo}" if payee else memo
+    return _signed_row(row_number, fields.get("T", ""), {
+        "date": _qif_date(fields.get("D", "")),
+        "description": description,
+    })
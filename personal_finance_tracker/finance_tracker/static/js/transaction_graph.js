@@ -4,16 +4,17 @@ document.addEventListener('DOMContentLoaded', function() {
   const chartData = JSON.parse(document.getElementById('chart-data').textContent);
   
   // Initialize Line Chart
+  // The per-day series is not inlined in the page; it is fetched (bucketed and downsampled) after first paint
   const lineChartEl = document.getElementById('transactionChart');
   if (lineChartEl) {
     const chart = new Chart(lineChartEl, {
       type: 'line',
       data: {
-          labels: chartData.dates,
+          labels: [],
           datasets: [
               {
                   label: 'Income',
-                  data: chartData.income,
+                  data: [],
                   borderColor: '#4CAF50',
                   backgroundColor: (context) => {
                       const chart = context.chart;
@@ -33,7 +34,7 @@ document.addEventListener('DOMContentLoaded', function() {
               },
               {
                   label: 'Expenses',
-                  data: chartData.expenses,
+                  data: [],
                   borderColor: '#F44336',
                   backgroundColor: (context) => {
                       const chart = context.chart;
@@ -77,6 +78,19 @@ document.addEventListener('DOMContentLoaded', function() {
           }
       },
     });
+
+    fetch(lineChartEl.dataset.url + '?granularity=auto', { credentials: 'same-origin' })
+      .then(response => {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        return response.json();
+      })
+      .then(series => {
+        chart.data.labels = series.dates;
+        chart.data.datasets[0].data = series.income;
+        chart.data.datasets[1].data = series.expenses;
+        chart.update();
+      })
+      .catch(error => console.error('Error loading transaction graph data:', error));
   }
 
   // Initialize Pie Chart
@@ -1,3 +1,2115 @@
-from django.test import TestCase
+import csv
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from unittest import mock
+from datetime import date, timedelta
+from decimal import Decimal
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from . import archives, deletions, jobs, rollups, search
+from .aggregation import (
+    downsample_series, largest_triangle_three_buckets, summarize_daily_rollups, summarize_transactions,
+)
+from .balances import reconcile_balances
+from .budgets import evaluate_budgets
+from .caching import get_cache_stats, get_data_generation
+from .deletions import bulk_delete_transactions, purge_user
+from .imports import copy_supported, import_csv, import_statement, resolve_backend
+from .models import (
+    Account, AccountBalanceSnapshot, Budget, Category, ChunkedUpload, CustomNotification, DailyTransactionSummary,
+    ImportJob, Subscription, Transaction, User,
+)
+from .search import (
+    autocomplete, full_text_search_supported, search_transactions, similar_transactions, trigram_search_supported,
+)
+from .snapshots import balance_as_of, balance_series, month_end, take_snapshots
+from .statements import iter_ofx_rows, iter_qif_rows
+from .uploads import purge_stale_uploads
+from .validation import rows_to_columns, validate_transaction_columns, validate_transaction_data
+
+
+def expected_balances(accounts):
+    """
+    Returns the balance of each account recomputed from its stored transactions.
+    """
+    signed = Case(
+        When(transaction_type="income", then=F("amount")),
+        When(transaction_type="expense", then=-F("amount")),
+        default=Value(Decimal("0")),
+        output_field=DecimalField(max_digits=20, decimal_places=2),
+    )
+    totals = dict(
+        Transaction.objects.filter(account__in=accounts).values_list("account_id").annotate(total=Sum(signed)).order_by()
+    )
+    return {account.pk: totals.get(account.pk) or Decimal("0") for account in accounts}
+
+
+def stored_balances(accounts):
+    """
+    Returns the stored balance of each account.
+    """
+    return dict(Account.objects.filter(pk__in=[account.pk for account in accounts]).values_list("pk", "balance"))
+
+
+SGML_OFX = b"""OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+ENCODING:USASCII
+CHARSET:1252
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<CURDEF>CAD
+<BANKACCTFROM>
+<BANKID>001
+<ACCTID>00112345678
+<ACCTTYPE>CHECKING
+</BANKACCTFROM>
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250103120000[-5:EST]
+<TRNAMT>-12.50
+<FITID>2025010301
+<NAME>Caf\xe9 Olimpico
+<MEMO>Card 1234
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20250105
+<TRNAMT>1,234.56
+<FITID>2025010501
+<NAME>Payroll
+</STMTTRN>
+</BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+XML_OFX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<?OFX OFXHEADER="200" VERSION="220"?>
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<BANKACCTFROM><ACCTID>99887766554433</ACCTID></BANKACCTFROM>
+<BANKTRANLIST>
+<STMTTRN><DTPOSTED>20250210</DTPOSTED><TRNAMT>-40.00</TRNAMT><FITID>A1</FITID><NAME>Marks &amp; Spencer</NAME></STMTTRN>
+<STMTTRN><DTPOSTED>20250211</DTPOSTED><TRNAMT>-5.25</TRNAMT><FITID>A2</FITID><NAME>Metro</NAME><MEMO>Metro</MEMO></STMTTRN>
+<STMTTRN><DTPOSTED>20250211</DTPOSTED><TRNAMT>-5.25</TRNAMT><FITID>A2</FITID><NAME>Metro</NAME></STMTTRN>
+</BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class DailyRollupTests(TestCase):
+    """
+    The daily rollup table follows every save and delete of a transaction.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("rollup", "rollup@example.com", "Rollup", "password")
+
+    def rollup_rows(self):
+        return sorted(DailyTransactionSummary.objects.filter(user=self.user).values_list(
+            "date", "transaction_type", "total", "count"
+        ))
+
+    def assertMatchesRebuild(self):
+        summaries = self.rollup_rows()
+        rollups.rebuild_daily_summaries(self.user)
+        self.assertEqual(summaries, self.rollup_rows())
+        return summaries
+
+    def test_saves_move_the_totals(self):
+        t = Transaction.objects.create(user=self.user, amount="10.00", transaction_type="income", date="2025-03-01")
+        Transaction.objects.create(user=self.user, amount="5.00", transaction_type="income", date="2025-03-01")
+        self.assertEqual(self.assertMatchesRebuild(), [(date(2025, 3, 1), "income", Decimal("15.00"), 2)])
+        t.amount = Decimal("12.50")
+        t.save()
+        self.assertEqual(self.assertMatchesRebuild(), [(date(2025, 3, 1), "income", Decimal("17.50"), 2)])
+        t.transaction_type = "expense"
+        t.save()
+        self.assertEqual(self.assertMatchesRebuild(), [
+            (date(2025, 3, 1), "expense", Decimal("12.50"), 1), (date(2025, 3, 1), "income", Decimal("5.00"), 1),
+        ])
+        t.date = "2025-03-02"
+        t.save()
+        self.assertEqual(self.assertMatchesRebuild(), [
+            (date(2025, 3, 1), "income", Decimal("5.00"), 1), (date(2025, 3, 2), "expense", Decimal("12.50"), 1),
+        ])
+        t.delete()
+        self.assertEqual(self.assertMatchesRebuild(), [(date(2025, 3, 1), "income", Decimal("5.00"), 1)])
+        Transaction.objects.filter(user=self.user).delete()
+        self.assertEqual(self.assertMatchesRebuild(), [])
+
+    def test_random_writes_match_a_rebuild(self):
+        rng = random.Random(1)
+        live = []
+        for _ in range(150):
+            operation = rng.random()
+            if not live or operation < 0.45:
+                live.append(Transaction.objects.create(
+                    user=self.user, amount=Decimal(rng.randint(1, 10000)) / 100,
+                    transaction_type=rng.choice(["income", "expense"]), date=date(2025, 1, rng.randint(1, 5)),
+                ))
+            elif operation < 0.85:
+                t = rng.choice(live)
+                t.amount = Decimal(rng.randint(1, 10000)) / 100
+                t.transaction_type = rng.choice(["income", "expense"])
+                t.date = date(2025, 1, rng.randint(1, 5))
+                t.save()
+            else:
+                live.pop(rng.randrange(len(live))).delete()
+        self.assertMatchesRebuild()
+        # The dashboard summary read from the rollup equals one computed from the transactions
+        from_rollups = summarize_daily_rollups(self.user)
+        from_transactions = summarize_transactions(Transaction.objects.filter(user=self.user))
+        for key in ("total_income", "total_expenses", "daily", "monthly"):
+            self.assertEqual(from_rollups[key], from_transactions[key], key)
+
+
+class SummaryTests(TestCase):
+    """
+    The single-query summary equals the totals the dashboard used to add up row by row.
+    """
+
+    def test_summary_matches_per_row_totals(self):
+        user = User.objects.create_user("summary", "summary@example.com", "Summary", "password")
+        categories = [None] + [
+            Category.objects.create(user=user, name=name, type="expense") for name in ("Food", "Rent")
+        ]
+        rng = random.Random(2)
+        for _ in range(200):
+            Transaction.objects.create(
+                user=user, category=rng.choice(categories), amount=Decimal(rng.randint(1, 100000)) / 100,
+                transaction_type=rng.choice(["income", "expense"]),
+                date=date(2024, 11, 1) + timedelta(days=rng.randint(0, 120)),
+            )
+        transactions = Transaction.objects.filter(user=user)
+
+        total_income = total_expenses = Decimal("0")
+        daily, monthly, by_category = {}, {}, {}
+        for t in transactions:
+            index = 0 if t.transaction_type == "income" else 1
+            if index == 0:
+                total_income += t.amount
+            else:
+                total_expenses += t.amount
+            daily.setdefault(t.date, [Decimal("0"), Decimal("0")])[index] += t.amount
+            monthly.setdefault(t.date.replace(day=1), [Decimal("0"), Decimal("0")])[index] += t.amount
+            if t.category_id:
+                by_category.setdefault(t.category_id, [Decimal("0"), Decimal("0")])[index] += t.amount
+
+        summary = summarize_transactions(transactions)
+        self.assertEqual((summary["total_income"], summary["total_expenses"]), (total_income, total_expenses))
+        self.assertEqual(summary["daily"], [(day, *daily[day]) for day in sorted(daily)])
+        self.assertEqual(summary["monthly"], [(month, *monthly[month]) for month in sorted(monthly)])
+        self.assertEqual(sorted(summary["categories"]), sorted((pk, *values) for pk, values in by_category.items()))
+        # A filtered queryset is summarized as given
+        january = summarize_transactions(transactions.filter(date__month=1))
+        self.assertEqual([month for month, _, _ in january["monthly"]], [date(2025, 1, 1)])
+        self.assertEqual(summarize_transactions(transactions.none())["daily"], [])
+
+
+class DataGenerationTests(TestCase):
+    """
+    Writes move their user's cached data to a new generation once they commit.
+    """
+
+    def test_generation_moves_when_the_write_commits(self):
+        user = User.objects.create_user("generation", "generation@example.com", "Generation", "password")
+        before = get_data_generation(user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(user=user, amount="10.00", transaction_type="income")
+            # A dashboard computed from the old rows meanwhile is still cached under the old generation
+            self.assertEqual(get_data_generation(user.pk), before)
+        self.assertNotEqual(get_data_generation(user.pk), before)
+
+
+class DashboardCacheTests(TestCase):
+    """
+    The dashboard context is served from the cache until one of the user's cached models changes.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("cached", "cached@example.com", "Cached", "password")
+        self.account = Account.objects.create(user=self.user, account_number="1500", account_type="checking")
+        self.food = Category.objects.create(user=self.user, name="Food", type="expense")
+        self.budget = Budget.objects.create(user=self.user, category=self.food, amount="200.00", period="yearly")
+        self.transaction = Transaction.objects.create(
+            user=self.user, account=self.account, category=self.food, amount="50.00", transaction_type="expense"
+        )
+        self.client.force_login(self.user)
+
+    def dashboard(self):
+        """
+        Requests the dashboard and returns its context and whether it came from the cache.
+        """
+        hits = get_cache_stats()["hits"]
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.status_code, 200)
+        return response.context, get_cache_stats()["hits"] > hits
+
+    def assertInvalidates(self, write):
+        self.assertTrue(self.dashboard()[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        context, hit = self.dashboard()
+        self.assertFalse(hit)
+        return context
+
+    def test_second_request_hits_the_cache(self):
+        self.assertFalse(self.dashboard()[1])
+        with CaptureQueriesContext(connection) as queries:
+            context, hit = self.dashboard()
+        self.assertTrue(hit)
+        self.assertEqual(context["budget_data"][0]["spent"], 50.0)
+        # Nothing the cached context is built from is queried again
+        self.assertFalse([query for query in queries if "finance_tracker_budget" in query["sql"]])
+        # Another user's writes leave the cache alone
+        other = User.objects.create_user("neighbour", "neighbour@example.com", "Neighbour", "password")
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(user=other, amount="1.00", transaction_type="income")
+        self.assertTrue(self.dashboard()[1])
+
+    def test_every_cached_model_invalidates_the_dashboard(self):
+        self.dashboard()
+
+        def update(instance, **values):
+            for field, value in values.items():
+                setattr(instance, field, value)
+            instance.save()
+
+        context = self.assertInvalidates(lambda: update(self.transaction, amount=Decimal("80.00")))
+        self.assertEqual(context["budget_data"][0]["spent"], 80.0)
+        context = self.assertInvalidates(lambda: update(self.budget, amount=Decimal("400.00")))
+        self.assertEqual(context["budget_data"][0]["budget"], 400.0)
+        context = self.assertInvalidates(lambda: update(self.account, account_type="savings"))
+        self.assertEqual(context["accounts"][0]["account_type"], "savings")
+        context = self.assertInvalidates(lambda: update(self.food, name="Groceries"))
+        self.assertEqual(context["budget_data"][0]["name"], "Groceries")
+        context = self.assertInvalidates(lambda: Subscription.objects.create(
+            user=self.user, name="Music", amount="9.99", next_payment_date=date.today() + timedelta(days=3)
+        ))
+        self.assertEqual([subscription.name for subscription in context["upcoming_subscriptions"]], ["Music"])
+        context = self.assertInvalidates(lambda: CustomNotification.objects.create(
+            user=self.user, title="Big purchase", message="Over 100", type="purchase", threshold=100
+        ))
+        self.assertEqual([rule["title"] for rule in context["user_custom_notifications"]], ["Big purchase"])
+        context = self.assertInvalidates(self.budget.delete)
+        self.assertEqual(context["budget_data"], [])
+        context = self.assertInvalidates(self.transaction.delete)
+        self.assertEqual(context["chart_data"]["total_expenses"], 0.0)
+        # Writes that bypass signals bump the generation themselves
+        context = self.assertInvalidates(lambda: import_csv(self.user, io.BytesIO(
+            b"date,transaction_type,amount,description\n2025-01-01,income,25.00,Pay\n"
+        )))
+        self.assertEqual(context["chart_data"]["total_income"], 25.0)
+
+
+class DownsamplingTests(TestCase):
+    """
+    Long income/expense series are reduced to the chart's point budget without losing their ends or peaks.
+    """
+
+    def setUp(self):
+        rng = random.Random(5)
+        self.series = [
+            (date(2024, 1, 1) + timedelta(days=i), Decimal(rng.randint(0, 100)), Decimal(rng.randint(0, 100)))
+            for i in range(100)
+        ]
+        self.series[40] = (self.series[40][0], Decimal("5000"), self.series[40][2])
+        self.series[70] = (self.series[70][0], self.series[70][1], Decimal("7000"))
+
+    def test_lttb_keeps_the_ends_and_the_peak(self):
+        xs = list(range(100))
+        ys = [float(income) for _, income, _ in self.series]
+        for threshold in (3, 4, 10, 50):
+            selected = largest_triangle_three_buckets(xs, ys, threshold)
+            self.assertEqual(len(selected), threshold)
+            self.assertEqual((selected[0], selected[-1]), (0, 99))
+            self.assertEqual(selected, sorted(set(selected)))
+            self.assertIn(40, selected)
+        self.assertEqual(largest_triangle_three_buckets(xs[:5], ys[:5], 10), [0, 1, 2, 3, 4])
+
+    def test_series_fits_the_budget_with_both_ends(self):
+        for max_points in range(3, 60):
+            points = downsample_series(self.series, max_points)
+            self.assertLessEqual(len(points), max_points, max_points)
+            self.assertEqual((points[0], points[-1]), (self.series[0], self.series[-1]), max_points)
+            self.assertEqual(points, sorted(points))
+            if max_points > 3:
+                self.assertIn(self.series[40], points, max_points)
+                self.assertIn(self.series[70], points, max_points)
+        # Odd budgets are used up to the last point or one short of it, not rounded down to half
+        self.assertGreaterEqual(len(downsample_series(self.series, 7)), 6)
+        self.assertEqual(downsample_series(self.series[:10], 10), self.series[:10])
+
+    def test_chart_data_endpoint(self):
+        user = User.objects.create_user("chart", "chart@example.com", "Chart", "password")
+        for i in range(100):
+            Transaction.objects.create(
+                user=user, amount=Decimal(i + 1), transaction_type="income" if i % 2 else "expense",
+                date=date(2024, 1, 1) + timedelta(days=i * 3),
+            )
+        self.client.force_login(user)
+        url = reverse("chart_data_api")
+
+        day = self.client.get(url, {"granularity": "day"}).json()
+        self.assertEqual((day["granularity"], day["downsampled"], len(day["dates"])), ("day", False, 100))
+        self.assertEqual((day["dates"][0], day["income"][1], day["expenses"][0]), ("2024-01-01", 2.0, 1.0))
+
+        week = self.client.get(url, {"granularity": "week"}).json()
+        self.assertEqual(week["dates"][:2], ["2024-01-01", "2024-01-08"])
+        self.assertEqual(sum(week["income"]) + sum(week["expenses"]), 5050.0)
+        # 'auto' picks days for a short range and weeks for the whole year
+        short = self.client.get(url, {"start": "2024-02-01", "end": "2024-03-31"}).json()
+        self.assertEqual((short["granularity"], short["dates"][0]), ("day", "2024-02-03"))
+        self.assertEqual(self.client.get(url).json()["granularity"], "week")
+        self.assertEqual(self.client.get(url, {"granularity": "month"}).json()["dates"][-1], "2024-10-01")
+
+        reduced = self.client.get(url, {"granularity": "day", "max_points": 5}).json()
+        self.assertTrue(reduced["downsampled"])
+        self.assertLessEqual(len(reduced["dates"]), 5)
+        self.assertEqual((reduced["dates"][0], reduced["dates"][-1]), (day["dates"][0], day["dates"][-1]))
+
+        for params in ({"max_points": "many"}, {"start": "2024-13-01"}, {"granularity": "year"}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+
+class StatementImportTests(TestCase):
+    """
+    OFX and QIF statements are parsed into import rows and imported once.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("statement", "statement@example.com", "Statement", "password")
+        self.account = Account.objects.create(user=self.user, account_number="12345678", account_type="checking")
+
+    def test_sgml_ofx_rows(self):
+        rows = [row for _, row in iter_ofx_rows(io.BytesIO(SGML_OFX))]
+        self.assertEqual(rows, [
+            {
+                "date": "2025-01-03", "description": "Caf\u00e9 Olimpico - Card 1234",
+                "statement_account": "00112345678", "fitid": "2025010301", "transaction_type": "expense", "amount": "12.50",
+            },
+            {
+                "date": "2025-01-05", "description": "Payroll",
+                "statement_account": "00112345678", "fitid": "2025010501", "transaction_type": "income", "amount": "1234.56",
+            },
+        ])
+
+    def test_xml_ofx_rows(self):
+        rows = [row for _, row in iter_ofx_rows(io.BytesIO(XML_OFX))]
+        self.assertEqual([row["description"] for row in rows], ["Marks & Spencer", "Metro", "Metro"])
+        self.assertEqual({row["statement_account"] for row in rows}, {"99887766554433"})
+        self.assertEqual([row["date"] for row in rows], ["2025-02-10", "2025-02-11", "2025-02-11"])
+
+    def test_statement_account_is_matched_to_the_account_number(self):
+        result = import_statement(self.user, io.BytesIO(SGML_OFX), "statement.ofx")
+        self.assertEqual((result["inserted"], result["error_count"]), (2, 0))
+        self.assertEqual(
+            set(Transaction.objects.filter(user=self.user).values_list("account_id", flat=True)), {self.account.pk}
+        )
+        self.assertEqual(stored_balances([self.account]), {self.account.pk: Decimal("1222.06")})
+
+    def test_unknown_statement_account_is_imported_without_account(self):
+        result = import_statement(self.user, io.BytesIO(XML_OFX), "statement.qfx")
+        self.assertEqual(result["error_count"], 0)
+        self.assertEqual(
+            set(Transaction.objects.filter(user=self.user).values_list("account_id", flat=True)), {None}
+        )
+
+    def test_repeated_fitid_is_imported_once(self):
+        result = import_statement(self.user, io.BytesIO(XML_OFX), "statement.ofx", chunk_size=2)
+        self.assertEqual((result["rows"], result["inserted"], result["skipped"]), (3, 2, 1))
+        again = import_statement(self.user, io.BytesIO(XML_OFX), "statement.ofx")
+        self.assertEqual((again["inserted"], again["skipped"]), (0, 3))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+
+    def test_qif_rows(self):
+        qif = (
+            "!Type:Cat\nNGroceries\n^\n"
+            "!Type:Bank\n!Option:AutoSwitch\n"
+            "D1/5'25\nT-12.50\nPCoffee\n^\n"
+            "D01/06/2025\nU1,000.00\nPPayroll\nMJanuary\n^\n"
+            "D12.31.99\nT-3.00\nPOld\n^\n"
+            "D2/1/24\nT-1.00\n"
+        ).encode()
+        rows = [row for _, row in iter_qif_rows(io.BytesIO(qif))]
+        self.assertEqual([(row["date"], row["transaction_type"], row["amount"], row["description"]) for row in rows], [
+            ("2025-01-05", "expense", "12.50", "Coffee"),
+            ("2025-01-06", "income", "1000.00", "Payroll - January"),
+            ("1999-12-31", "expense", "3.00", "Old"),
+            ("2024-02-01", "expense", "1.00", ""),
+        ])
+
+
+class CsvImportTests(TestCase):
+    """
+    CSV files are validated and inserted in chunks, with the totals of a row-by-row import.
+    """
+
+    def setUp(self):
+        self.user, self.accounts = self.create_user("csv", "110")
+
+    def create_user(self, name, account_prefix):
+        user = User.objects.create_user(name, f"{name}@example.com", name.title(), "password")
+        Category.objects.create(user=user, name="Food", type="expense")
+        accounts = [
+            Account.objects.create(user=user, account_number=f"{account_prefix}{i}", account_type="checking")
+            for i in range(2)
+        ]
+        return user, accounts
+
+    def rows(self, count, bad_rows=()):
+        """
+        Returns count CSV rows spread over two accounts and no account, with an invalid date on bad_rows.
+        """
+        return [
+            {
+                "date": f"2025-{13 if i in bad_rows else 6}-{i % 28 + 1:02d}",
+                "transaction_type": "income" if i % 3 else "expense",
+                "amount": f"{i}.{i % 100:02d}",
+                "description": f"Row {i}",
+                "category": "Food" if i % 2 else "",
+                "account": ["1100", "1101", ""][i % 3],
+            }
+            for i in range(1, count + 1)
+        ]
+
+    def statement(self, rows):
+        lines = ["date,transaction_type,amount,description,category,account"]
+        lines += [",".join(row.values()) for row in rows]
+        return io.BytesIO(("\n".join(lines) + "\n").encode())
+
+    def ledger(self, user, accounts):
+        balances = stored_balances(accounts)
+        return (
+            [balances[account.pk] for account in accounts],
+            sorted(DailyTransactionSummary.objects.filter(user=user).values_list(
+                "date", "transaction_type", "total", "count"
+            )),
+        )
+
+    def test_rows_across_chunks(self):
+        progress = []
+        result = import_csv(
+            self.user, self.statement(self.rows(25)), chunk_size=10,
+            progress=lambda partial: progress.append((partial["rows"], partial["inserted"])),
+        )
+        self.assertEqual((result["rows"], result["inserted"], result["error_count"]), (25, 25, 0))
+        self.assertEqual(progress, [(10, 10), (20, 20), (25, 25)])
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 25)
+
+    def test_errors_are_numbered_across_chunks(self):
+        progress = []
+        result = import_csv(
+            self.user, self.statement(self.rows(25, bad_rows=(3, 10, 11, 24))), chunk_size=10,
+            progress=lambda partial: progress.append(partial["error_count"]),
+        )
+        self.assertEqual([error.split(":")[0] for error in result["errors"]], ["Row 3", "Row 10", "Row 11", "Row 24"])
+        self.assertEqual((result["rows"], result["inserted"], result["error_count"]), (25, 0, 4))
+        self.assertEqual(progress, [2, 3, 4])
+        # Nothing is kept once an error is found, not even the chunks inserted before it
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+        self.assertEqual(self.ledger(self.user, self.accounts), ([Decimal("0"), Decimal("0")], []))
+
+    def test_totals_match_a_row_by_row_import(self):
+        rows = self.rows(40)
+        import_csv(self.user, self.statement(rows), chunk_size=7)
+
+        other, accounts = self.create_user("rowbyrow", "120")
+        for row in rows:
+            Transaction.objects.create(
+                user=other, account={"1100": accounts[0], "1101": accounts[1]}.get(row["account"]), amount=row["amount"],
+                transaction_type=row["transaction_type"], date=row["date"], description=row["description"],
+            )
+        self.assertEqual(self.ledger(self.user, self.accounts), self.ledger(other, accounts))
+
+
+class ReimportTests(TestCase):
+    """
+    Importing a statement again skips the rows already imported, while repeated rows of one statement
+    are all imported.
+    """
+
+    HEADER = "date,transaction_type,amount,description\n"
+    COFFEE = "2025-07-01,expense,3.50,Coffee\n"
+
+    def setUp(self):
+        self.user = User.objects.create_user("again", "again@example.com", "Again", "password")
+
+    def import_rows(self, *lines, chunk_size=2):
+        return import_csv(self.user, io.BytesIO((self.HEADER + "".join(lines)).encode()), chunk_size=chunk_size)
+
+    def outcome(self, result):
+        return result["rows"], result["inserted"], result["skipped"]
+
+    def test_same_file_twice(self):
+        lines = [f"2025-07-{day:02d},expense,{day}.00,Shop {day}\n" for day in range(1, 6)]
+        self.assertEqual(self.outcome(self.import_rows(*lines)), (5, 5, 0))
+        self.assertEqual(self.outcome(self.import_rows(*lines)), (5, 0, 5))
+        # Chunks of another size, and descriptions differing only in case and spacing, are the same rows
+        lines[0] = "2025-07-01,expense,1.00,  SHOP   1\n"
+        self.assertEqual(self.outcome(self.import_rows(*lines, chunk_size=3)), (5, 0, 5))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 5)
+
+    def test_identical_rows_of_one_file_are_all_imported(self):
+        # Two identical coffees on the same day, split across chunks
+        first = self.import_rows(self.COFFEE, "2025-07-01,income,9.00,Pay\n", self.COFFEE)
+        self.assertEqual(self.outcome(first), (3, 3, 0))
+        self.assertEqual(Transaction.objects.filter(user=self.user, description="Coffee").count(), 2)
+        self.assertEqual(self.outcome(self.import_rows(self.COFFEE, self.COFFEE)), (2, 0, 2))
+        # A later statement with a third identical coffee adds only that one
+        self.assertEqual(self.outcome(self.import_rows(self.COFFEE, self.COFFEE, self.COFFEE)), (3, 1, 2))
+        self.assertEqual(Transaction.objects.filter(user=self.user, description="Coffee").count(), 3)
+
+    def test_same_row_for_another_account_or_amount_is_new(self):
+        Account.objects.create(user=self.user, account_number="1300", account_type="checking")
+        self.import_rows(self.COFFEE)
+        result = import_csv(self.user, io.BytesIO((
+            "date,transaction_type,amount,description,account\n"
+            "2025-07-01,expense,3.50,Coffee,1300\n"
+            "2025-07-01,income,3.50,Coffee,\n"
+            "2025-07-01,expense,3.50,Coffee,\n"
+        ).encode()))
+        self.assertEqual(self.outcome(result), (3, 2, 1))
+
+
+class InsertBackendTests(TestCase):
+    """
+    Imports use COPY on PostgreSQL and bulk INSERTs elsewhere, with the same outcome.
+    """
+
+    def statement(self, account_number):
+        lines = io.StringIO()
+        writer = csv.writer(lines)
+        writer.writerow(["date", "transaction_type", "amount", "description", "category", "account", "method"])
+        for i in range(120):
+            writer.writerow([
+                f"2025-08-{i % 28 + 1:02d}", "income" if i % 4 == 0 else "expense", f"{i * 7 % 500 + 1}.{i % 100:02d}",
+                # Characters that COPY has to escape
+                f'Shop "{i % 9}", tab\t back\\slash' if i % 2 else f"Shop {i % 9}",
+                "Food" if i % 2 else "", account_number if i % 3 else "", "atm" if i % 5 else "",
+            ])
+        return io.BytesIO(lines.getvalue().encode())
+
+    def import_as(self, name, account_number, backend):
+        user = User.objects.create_user(name, f"{name}@example.com", name.title(), "password")
+        Category.objects.create(user=user, name="Food", type="expense")
+        account = Account.objects.create(user=user, account_number=account_number, account_type="checking")
+        result = import_statement(user, self.statement(account_number), "august.csv", chunk_size=50, backend=backend)
+        self.assertEqual((result["inserted"], result["error_count"]), (120, 0), result["errors"])
+        return user, account, result
+
+    def outcome(self, user, account):
+        return (
+            sorted(Transaction.objects.filter(user=user).values_list(
+                "date", "transaction_type", "amount", "description", "category__name", "account__account_type",
+                "method", "version", "fingerprint",
+            )),
+            stored_balances([account])[account.pk],
+            sorted(DailyTransactionSummary.objects.filter(user=user).values_list(
+                "date", "transaction_type", "total", "count"
+            )),
+        )
+
+    @unittest.skipIf(connection.vendor == "postgresql", "COPY is available on PostgreSQL")
+    def test_auto_falls_back_to_bulk(self):
+        self.assertFalse(copy_supported())
+        self.assertEqual(resolve_backend("auto"), "bulk")
+        with self.assertRaises(ValueError):
+            resolve_backend("copy")
+        _, _, result = self.import_as("auto", "1400", "auto")
+        self.assertEqual(result["backend"], "bulk")
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "COPY needs PostgreSQL")
+    def test_copy_and_bulk_import_the_same_rows(self):
+        self.assertEqual(resolve_backend("auto"), "copy")
+        copied = self.import_as("copied", "1401", "copy")
+        inserted = self.import_as("inserted", "1402", "bulk")
+        self.assertEqual((copied[2]["backend"], inserted[2]["backend"]), ("copy", "bulk"))
+        copied_rows, copied_balance, copied_rollups = self.outcome(*copied[:2])
+        inserted_rows, inserted_balance, inserted_rollups = self.outcome(*inserted[:2])
+        # Fingerprints hash the user and account IDs, so only the other columns can be compared
+        self.assertEqual([row[:-1] for row in copied_rows], [row[:-1] for row in inserted_rows])
+        self.assertTrue(all(row[-1] for row in copied_rows))
+        self.assertEqual((copied_balance, copied_rollups), (inserted_balance, inserted_rollups))
+        self.assertNotEqual(copied_balance, Decimal("0"))
+
+
+class BatchValidationTests(TestCase):
+    """
+    Validating rows column by column gives every row the messages validate_transaction_data gives it.
+    """
+
+    DATES = [
+        None, "", "2025-01-05", "2025-1-5", "2025-02-30", "2025/01/05", " 2025-01-05", "\uff12\uff10\uff12\uff15-01-05",
+        "1990-01-01", "2099-01-01", date.today(), date.today() - timedelta(days=3651), 20250105,
+    ]
+    TYPES = [None, "", "income", "EXPENSE", "refund", 5]
+    AMOUNTS = [
+        None, "", "0", 0, "12.50", "12.345", "1e3", "nan", "inf", "-inf", "abc", "-1000000.01", Decimal("3"), [1],
+    ]
+    DESCRIPTIONS = [None, "", "Coffee", "x" * 255, "x" * 256, 5]
+
+    def test_messages_match_row_by_row_validation(self):
+        rows = [
+            {"date": day, "transaction_type": transaction_type, "amount": amount, "description": description}
+            for day in self.DATES for transaction_type in self.TYPES
+            for amount in self.AMOUNTS for description in self.DESCRIPTIONS
+        ]
+        # Rows with missing columns
+        rows += [{}, {"date": "2025-01-05"}, {"amount": "1.00", "description": "Coffee"}]
+
+        def row_by_row(row):
+            try:
+                validate_transaction_data(row)
+            except ValidationError as e:
+                return e.messages
+            return []
+
+        # Values that make the checks fail unexpectedly (a list amount, a numeric description) are logged
+        with self.assertLogs("finance_tracker.validation", "ERROR"):
+            expected = [row_by_row(row) for row in rows]
+            batch = validate_transaction_columns(rows_to_columns(rows))
+        self.assertEqual(len(batch), len(rows))
+        self.assertEqual([
+            (row, messages, batch_messages)
+            for row, messages, batch_messages in zip(rows, expected, batch) if messages != batch_messages
+        ], [])
+        self.assertTrue(any(messages == [] for messages in batch))
+        self.assertEqual(validate_transaction_columns({}), [])
+
+    def test_import_reports_rows_in_the_upload_format(self):
+        user = User.objects.create_user("rows", "rows@example.com", "Rows", "password")
+        Category.objects.create(user=user, name="Food", type="expense")
+        statement = (
+            "date,transaction_type,amount,description,category,account\n"
+            "2025-01-05,expense,12.50,Coffee,Food,\n"
+            "2025-02-30,refund,,Coffee,Fuel,9999\n"
+            "2025-01-06,income,nan,,,\n"
+            "2025-01-07,income,nan,Payroll,,\n"
+        )
+        result = import_csv(user, io.BytesIO(statement.encode()))
+        self.assertEqual(result["errors"], [
+            "Row 2: Invalid category 'Fuel'.",
+            "Row 2: Invalid account '9999'.",
+            "Row 2: Transaction date must be in the format 'YYYY-MM-DD'., Transaction type must be either 'income' "
+            "or 'expense'., Transaction amount is required.",
+            "Row 3: Description is required.",
+            # A NaN amount passes the row checks, but cannot be stored
+            "Row 4: Invalid data.",
+        ])
+        self.assertEqual((result["rows"], result["inserted"], result["error_count"]), (4, 0, 5))
+
+
+def zip_archive(files):
+    """
+    Returns a zip archive holding files, a dict of contents by member name (None for a folder).
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            if content is None:
+                archive.mkdir(name)
+            else:
+                archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+@override_settings(IMPORT_PARSE_WORKERS=2)
+class ArchiveImportTests(TestCase):
+    """
+    The statement files of a zip archive are imported as one import, and its other files are skipped.
+    """
+
+    HEADER = "date,transaction_type,amount,description\n"
+    JANUARY = HEADER + "2025-01-05,expense,12.50,Coffee\n2025-01-31,income,100.00,Payroll\n"
+    FEBRUARY = HEADER + "2025-01-31,income,100.00,Payroll\n2025-02-03,expense,40.00,Groceries\n"
+
+    def setUp(self):
+        self.user = User.objects.create_user("archive", "archive@example.com", "Archive", "password")
+
+    def import_archive(self, files):
+        return import_statement(self.user, zip_archive(files), "statements.zip")
+
+    def test_files_that_are_not_statements_are_skipped_with_a_warning(self):
+        result = self.import_archive({
+            "2025/": None,
+            "2025/jan.csv": self.JANUARY,
+            "2025/feb.csv": self.HEADER + "2025-02-03,expense,40.00,Groceries\n",
+            "README.txt": "Exported by the bank",
+            "statement.pdf": b"%PDF-1.4",
+            "__MACOSX/2025/._jan.csv": b"\x00\x05",
+            "2025/.DS_Store": b"\x00",
+        })
+        self.assertEqual((result["files"], result["rows"], result["inserted"], result["error_count"]), (2, 3, 3, 0))
+        self.assertEqual(result["warnings"], [
+            "README.txt: Skipped, '.txt' files are not statements.",
+            "statement.pdf: Skipped, '.pdf' files are not statements.",
+        ])
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 3)
+
+    def test_rows_shared_by_overlapping_statements_are_imported_once(self):
+        result = self.import_archive({"jan.csv": self.JANUARY, "feb.csv": self.FEBRUARY})
+        self.assertEqual((result["rows"], result["inserted"], result["duplicates"], result["skipped"]), (4, 3, 1, 1))
+        self.assertEqual(
+            sorted(Transaction.objects.filter(user=self.user).values_list("description", flat=True)),
+            ["Coffee", "Groceries", "Payroll"],
+        )
+        again = self.import_archive({"jan.csv": self.JANUARY, "feb.csv": self.FEBRUARY})
+        self.assertEqual((again["inserted"], again["skipped"]), (0, 4))
+
+    def test_errors_in_one_member_fail_the_archive(self):
+        result = self.import_archive({
+            "jan.csv": self.JANUARY, "feb.csv": self.HEADER + "2025-02-30,expense,40.00,Groceries\n",
+        })
+        self.assertEqual((result["inserted"], result["error_count"]), (0, 1))
+        self.assertTrue(result["errors"][0].startswith("feb.csv: Row 1: "), result["errors"])
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+
+    def test_limits(self):
+        statements = {f"{month:02d}.csv": self.JANUARY for month in range(1, 4)}
+        with mock.patch.object(archives, "MAX_ARCHIVE_MEMBERS", 2):
+            result = self.import_archive(statements)
+            self.assertEqual(
+                result["errors"], ["Error processing file: The archive contains more than 2 statement files."]
+            )
+            # Files that are not statements do not count
+            self.assertEqual(self.import_archive({"01.csv": self.JANUARY, "a.txt": "", "b.txt": ""})["inserted"], 2)
+        with mock.patch.object(archives, "MAX_ARCHIVE_UNCOMPRESSED_SIZE", 2 * len(self.JANUARY)):
+            result = self.import_archive(statements)
+            self.assertEqual(result["error_count"], 1)
+            self.assertIn("The archive expands to more than", result["errors"][0])
+        self.assertEqual(self.import_archive({"README.txt": ""})["errors"], ["The archive contains no statement files."])
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+
+
+@override_settings(IMPORT_JOB_TIMEOUT=60, IMPORT_JOB_MAX_ATTEMPTS=2)
+class ImportJobRecoveryTests(TestCase):
+    """
+    Jobs left running by a dead worker are re-queued, then failed, instead of running forever.
+    """
+
+    def setUp(self):
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        self.path = os.path.join(spool.name, "lost.csv")
+        with open(self.path, "wb") as file:
+            file.write(b"date,transaction_type,amount,description\n2025-05-01,income,10.00,Lost\n")
+        self.user = User.objects.create_user("jobs", "jobs@example.com", "Jobs", "password")
+
+    def dead_job(self, attempts, started_minutes_ago=5):
+        return ImportJob.objects.create(
+            user=self.user, file_name="lost.csv", file_path=self.path, status="running", attempts=attempts,
+            started_at=timezone.now() - timedelta(minutes=started_minutes_ago),
+        )
+
+    def test_stale_job_is_requeued_and_imported(self):
+        job = self.dead_job(attempts=1)
+        recent = self.dead_job(attempts=1, started_minutes_ago=0)
+        self.assertEqual(jobs.reclaim_stale_jobs(), (1, 0))
+        self.assertEqual(jobs.process_pending_jobs(), 1)
+        job.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.rows_inserted), ("completed", 2, 1))
+        self.assertEqual(recent.status, "running")
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_job_is_failed_after_its_last_attempt(self):
+        job = self.dead_job(attempts=2)
+        self.assertEqual(jobs.reclaim_stale_jobs(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error_count), ("failed", 1))
+        self.assertTrue(job.finished_at)
+        # The file will not be imported again
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(jobs.reclaim_stale_jobs(), (0, 0))
+
+    def test_reclaimed_run_does_not_record_its_outcome(self):
+        job = ImportJob.objects.create(user=self.user, file_name="lost.csv", file_path=self.path)
+
+        def import_then_get_reclaimed(*args, **kwargs):
+            # The job is taken for dead and picked up again while this run is still importing
+            ImportJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+            jobs.reclaim_stale_jobs()
+            ImportJob.objects.filter(pk=job.pk).update(status="running", started_at=timezone.now())
+            return import_statement(*args, **kwargs)
+
+        with mock.patch.object(jobs, "import_statement", import_then_get_reclaimed):
+            self.assertTrue(jobs.process_import_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.finished_at), ("running", None))
+        self.assertTrue(os.path.exists(self.path))
+
+
+class ImportJobTests(TestCase):
+    """
+    An uploaded statement is spooled, queued as a job and imported, while its progress can be followed.
+    """
+
+    def setUp(self):
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        self.spool = spool.name
+        settings = override_settings(IMPORT_SPOOL_DIR=spool.name, IMPORT_JOBS_IN_PROCESS=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user("queued", "queued@example.com", "Queued", "password")
+        self.client.force_login(self.user)
+
+    def upload(self, content):
+        file = io.BytesIO(content)
+        file.name = "may.csv"
+        return self.client.post(reverse("upload_transactions"), {"file": file}, headers={"Accept": "application/json"})
+
+    def test_upload_is_queued_then_imported(self):
+        response = self.upload(
+            b"date,transaction_type,amount,description\n2025-05-01,income,10.00,Pay\n2025-05-02,expense,4.00,Tea\n"
+        )
+        self.assertEqual(response.status_code, 202, response.content)
+        body = response.json()
+        job = ImportJob.objects.get(pk=body["job_id"], user=self.user)
+        self.assertEqual((job.status, job.file_name), ("pending", "may.csv"))
+        self.assertTrue(os.path.exists(job.file_path))
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+
+        pending = self.client.get(body["progress_url"]).json()
+        self.assertEqual((pending["status"], pending["finished"], pending["rows_parsed"]), ("pending", False, 0))
+
+        self.assertEqual(jobs.process_pending_jobs(), 1)
+        done = self.client.get(body["progress_url"]).json()
+        self.assertEqual(
+            (done["status"], done["finished"], done["rows_parsed"], done["rows_inserted"], done["error_count"]),
+            ("completed", True, 2, 2, 0),
+        )
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(os.listdir(self.spool), [])
+        self.assertEqual(self.client.get(body["results_url"]).status_code, 200)
+
+    def test_progress_of_a_running_job_comes_from_the_cache(self):
+        job = ImportJob.objects.create(user=self.user, file_name="may.csv", file_path="", status="running")
+        jobs._publish_progress(job.pk, {"rows": 5000, "inserted": 4000, "skipped": 10, "error_count": 0})
+        progress = self.client.get(reverse("import_job_progress", args=[job.pk])).json()
+        self.assertEqual((progress["rows_parsed"], progress["rows_inserted"], progress["finished"]), (5000, 4000, False))
+
+    def test_failed_import_reports_its_errors(self):
+        body = self.upload(b"date,transaction_type,amount,description\n2025-05-01,refund,10.00,Pay\n").json()
+        jobs.process_pending_jobs()
+        failed = self.client.get(body["progress_url"]).json()
+        self.assertEqual((failed["status"], failed["error_count"], failed["rows_inserted"]), ("failed", 1, 0))
+        self.assertTrue(failed["errors"][0].startswith("Row 1: "))
+
+    def test_other_users_jobs_are_hidden(self):
+        other = User.objects.create_user("other", "other@example.com", "Other", "password")
+        job = ImportJob.objects.create(user=other, file_name="theirs.csv", file_path="")
+        self.assertEqual(self.client.get(reverse("import_job_progress", args=[job.pk])).status_code, 404)
+
+
+class ChunkedUploadTests(TestCase):
+    """
+    Statement files uploaded in parts are assembled in order, verified and queued for import once.
+    """
+
+    STATEMENT = b"date,transaction_type,amount,description\n" + b"".join(
+        f"2025-04-{i % 28 + 1:02d},expense,{i + 1}.00,Part {i}\n".encode() for i in range(40)
+    )
+
+    def setUp(self):
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        settings = override_settings(
+            IMPORT_SPOOL_DIR=spool.name, IMPORT_JOBS_IN_PROCESS=False, CHUNKED_UPLOAD_PART_SIZE=256
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user("chunks", "chunks@example.com", "Chunks", "password")
+        self.client.force_login(self.user)
+
+    def start(self, **data):
+        response = self.client.post(
+            reverse("start_chunked_upload"),
+            json.dumps({"file_name": "april.csv", "size": len(self.STATEMENT), **data}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return ChunkedUpload.objects.get(pk=response.json()["id"])
+
+    def put(self, upload, offset, part, checksum=None):
+        return self.client.put(
+            reverse("chunked_upload", args=[upload.pk]), part, content_type="application/octet-stream",
+            headers={
+                "Upload-Offset": str(offset),
+                "X-Part-SHA256": checksum if checksum is not None else hashlib.sha256(part).hexdigest(),
+            },
+        )
+
+    def send_all(self, upload):
+        for offset in range(0, len(self.STATEMENT), 256):
+            response = self.put(upload, offset, self.STATEMENT[offset:offset + 256])
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def complete(self, upload):
+        return self.client.post(reverse("complete_chunked_upload", args=[upload.pk]))
+
+    def test_upload_in_parts_is_queued_once(self):
+        upload = self.start()
+        self.send_all(upload)
+        first = self.complete(upload)
+        self.assertEqual(first.status_code, 202, first.content)
+        # Completing again, e.g. after a lost response, returns the same job
+        self.assertEqual(self.complete(upload).json()["job_id"], first.json()["job_id"])
+        self.assertEqual(ImportJob.objects.filter(user=self.user).count(), 1)
+        upload.refresh_from_db()
+        self.assertEqual(upload.checksum, hashlib.sha256(self.STATEMENT).hexdigest())
+        with open(upload.file_path, "rb") as file:
+            self.assertEqual(file.read(), self.STATEMENT)
+
+    def test_part_at_the_wrong_offset_is_refused(self):
+        upload = self.start()
+        self.assertEqual(self.put(upload, 0, self.STATEMENT[:256]).status_code, 200)
+        # A retried request for a part that was already received
+        response = self.put(upload, 0, self.STATEMENT[:256])
+        self.assertEqual((response.status_code, response.json()["offset"]), (409, 256))
+        self.assertEqual(self.put(upload, 512, self.STATEMENT[512:768]).status_code, 409)
+        self.assertEqual(self.complete(upload).status_code, 400)
+
+    def test_corrupted_part_is_dropped(self):
+        upload = self.start()
+        self.assertEqual(self.put(upload, 0, self.STATEMENT[:256]).status_code, 200)
+        response = self.put(upload, 256, self.STATEMENT[256:512], checksum="0" * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.path.getsize(upload.file_path), 256)
+        self.assertEqual(self.client.get(reverse("chunked_upload", args=[upload.pk])).json()["offset"], 256)
+        # Without the checksum of the whole file, every part needs its own
+        self.assertEqual(self.put(upload, 256, self.STATEMENT[256:512], checksum="").status_code, 400)
+
+    def test_announced_checksum_must_match(self):
+        upload = self.start(checksum="0" * 64)
+        self.send_all(upload)
+        self.assertEqual(self.complete(upload).status_code, 400)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, "failed")
+        self.assertFalse(os.path.exists(upload.file_path))
+
+    def test_purge_stale_uploads(self):
+        stale, fresh, completed = self.start(), self.start(), self.start()
+        self.send_all(completed)
+        self.complete(completed)
+        ChunkedUpload.objects.filter(pk__in=[stale.pk, completed.pk]).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+        self.assertEqual(purge_stale_uploads(hours=24), 1)
+        self.assertFalse(ChunkedUpload.objects.filter(pk=stale.pk).exists())
+        self.assertFalse(os.path.exists(stale.file_path))
+        self.assertEqual(ChunkedUpload.objects.filter(pk__in=[fresh.pk, completed.pk]).count(), 2)
+
+
+class BalanceLedgerTests(TestCase):
+    """
+    Account balances follow the creation, changes and deletion of transactions.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("ledger", "ledger@example.com", "Ledger", "password")
+        self.checking = Account.objects.create(user=self.user, account_number="1001", account_type="checking")
+        self.savings = Account.objects.create(user=self.user, account_number="1002", account_type="savings")
+
+    def assertBalances(self, checking, savings):
+        self.assertEqual(stored_balances([self.checking, self.savings]), {
+            self.checking.pk: Decimal(checking), self.savings.pk: Decimal(savings),
+        })
+
+    def test_create_applies_the_signed_amount(self):
+        Transaction.objects.create(user=self.user, account=self.checking, amount="100.00", transaction_type="income")
+        Transaction.objects.create(user=self.user, account=self.checking, amount="30.25", transaction_type="expense")
+        self.assertBalances("69.75", "0")
+
+    def test_update_moves_account_type_and_amount(self):
+        t = Transaction.objects.create(user=self.user, account=self.checking, amount="50.00", transaction_type="income")
+        t.amount = Decimal("20.00")
+        t.save()
+        self.assertBalances("20.00", "0")
+        t.transaction_type = "expense"
+        t.save()
+        self.assertBalances("-20.00", "0")
+        t.account = self.savings
+        t.amount = Decimal("5.00")
+        t.save()
+        self.assertBalances("0", "-5.00")
+        self.assertEqual(t.version, 4)
+
+    def test_delete_reverts_once(self):
+        t = Transaction.objects.create(user=self.user, account=self.checking, amount="40.00", transaction_type="expense")
+        stale = Transaction.objects.get(pk=t.pk)
+        t.delete()
+        self.assertBalances("0", "0")
+        # Deleting a stale copy of the deleted transaction must not revert it again
+        self.assertEqual(stale.delete(), (0, {}))
+        self.assertBalances("0", "0")
+
+    def test_delete_reverts_the_stored_values(self):
+        t = Transaction.objects.create(user=self.user, account=self.checking, amount="40.00", transaction_type="income")
+        stale = Transaction.objects.get(pk=t.pk)
+        t.account = self.savings
+        t.save()
+        stale.delete()
+        self.assertBalances("0", "0")
+
+    def test_queryset_delete_reverts_every_row(self):
+        for amount in ("10.00", "15.00"):
+            Transaction.objects.create(user=self.user, account=self.checking, amount=amount, transaction_type="income")
+        Transaction.objects.create(user=self.user, account=self.savings, amount="5.00", transaction_type="expense")
+        Transaction.objects.filter(user=self.user).delete()
+        self.assertBalances("0", "0")
+
+
+class BudgetEvaluationTests(TestCase):
+    """
+    Budgets count the expenses of their category since the start of their week, month or year.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("budget", "budget@example.com", "Budget", "password")
+        self.food = Category.objects.create(user=self.user, name="Food", type="expense")
+        self.rent = Category.objects.create(user=self.user, name="Rent", type="expense")
+        for category, amount, period in (
+            (self.food, "100.00", "weekly"), (self.food, "400.00", "monthly"), (self.food, "5000.00", "yearly"),
+            (self.rent, "0", "monthly"),
+        ):
+            Budget.objects.create(user=self.user, category=category, amount=amount, period=period)
+        self.budgets = list(Budget.objects.filter(user=self.user).select_related("category").order_by("pk"))
+        for day, amount in (
+            ("2024-12-01", "1.00"), ("2024-12-29", "2.00"), ("2024-12-30", "4.00"), ("2024-12-31", "8.00"),
+            ("2025-01-01", "16.00"), ("2025-01-02", "32.00"), ("2025-01-05", "64.00"), ("2025-01-06", "128.00"),
+            ("2025-02-01", "256.00"),
+        ):
+            Transaction.objects.create(
+                user=self.user, category=self.food, amount=amount, transaction_type="expense", date=day
+            )
+        # Income, other categories and other users are not counted
+        Transaction.objects.create(
+            user=self.user, category=self.food, amount="1000.00", transaction_type="income", date="2025-01-02"
+        )
+        other = User.objects.create_user("spender", "spender@example.com", "Spender", "password")
+        other_food = Category.objects.create(user=other, name="Food", type="expense")
+        Transaction.objects.create(
+            user=other, category=other_food, amount="1000.00", transaction_type="expense", date="2025-01-02"
+        )
+
+    def evaluate(self, today):
+        return evaluate_budgets(self.user, budgets=self.budgets, today=today)
+
+    def spent(self, today):
+        return [budget["spent"] for budget in self.evaluate(today)]
+
+    def test_periods_at_the_year_boundary(self):
+        # Thursday January 2nd: the week started on Monday December 30th, the previous Sunday is excluded
+        self.assertEqual(self.spent(date(2025, 1, 2)), [4 + 8 + 16 + 32, 16 + 32, 16 + 32, 0])
+
+    def test_week_ends_on_sunday(self):
+        self.assertEqual(self.spent(date(2025, 1, 5))[0], 4 + 8 + 16 + 32 + 64)
+        self.assertEqual(self.spent(date(2025, 1, 6))[0], 128)
+
+    def test_later_days_are_not_counted(self):
+        self.assertEqual(self.spent(date(2024, 12, 31)), [4 + 8, 1 + 2 + 4 + 8, 1 + 2 + 4 + 8, 0])
+        self.assertEqual(self.spent(date(2025, 2, 1)), [256, 256, 16 + 32 + 64 + 128 + 256, 0])
+
+    def test_progress_and_remaining(self):
+        weekly, monthly, _, empty = self.evaluate(date(2025, 1, 2))
+        self.assertEqual(
+            (weekly["progress"], weekly["remaining"], weekly["budget_id"]), (60.0, 40.0, self.budgets[0].pk)
+        )
+        self.assertEqual((monthly["progress"], monthly["remaining"], monthly["name"]), (12.0, 352.0, "Food"))
+        self.assertEqual((empty["progress"], empty["remaining"], empty["id"]), (0, 0.0, self.rent.pk))
+        self.assertEqual(evaluate_budgets(self.user, budgets=[]), [])
+        # Without a list, every budget of the user is evaluated
+        self.assertEqual(len(evaluate_budgets(self.user, today=date(2025, 1, 2))), 4)
+
+
+class BulkDeleteTests(TestCase):
+    """
+    Bulk deletes revert balances and rollups with a bounded number of statements.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("bulk", "bulk@example.com", "Bulk", "password")
+        self.accounts = [
+            Account.objects.create(user=self.user, account_number=f"300{i}", account_type="checking")
+            for i in range(2)
+        ]
+        for i in range(60):
+            Transaction.objects.create(
+                user=self.user, account=self.accounts[i % 2], amount=Decimal(i + 1),
+                transaction_type="income" if i % 3 else "expense", date=f"2025-02-{i % 5 + 1:02d}",
+            )
+
+    def rollup_rows(self):
+        return sorted(DailyTransactionSummary.objects.filter(user=self.user).values_list(
+            "date", "transaction_type", "total", "count"
+        ))
+
+    def test_bulk_delete_reverts_balances_and_rollups(self):
+        doomed = Transaction.objects.filter(user=self.user, amount__lte=45)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(bulk_delete_transactions(doomed, batch_size=20), 45)
+        statements = [query["sql"].split(" ", 3)[:3] for query in queries]
+        # One balance update per account and one delete per batch, whatever the number of transactions
+        self.assertEqual(statements.count(["UPDATE", '"finance_tracker_account"', "SET"]), 2)
+        self.assertEqual(statements.count(["DELETE", "FROM", '"finance_tracker_transaction"']), 3)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 15)
+        self.assertEqual(stored_balances(self.accounts), expected_balances(self.accounts))
+        summaries = self.rollup_rows()
+        rollups.rebuild_daily_summaries(self.user)
+        self.assertEqual(summaries, self.rollup_rows())
+
+    def test_rows_committed_after_the_lock_are_not_reverted(self):
+        doomed = Transaction.objects.filter(user=self.user, amount__lte=45)
+
+        def chunked_after_a_concurrent_insert(*args, **kwargs):
+            # Another writer commits a matching transaction once the doomed ones are locked
+            if not Transaction.objects.filter(description="late").exists():
+                Transaction.objects.create(
+                    user=self.user, account=self.accounts[0], amount="10.00", transaction_type="income",
+                    date="2025-02-01", description="late",
+                )
+            return chunked(*args, **kwargs)
+
+        chunked = deletions.chunked
+        with mock.patch.object(deletions, "chunked", chunked_after_a_concurrent_insert):
+            self.assertEqual(bulk_delete_transactions(doomed, batch_size=20), 45)
+        self.assertTrue(Transaction.objects.filter(description="late").exists())
+        self.assertEqual(stored_balances(self.accounts), expected_balances(self.accounts))
+        summaries = self.rollup_rows()
+        rollups.rebuild_daily_summaries(self.user)
+        self.assertEqual(summaries, self.rollup_rows())
+
+    def test_nothing_references_transactions(self):
+        # Transactions are deleted without cascade (deletions.raw_delete_transactions). A foreign key to
+        # Transaction would be left dangling or block the delete, so it needs a cascade there first.
+        references = [
+            f"{model.__name__}.{field.name}"
+            for model in apps.get_models(include_auto_created=True)
+            for field in model._meta.get_fields()
+            if field.concrete and field.is_relation and field.related_model is Transaction
+        ]
+        self.assertEqual(references, [])
+
+    def test_bulk_delete_of_nothing(self):
+        self.assertEqual(bulk_delete_transactions(Transaction.objects.none()), 0)
+
+    def test_purge_user_deletes_everything(self):
+        other = User.objects.create_user("other", "other@example.com", "Other", "password")
+        kept = Transaction.objects.create(user=other, amount="5.00", transaction_type="income")
+        self.assertEqual(purge_user(self.user, batch_size=25), 60)
+        self.assertFalse(User.objects.filter(email="bulk@example.com").exists())
+        self.assertFalse(Account.objects.filter(pk__in=[account.pk for account in self.accounts]).exists())
+        self.assertFalse(DailyTransactionSummary.objects.filter(user_id=self.accounts[0].user_id).exists())
+        self.assertEqual(list(Transaction.objects.all()), [kept])
+
+
+class SpreadsheetSaveTests(TestCase):
+    """
+    Rows saved from the spreadsheet editor move balances, rollups and versions like single saves do.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("sheet", "sheet@example.com", "Sheet", "password")
+        self.checking = Account.objects.create(user=self.user, account_number="8001", account_type="checking")
+        self.savings = Account.objects.create(user=self.user, account_number="8002", account_type="savings")
+        self.food = Category.objects.create(user=self.user, name="Food", type="expense")
+        self.salary = Transaction.objects.create(
+            user=self.user, account=self.checking, amount="1000.00", transaction_type="income",
+            date="2025-03-01", description="Salary",
+        )
+        self.rent = Transaction.objects.create(
+            user=self.user, account=self.checking, amount="600.00", transaction_type="expense",
+            date="2025-03-02", description="Rent",
+        )
+        self.client.force_login(self.user)
+
+    def save(self, **changes):
+        return self.client.post(
+            reverse("save_spreadsheet_transactions"), json.dumps(changes), content_type="application/json"
+        )
+
+    def row(self, t, **values):
+        t.refresh_from_db()
+        return {
+            "id": t.pk, "version": t.version, "date": t.date.isoformat(), "account_id": t.account_id,
+            "category_id": t.category_id, "description": t.description, "amount": str(t.amount),
+            "transaction_type": t.transaction_type, **values,
+        }
+
+    def rollup_rows(self):
+        return sorted(DailyTransactionSummary.objects.filter(user=self.user).values_list(
+            "date", "transaction_type", "total", "count"
+        ))
+
+    def assertLedgerMatches(self, checking, savings):
+        accounts = [self.checking, self.savings]
+        self.assertEqual(stored_balances(accounts), {
+            self.checking.pk: Decimal(checking), self.savings.pk: Decimal(savings),
+        })
+        self.assertEqual(stored_balances(accounts), expected_balances(accounts))
+        summaries = self.rollup_rows()
+        rollups.rebuild_daily_summaries(self.user)
+        self.assertEqual(summaries, self.rollup_rows())
+
+    def test_insert_update_and_delete_in_one_save(self):
+        response = self.save(
+            inserted=[
+                {"row": 3, "date": "2025-03-05", "account_id": self.savings.pk, "category_id": self.food.pk,
+                 "description": "Groceries", "amount": "45.10", "transaction_type": "expense"},
+                {"row": 4, "date": "2025-03-02", "account_id": str(self.checking.pk), "category_id": "",
+                 "description": "Refund", "amount": 20, "transaction_type": "Income"},
+                # Blank rows of the grid are ignored
+                {"row": 5, "date": "", "amount": None},
+            ],
+            # The salary moves to savings and turns into an expense
+            updated=[self.row(self.salary, account_id=self.savings.pk, transaction_type="expense", amount="250.00")],
+            deleted=[{"id": self.rent.pk, "version": self.rent.version}],
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual(len(body["created"]), 2)
+        self.assertEqual(body["versions"], {str(self.salary.pk): 2})
+
+        self.salary.refresh_from_db()
+        self.assertEqual(
+            (self.salary.account_id, self.salary.transaction_type, self.salary.amount, self.salary.version),
+            (self.savings.pk, "expense", Decimal("250.00"), 2),
+        )
+        self.assertFalse(Transaction.objects.filter(pk=self.rent.pk).exists())
+        refund = Transaction.objects.get(pk=body["created"][1])
+        self.assertEqual((refund.transaction_type, refund.category_id, refund.version), ("income", None, 1))
+        # Checking: +20 refund. Savings: -45.10 groceries, -250 salary turned expense
+        self.assertLedgerMatches("20.00", "-295.10")
+        self.assertEqual(self.rollup_rows(), [
+            (date(2025, 3, 1), "expense", Decimal("250.00"), 1),
+            (date(2025, 3, 2), "income", Decimal("20.00"), 1),
+            (date(2025, 3, 5), "expense", Decimal("45.10"), 1),
+        ])
+
+    def test_update_moves_the_day(self):
+        response = self.save(updated=[self.row(self.rent, date="2025-04-01", amount="650.00")])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertLedgerMatches("350.00", "0")
+        self.assertEqual(self.rollup_rows(), [
+            (date(2025, 3, 1), "income", Decimal("1000.00"), 1),
+            (date(2025, 4, 1), "expense", Decimal("650.00"), 1),
+        ])
+
+    def test_invalid_row_saves_nothing(self):
+        response = self.save(
+            inserted=[{"row": 3, "date": "2025-03-05", "description": "Groceries", "amount": "abc"}],
+            deleted=[{"id": self.rent.pk, "version": self.rent.version}],
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["errors"][0].startswith("Row 3: "))
+        self.assertTrue(Transaction.objects.filter(pk=self.rent.pk).exists())
+        self.assertLedgerMatches("400.00", "0")
+
+    def test_stale_version_is_a_conflict(self):
+        stale = self.row(self.rent, amount="1.00")
+        # Changed in another session after the editor loaded it
+        self.rent.description = "Rent (March)"
+        self.rent.save()
+        response = self.save(
+            inserted=[{"date": "2025-03-05", "description": "Groceries", "amount": "45.10"}],
+            updated=[stale],
+            deleted=[{"id": self.salary.pk, "version": self.salary.version}],
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            [(conflict["id"], conflict["version"]) for conflict in response.json()["conflicts"]], [(self.rent.pk, 2)]
+        )
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+        self.rent.refresh_from_db()
+        self.assertEqual((self.rent.amount, self.rent.version), (Decimal("600.00"), 2))
+        self.assertLedgerMatches("400.00", "0")
+
+    def test_concurrently_deleted_row_is_a_conflict(self):
+        updated, deleted = self.row(self.salary, amount="5.00"), self.row(self.rent)
+        Transaction.objects.filter(pk__in=[self.salary.pk, self.rent.pk]).delete()
+        response = self.save(updated=[updated], deleted=[deleted])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            sorted((conflict["id"], conflict["version"]) for conflict in response.json()["conflicts"]),
+            [(self.salary.pk, None), (self.rent.pk, None)],
+        )
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+        self.assertLedgerMatches("0", "0")
+
+    def test_rows_without_id_or_version_are_refused(self):
+        for changes in (
+            {"updated": [{**self.row(self.rent), "version": None}]},
+            {"updated": [{**self.row(self.rent), "id": "abc"}]},
+            {"deleted": [{"id": self.rent.pk}]},
+            {"deleted": [{"version": 1}]},
+            # The same transaction twice
+            {"updated": [self.row(self.rent)], "deleted": [self.row(self.rent)]},
+        ):
+            response = self.save(**changes)
+            self.assertEqual(response.status_code, 400, changes)
+            self.assertEqual(len(response.json()["errors"]), 1, changes)
+        self.assertLedgerMatches("400.00", "0")
+
+    def test_malformed_payload_is_refused(self):
+        for body in ({"inserted": [5]}, {"inserted": "abc"}, {"updated": {"id": 1}}, {"deleted": [None]}, [1]):
+            response = self.client.post(
+                reverse("save_spreadsheet_transactions"), json.dumps(body), content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400, body)
+            self.assertEqual(response.json()["status"], "error", body)
+        response = self.client.post(reverse("save_spreadsheet_transactions"), "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+
+
+class SpreadsheetWindowTests(TestCase):
+    """
+    The spreadsheet loads its rows in blocks, sorted and filtered by the database.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("window", "window@example.com", "Window", "password")
+        self.checking = Account.objects.create(
+            user=self.user, account_number="90017777", account_type="checking", institution_number=""
+        )
+        self.savings = Account.objects.create(
+            user=self.user, account_number="9002", account_type="savings", institution_number="42"
+        )
+        self.food = Category.objects.create(user=self.user, name="Food", type="expense")
+        self.pay = Category.objects.create(user=self.user, name="Pay", type="income")
+        self.rows = [
+            Transaction.objects.create(
+                user=self.user, account=[self.checking, self.savings, None][i % 3],
+                category=[self.food, None, self.pay][i % 3], amount=Decimal(i % 7 + 1),
+                transaction_type="income" if i % 3 == 2 else "expense", date=date(2025, 5, 1) + timedelta(days=i % 10),
+                description=f"Coffee {i}" if i % 2 else f"Lunch {i}",
+            )
+            for i in range(30)
+        ]
+        other = User.objects.create_user("intruder", "intruder@example.com", "Intruder", "password")
+        Transaction.objects.create(user=other, amount="1.00", description="Coffee elsewhere")
+        self.client.force_login(self.user)
+
+    def window(self, **params):
+        response = self.client.get(reverse("spreadsheet_rows"), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_blocks_cover_the_sorted_rows(self):
+        first = self.window(limit=12)
+        self.assertEqual((first["offset"], first["total"], len(first["rows"])), (0, 30, 12))
+        rest = [self.window(limit=12, offset=offset) for offset in (12, 24)]
+        self.assertNotIn("total", rest[0])
+        ids = [row[0] for block in [first, *rest] for row in block["rows"]]
+        self.assertEqual(ids, [t.pk for t in sorted(self.rows, key=lambda t: (t.date, t.pk), reverse=True)])
+        self.assertEqual(self.window(offset=30)["rows"], [])
+        # A first block shorter than the limit is counted without another query
+        self.assertEqual(self.window(limit=100)["total"], 30)
+
+    def test_sort_keys(self):
+        by_amount = [row[6] for row in self.window(sort="amount", order="asc", limit=100)["rows"]]
+        self.assertEqual(by_amount, sorted(by_amount))
+        by_description = [row[5] for row in self.window(sort="description", order="desc", limit=100)["rows"]]
+        self.assertEqual(by_description, sorted(by_description, reverse=True))
+        # Uncategorized rows come first on SQLite and last on PostgreSQL
+        by_category = [row[4] for row in self.window(sort="category", order="asc", limit=100)["rows"] if row[4]]
+        self.assertEqual(by_category, [self.food.pk] * 10 + [self.pay.pk] * 10)
+        self.assertEqual(self.window(sort="account")["total"], 30)
+        for params in ({"sort": "bogus"}, {"sort": "user_id"}, {"order": "sideways"}, {"offset": "x"}):
+            self.assertEqual(self.client.get(reverse("spreadsheet_rows"), params).status_code, 400, params)
+
+    def test_filters(self):
+        def ids(**params):
+            return sorted(row[0] for row in self.window(limit=100, **params)["rows"])
+
+        def expected(condition):
+            return sorted(t.pk for t in self.rows if condition(t))
+
+        self.assertEqual(ids(q="coffee"), expected(lambda t: t.description.startswith("Coffee")))
+        self.assertEqual(ids(account=self.savings.pk), expected(lambda t: t.account_id == self.savings.pk))
+        self.assertEqual(ids(category="none"), expected(lambda t: t.category_id is None))
+        self.assertEqual(ids(category=self.food.pk, type="expense"), expected(lambda t: t.category_id == self.food.pk))
+        self.assertEqual(
+            ids(start="2025-05-03", end="2025-05-04"),
+            expected(lambda t: date(2025, 5, 3) <= t.date <= date(2025, 5, 4)),
+        )
+        filtered = self.window(q="lunch", type="income", limit=2)
+        self.assertEqual(len(filtered["rows"]), 2)
+        lunch_income = expected(lambda t: t.description.startswith("Lunch") and t.transaction_type == "income")
+        self.assertEqual(filtered["total"], len(lunch_income))
+
+    def test_lookups_cover_the_block(self):
+        block = self.window(account=self.savings.pk)
+        self.assertEqual(block["accounts"], {str(self.savings.pk): "42 (9002)"})
+        self.assertEqual(block["categories"], {})
+        block = self.window(limit=3)
+        self.assertEqual(block["accounts"], {
+            str(self.checking.pk): "Account ending in 7777 (90017777)", str(self.savings.pk): "42 (9002)",
+        })
+        self.assertEqual(block["categories"], {str(self.food.pk): "Food", str(self.pay.pk): "Pay"})
+        self.assertEqual({str(row[3]) for row in block["rows"] if row[3]}, set(block["accounts"]))
+        self.assertEqual({str(row[4]) for row in block["rows"] if row[4]}, set(block["categories"]))
+
+
+class CalendarFeedTests(TestCase):
+    """
+    The calendar feed returns the events of the requested range, one per transaction or one per day.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("calendar", "calendar@example.com", "Calendar", "password")
+        self.account = Account.objects.create(
+            user=self.user, account_number="1600", account_type="checking", balance=Decimal("100.00")
+        )
+        food = Category.objects.create(user=self.user, name="Food", type="expense")
+        self.lunch = Transaction.objects.create(
+            user=self.user, account=self.account, category=food, amount="12.50", transaction_type="expense",
+            date="2025-03-01", description="Lunch",
+        )
+        self.pay = Transaction.objects.create(
+            user=self.user, amount="900.00", transaction_type="income", date="2025-03-31", description="",
+        )
+        for day in ("2025-02-28", "2025-04-01", "2025-03-15", "2025-03-15"):
+            Transaction.objects.create(
+                user=self.user, account=self.account, amount="5.00", transaction_type="expense", date=day,
+                description="Coffee",
+            )
+        other = User.objects.create_user("elsewhere", "elsewhere@example.com", "Elsewhere", "password")
+        Transaction.objects.create(user=other, amount="1.00", transaction_type="expense", date="2025-03-10")
+        self.client.force_login(self.user)
+        self.url = reverse("transaction_calendar_feed")
+
+    def feed(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_events_of_the_range(self):
+        events = self.feed(start="2025-03-01", end="2025-04-01")
+        self.assertEqual(sorted(event["start"] for event in events), [
+            "2025-03-01", "2025-03-15", "2025-03-15", "2025-03-31",
+        ])
+        lunch = next(event for event in events if event["id"] == self.lunch.pk)
+        self.assertEqual(lunch, {
+            "id": self.lunch.pk, "title": "Lunch - $12.5", "start": "2025-03-01", "allDay": True,
+            "className": "expense-event",
+            "extendedProps": {
+                "transactionId": self.lunch.pk, "description": "Lunch", "amount": 12.5, "type": "expense",
+                "category": "Food", "account": "1600", "accountType": "Checking", "accountBalance": 67.5,
+                "date": "2025-03-01",
+            },
+        })
+        pay = next(event for event in events if event["id"] == self.pay.pk)
+        self.assertEqual((pay["title"], pay["className"]), ("Income transaction - $900.0", "income-event"))
+        self.assertEqual(
+            (pay["extendedProps"]["category"], pay["extendedProps"]["account"], pay["extendedProps"]["accountType"]),
+            ("Uncategorized", "N/A", "N/A"),
+        )
+
+    def test_dates_with_a_time_and_offset(self):
+        # FullCalendar sends the range as datetimes in the calendar's time zone
+        for start, end in (
+            ("2025-03-01T00:00:00-05:00", "2025-04-01T00:00:00-04:00"),
+            ("2025-03-01T00:00:00Z", "2025-04-01T00:00:00Z"),
+            ("2025-03-01T00:00:00", "2025-04-01"),
+        ):
+            self.assertEqual(len(self.feed(start=start, end=end)), 4, (start, end))
+        self.assertEqual(len(self.feed(start="2025-03-15T00:00:00+01:00", end="2025-03-16T00:00:00+01:00")), 2)
+
+    def test_daily_totals_for_wide_ranges(self):
+        events = self.feed(start="2024-12-29", end="2026-01-04", mode="daily")
+        self.assertEqual(
+            sorted((event["start"], event["extendedProps"]["type"], event["extendedProps"]["count"],
+                    event["extendedProps"]["amount"]) for event in events),
+            [
+                ("2025-02-28", "expense", 1, 5.0), ("2025-03-01", "expense", 1, 12.5),
+                ("2025-03-15", "expense", 2, 10.0), ("2025-03-31", "income", 1, 900.0),
+                ("2025-04-01", "expense", 1, 5.0),
+            ],
+        )
+        day = next(event for event in events if event["start"] == "2025-03-15")
+        self.assertEqual((day["id"], day["title"], day["allDay"]), ("2025-03-15-expense", "2 expense - $10.00", True))
+        self.assertTrue(day["extendedProps"]["aggregated"])
+
+    def test_invalid_ranges(self):
+        for params in (
+            {}, {"start": "2025-03-01"}, {"end": "2025-03-01"}, {"start": "tomorrow", "end": "2025-03-01"},
+            {"start": "2025-02-30", "end": "2025-03-01"}, {"start": "2025-04-01", "end": "2025-03-01"},
+            {"start": "2025-03-01", "end": "2025-03-01T12:00:00Z"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(response.json()["status"], "error", params)
+
+
+class TimelineFeedTests(TestCase):
+    """
+    The timeline feed pages through every transaction once, newest first, with one header per month.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("timeline", "timeline@example.com", "Timeline", "password")
+        # Many transactions share a date, so pages end in the middle of a day
+        for i in range(75):
+            Transaction.objects.create(
+                user=self.user, amount=Decimal(i + 1), transaction_type="income" if i % 4 else "expense",
+                date=date(2025, 1, 20) + timedelta(days=(i % 5) * 7), description=f"Card {i}",
+            )
+        self.client.force_login(self.user)
+        self.url = reverse("transaction_timeline_feed")
+
+    def pages(self, limit):
+        params = {"limit": limit}
+        while True:
+            page = self.client.get(self.url, params).json()
+            yield page
+            if not page["next_cursor"]:
+                return
+            params["cursor"] = page["next_cursor"]
+
+    def test_pages_list_every_transaction_once(self):
+        pages = list(self.pages(limit=10))
+        self.assertEqual(len(pages), 8)
+        self.assertTrue(all(len(page["transactions"]) == 10 for page in pages[:-1]))
+        seen = [(card["date"], card["id"]) for page in pages for card in page["transactions"]]
+        expected = sorted(
+            ((day.isoformat(), pk) for pk, day in Transaction.objects.filter(user=self.user).values_list("pk", "date")),
+            reverse=True,
+        )
+        self.assertEqual(seen, expected)
+
+    def test_month_headers_are_sent_once(self):
+        months = [month for page in self.pages(limit=7) for month in page["months"]]
+        self.assertEqual([month["month"] for month in months], ["2025-02", "2025-01"])
+        # The headers total the whole month, not only the cards of the page that starts it
+        self.assertEqual(
+            sum(month["income"] + month["expenses"] for month in months),
+            float(sum(Transaction.objects.filter(user=self.user).values_list("amount", flat=True))),
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in ("garbage", "2024-01-01.", "2024-01-01", ".5", "2024-13-01.5"):
+            self.assertEqual(self.client.get(self.url, {"cursor": cursor}).status_code, 400, cursor)
+        self.assertEqual(self.client.get(self.url, {"limit": "ten"}).status_code, 400)
+
+
+class BalanceSnapshotTests(TestCase):
+    """
+    Historical balances computed from snapshots match a full sum of the ledger.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("history", "history@example.com", "History", "password")
+        self.account = Account.objects.create(
+            user=self.user, account_number="4001", account_type="checking", balance=Decimal("250.00")
+        )
+        rng = random.Random(21)
+        for _ in range(120):
+            Transaction.objects.create(
+                user=self.user, account=self.account, amount=Decimal(rng.randint(1, 50000)) / 100,
+                transaction_type=rng.choice(["income", "expense"]),
+                date=date(2024, 1, 1) + timedelta(days=rng.randint(0, 400)),
+            )
+
+    def full_sum(self, day):
+        return self.account.opening_balance + sum(
+            (t.amount if t.transaction_type == "income" else -t.amount)
+            for t in Transaction.objects.filter(account=self.account, date__lte=day)
+        )
+
+    def assertAsOfMatches(self):
+        for day in (date(2023, 12, 31), date(2024, 1, 31), date(2024, 3, 15), date(2024, 6, 29), date(2025, 6, 1)):
+            self.assertEqual(balance_as_of(self.account, day), self.full_sum(day), day)
+
+    def test_opening_balance_is_the_initial_balance(self):
+        self.assertEqual(self.account.opening_balance, Decimal("250.00"))
+
+    def test_snapshots_are_month_end_balances(self):
+        self.assertEqual(take_snapshots(Account.objects.filter(pk=self.account.pk), through=date(2024, 12, 31)), 12)
+        for snapshot in AccountBalanceSnapshot.objects.filter(account=self.account):
+            self.assertEqual(snapshot.balance, self.full_sum(snapshot.date))
+        self.assertAsOfMatches()
+
+    def test_as_of_without_snapshots(self):
+        self.assertAsOfMatches()
+
+    def test_backdated_writes_shift_the_snapshots(self):
+        take_snapshots(Account.objects.filter(pk=self.account.pk), through=date(2024, 12, 31))
+        t = Transaction.objects.create(
+            user=self.user, account=self.account, amount="99.99", transaction_type="income", date=date(2024, 2, 10)
+        )
+        t.date = date(2024, 5, 5)
+        t.transaction_type = "expense"
+        t.save()
+        bulk_delete_transactions(Transaction.objects.filter(account=self.account, date__lt=date(2024, 3, 1)))
+        for snapshot in AccountBalanceSnapshot.objects.filter(account=self.account):
+            self.assertEqual(snapshot.balance, self.full_sum(snapshot.date))
+        self.assertAsOfMatches()
+
+    def test_reconcile_reports_drift(self):
+        self.assertEqual(reconcile_balances(Account.objects.filter(pk=self.account.pk)), (1, []))
+        Account.objects.filter(pk=self.account.pk).update(balance=F("balance") + 5)
+        checked, drifted = reconcile_balances(Account.objects.filter(pk=self.account.pk))
+        self.assertEqual(len(drifted), 1)
+        self.assertEqual(drifted[0]["drift"], Decimal("5.00"))
+
+    def test_series_closes_every_bucket_at_its_as_of_balance(self):
+        take_snapshots(Account.objects.filter(pk=self.account.pk), through=date(2024, 6, 30))
+        for granularity in ("day", "week", "month"):
+            for start in (None, date(2024, 3, 10)):
+                series = balance_series([self.account], granularity, start=start, end=date(2024, 12, 31))
+                points = series[self.account.pk]["points"]
+                self.assertTrue(points)
+                for bucket, balance in points:
+                    if granularity == "day":
+                        last_day = bucket
+                    elif granularity == "week":
+                        last_day = bucket + timedelta(days=6)
+                    else:
+                        last_day = month_end(bucket)
+                    # SQLite sums decimals as floats, hence the rounding
+                    self.assertAlmostEqual(
+                        balance, balance_as_of(self.account, min(last_day, date(2024, 12, 31))), places=2
+                    )
+
+    def test_series_endpoint_follows_writes(self):
+        self.client.force_login(self.user)
+        url = reverse("account_balance_series_api") + "?granularity=month"
+        before = self.client.get(url).json()
+        self.assertEqual(before["accounts"][0]["balances"][-1], float(self.full_sum(date(2025, 12, 31))))
+        # The cached series is invalidated when the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                user=self.user, account=self.account, amount="1000.00", transaction_type="income",
+                date=date(2024, 1, 5),
+            )
+        after = self.client.get(url).json()
+        self.assertEqual(
+            [round(balance - 1000, 2) for balance in after["accounts"][0]["balances"]],
+            before["accounts"][0]["balances"],
+        )
+        self.assertEqual(self.client.get(url.replace("month", "year")).status_code, 400)
+
+
+class LoginRequiredTests(TestCase):
+    """
+    Account pages redirect anonymous visitors to the login page.
+    """
+
+    def test_anonymous_requests_redirect_to_login(self):
+        user = User.objects.create_user("owner", "owner@example.com", "Owner", "password")
+        account = Account.objects.create(user=user, account_number="6001", account_type="checking")
+        for method, url, data in (
+            ("get", reverse("manage_account"), {}),
+            ("post", reverse("manage_account"), {"delete_account": "1"}),
+            ("get", reverse("account_balance_as_of", args=[account.pk]), {}),
+        ):
+            response = getattr(self.client, method)(url, data)
+            self.assertEqual(response.status_code, 302, url)
+            self.assertTrue(response["Location"].startswith("/accounts/login/"), url)
+        self.assertTrue(User.objects.filter(pk=user.pk).exists())
+
+
+class KeywordSearchTests(TestCase):
+    """
+    Keyword search matches descriptions and category names, with full-text search on PostgreSQL.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("search", "search@example.com", "Search", "password")
+        self.groceries = Category.objects.create(user=self.user, name="Groceries", type="expense")
+        self.walmart = Transaction.objects.create(
+            user=self.user, category=self.groceries, amount="20.00", description="Walmart Supercenter"
+        )
+        self.bonus = Transaction.objects.create(
+            user=self.user, amount="500.00", transaction_type="income", description="Grocery store bonus"
+        )
+        self.coffee = Transaction.objects.create(user=self.user, amount="3.50", description="Tim Hortons coffee")
+
+    def search(self, keyword):
+        return list(search_transactions(Transaction.objects.filter(user=self.user), keyword).order_by("-rank", "id"))
+
+    def test_keyword_matches_word_starts_in_description_and_category(self):
+        self.assertEqual(self.search("walm"), [self.walmart])
+        self.assertEqual(self.search("tim hort"), [self.coffee])
+        self.assertEqual(self.search("zzz"), [])
+        self.assertIn(self.walmart, self.search("groc"))
+
+    def test_writes_update_the_search(self):
+        self.groceries.name = "Food"
+        self.groceries.save()
+        self.assertEqual(self.search("food"), [self.walmart])
+        self.coffee.description = "Starbucks"
+        self.coffee.save()
+        self.assertEqual(self.search("coffee"), [])
+        Transaction.objects.filter(pk=self.bonus.pk).update(description="Payroll")
+        self.assertEqual(self.search("payroll"), [self.bonus])
+
+    def test_stop_words_still_match(self):
+        the_bay = Transaction.objects.create(user=self.user, amount="45.00", description="The Bay")
+        # Full-text search drops stop words, which would leave nothing to search for
+        self.assertEqual(self.search("the"), [the_bay])
+        self.assertEqual(self.search("the bay"), [the_bay])
+
+    @unittest.skipUnless(full_text_search_supported(), "Ranking needs full-text search (PostgreSQL)")
+    def test_description_matches_rank_above_category_matches(self):
+        self.assertEqual(self.search("grocery"), [self.bonus, self.walmart])
+        # Operators typed by the user are not interpreted
+        self.assertEqual(self.search("walmart | !coffee"), [])
+
+    def test_similarity_mode_matches_noisy_descriptions(self):
+        Transaction.objects.create(user=self.user, amount="12.99", description="AMZN MKTP CA*2K3")
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("query_transactions"), {"keyword": "amzn mktp", "search_mode": "similar"})
+        self.assertEqual([t.description for t in response.context["transactions"]], ["AMZN MKTP CA*2K3"])
+
+    def test_similarity_search_with_trigrams(self):
+        if not trigram_search_supported():
+            self.skipTest("Similarity search needs the pg_trgm extension (PostgreSQL)")
+        noisy = [
+            Transaction.objects.create(user=self.user, amount="12.99", description=description)
+            for description in ("AMZN MKTP CA*2K3", "Amzn Mktp US*1A2", "AMZ Marketplace")
+        ]
+        matches = similar_transactions(Transaction.objects.filter(user=self.user), "amzn mktp")
+        self.assertIn("%>", str(matches.query))
+        ranked = list(matches.order_by("-rank", "id"))
+        self.assertEqual(ranked[:2], noisy[:2])
+        self.assertNotIn(self.walmart, ranked)
+        self.assertEqual(ranked[0].rank, 1.0)
+        # Category names are matched too
+        self.assertIn(self.walmart, similar_transactions(Transaction.objects.filter(user=self.user), "grocerys"))
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "Extensions are a PostgreSQL feature")
+    def test_missing_extensions_are_looked_up_again(self):
+        with mock.patch.object(search, "_extensions", {}), mock.patch.object(search, "EXTENSION_RECHECK_SECONDS", 0):
+            self.assertFalse(search._has_extension(connection.alias, "no_such_extension"))
+            with self.assertNumQueries(1):
+                self.assertFalse(search._has_extension(connection.alias, "no_such_extension"))
+            self.assertTrue(search._has_extension(connection.alias, "plpgsql"))
+            with self.assertNumQueries(0):
+                self.assertTrue(search._has_extension(connection.alias, "plpgsql"))
+
+    def test_query_page_orders_by_rank(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("query_transactions"), {"keyword": "coffee"})
+        self.assertEqual(list(response.context["transactions"]), [self.coffee])
+
+
+class AutocompleteTests(TestCase):
+    """
+    Autocomplete suggests the most used descriptions and the categories, from a per-user prefix cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("complete", "complete@example.com", "Complete", "password")
+        Category.objects.create(user=self.user, name="Groceries", type="expense")
+        for description in ("AMZN MKTP CA*9Z1", "AMZN MKTP CA*2K3", "AMZN MKTP CA*2K3", "Amazon.ca", "Grocery Outlet"):
+            Transaction.objects.create(user=self.user, amount="10.00", description=description)
+
+    def test_suggestions_start_with_the_prefix_most_used_first(self):
+        self.assertEqual(autocomplete(self.user, "a"), {"descriptions": [], "categories": []})
+        self.assertEqual(autocomplete(self.user, "amz")["descriptions"], ["AMZN MKTP CA*2K3", "AMZN MKTP CA*9Z1"])
+        self.assertEqual(autocomplete(self.user, " GR"), {"descriptions": ["Grocery Outlet"], "categories": ["Groceries"]})
+
+    def test_longer_prefixes_are_served_from_the_cache(self):
+        autocomplete(self.user, "am")
+        with self.assertNumQueries(0):
+            self.assertEqual(autocomplete(self.user, "amzn mktp ca*9")["descriptions"], ["AMZN MKTP CA*9Z1"])
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(user=self.user, amount="10.00", description="AMZN MKTP CA*9Q8")
+        self.assertEqual(
+            autocomplete(self.user, "amzn mktp ca*9")["descriptions"], ["AMZN MKTP CA*9Q8", "AMZN MKTP CA*9Z1"]
+        )
+
+    def test_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("autocomplete_api"), {"q": "groc"})
+        self.assertEqual(response.json(), {"descriptions": ["Grocery Outlet"], "categories": ["Groceries"]})
+
+
+# The tables that the hot queries must read through an index
+INDEXED_TABLES = {Transaction._meta.db_table, DailyTransactionSummary._meta.db_table}
+
+
+def sequential_scans(sql):
+    """
+    Returns the INDEXED_TABLES that the database plans to read in full (a sequential scan) to run a query.
+    """
+    scans = []
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+            nodes = [(json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]]
+            while nodes:
+                node = nodes.pop()
+                if node["Node Type"] == "Seq Scan" and node["Relation Name"] in INDEXED_TABLES:
+                    scans.append(node["Relation Name"])
+                nodes.extend(node.get("Plans", []))
+        else:
+            # SQLite reports "SCAN <table>" for full scans, and "SEARCH <table> USING INDEX" or
+            # "SCAN <table> USING COVERING INDEX" when it reads an index
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            for *_, detail in cursor.fetchall():
+                words = detail.split()
+                if words[:1] == ["SCAN"] and words[1] in INDEXED_TABLES and "INDEX" not in words:
+                    scans.append(words[1])
+    return scans
+
+
+class QueryPlanTests(TestCase):
+    """
+    The hot queries of the dashboard, query, calendar, timeline and budget views read transactions
+    through indexes, never with a sequential scan.
+
+    The views are requested against a database seeded with many users, and every query they run on
+    the transaction and rollup tables is EXPLAINed.
+    """
+
+    USERS = 40
+    TRANSACTIONS_PER_USER = 250
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(25)
+        transactions = []
+        for i in range(cls.USERS):
+            user = User.objects.create_user(f"plan{i}", f"plan{i}@example.com", f"Plan {i}", None)
+            account = Account.objects.create(user=user, account_number=f"500{i}", account_type="checking")
+            categories = [
+                Category.objects.create(user=user, name=name, type=category_type)
+                for name, category_type in (("Salary", "income"), ("Groceries", "expense"), ("Rent", "expense"))
+            ]
+            for category in categories[1:]:
+                Budget.objects.create(user=user, category=category, amount="500.00", period="monthly")
+            for _ in range(cls.TRANSACTIONS_PER_USER):
+                category = rng.choice(categories)
+                transactions.append(Transaction(
+                    user=user, account=account, category=category, amount=Decimal(rng.randint(100, 50000)) / 100,
+                    transaction_type=category.type, method=rng.choice(["branch", "atm", None]),
+                    date=date.today() - timedelta(days=rng.randint(0, 3 * 365)),
+                    description=f"{category.name} {rng.choice(['Walmart', 'Costco', 'Payroll', 'Landlord'])}",
+                ))
+        Transaction.objects.bulk_create(transactions, batch_size=1000)
+        rollups.rebuild_daily_summaries()
+        cls.user = user
+        cls.category = categories[1]
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def assertIndexedQueries(self, *requests):
+        """
+        Runs requests (url, params) and fails if a query they run reads INDEXED_TABLES sequentially.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            for url, params in requests:
+                self.assertEqual(self.client.get(url, params).status_code, 200, (url, params))
+        checked = [
+            query["sql"] for query in queries
+            if query["sql"].startswith("SELECT") and any(f'"{table}"' in query["sql"] for table in INDEXED_TABLES)
+        ]
+        self.assertTrue(checked)
+        self.assertEqual([(sql, scans) for sql in checked if (scans := sequential_scans(sql))], [])
+
+    def test_dashboard(self):
+        url = reverse("dashboard")
+        self.assertIndexedQueries(
+            (url, {}), (url, {"page": 3}), (url, {"type": "expense"}), (url, {"category": self.category.pk}),
+            (url, {"start": (date.today() - timedelta(days=60)).isoformat(), "end": date.today().isoformat()}),
+        )
+
+    def test_query_transactions(self):
+        url = reverse("query_transactions")
+        self.assertIndexedQueries(
+            (url, {}), (url, {"date_range": "3m"}), (url, {"date_range": "12m", "min_amount": "100"}),
+            (url, {"transaction_method": "atm"}), (url, {"keyword": "costco"}),
+            (url, {"keyword": "costco", "search_mode": "similar", "date_range": "6m"}),
+        )
+
+    def test_calendar_feed(self):
+        url = reverse("transaction_calendar_feed")
+        month = {"start": date.today().replace(day=1).isoformat(), "end": date.today().isoformat()}
+        self.assertIndexedQueries((url, month), (url, {**month, "mode": "daily"}))
+
+    def test_timeline_feed(self):
+        url = reverse("transaction_timeline_feed")
+        first_page = self.client.get(url).json()
+        self.assertIndexedQueries((url, {}), (url, {"cursor": first_page["next_cursor"]}))
+
+    def test_budget_evaluation(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(evaluate_budgets(self.user)), 2)
+        spent = [query["sql"] for query in queries if f'"{Transaction._meta.db_table}"' in query["sql"]]
+        self.assertEqual(len(spent), 1)
+        self.assertEqual(sequential_scans(spent[0]), [])
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Concurrent writes need row locks (PostgreSQL)")
+class ConcurrentBalanceLedgerTests(TransactionTestCase):
+    """
+    Balances stay exact when many threads insert, update and delete transactions of the same accounts.
+    """
+
+    THREADS = 8
+    OPERATIONS = 60
+
+    def setUp(self):
+        self.user = User.objects.create_user("stress", "stress@example.com", "Stress", "password")
+        self.accounts = [
+            Account.objects.create(user=self.user, account_number=f"200{i}", account_type="checking")
+            for i in range(3)
+        ]
+
+    def test_concurrent_inserts_updates_and_deletes(self):
+        ids = []
+        ids_lock = threading.Lock()
+        errors = []
+        start = threading.Barrier(self.THREADS)
+
+        def random_values(rng):
+            return {
+                "account": rng.choice(self.accounts),
+                "transaction_type": rng.choice(["income", "expense"]),
+                "amount": Decimal(rng.randint(1, 100000)) / 100,
+                "date": f"2025-01-{rng.randint(1, 3):02d}",
+            }
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                start.wait()
+                for _ in range(self.OPERATIONS):
+                    with ids_lock:
+                        target = rng.choice(ids) if ids else None
+                    operation = rng.random()
+                    if target is None or operation < 0.4:
+                        t = Transaction.objects.create(user=self.user, **random_values(rng))
+                        with ids_lock:
+                            ids.append(t.pk)
+                    elif operation < 0.8:
+                        # Another thread may change or delete the transaction meanwhile
+                        t = Transaction.objects.filter(pk=target).first()
+                        if t is not None:
+                            for field, value in random_values(rng).items():
+                                setattr(t, field, value)
+                            try:
+                                t.save()
+                            except Transaction.DoesNotExist:
+                                pass
+                    else:
+                        Transaction(pk=target).delete()
+            except Exception as e:  # reported by the main thread
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(Transaction.objects.filter(user=self.user).exists())
+        self.assertEqual(stored_balances(self.accounts), expected_balances(self.accounts))
+
+        # The daily rollups went through the same concurrent writes
+        summaries = sorted(DailyTransactionSummary.objects.filter(user=self.user).values_list(
+            "date", "transaction_type", "total", "count"
+        ))
+        rollups.rebuild_daily_summaries(self.user)
+        self.assertEqual(summaries, sorted(DailyTransactionSummary.objects.filter(user=self.user).values_list(
+            "date", "transaction_type", "total", "count"
+        )))
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Concurrent imports need row locks (PostgreSQL)")
+class ConcurrentImportTests(TransactionTestCase):
+    """
+    Two imports of the same statement running at the same time import its rows once.
+    """
+
+    def assertImportedOnce(self, backend):
+        user = User.objects.create_user(backend, f"{backend}@example.com", "Twice", "password")
+        account = Account.objects.create(user=user, account_number="7001", account_type="checking")
+        statement = "date,transaction_type,amount,description,account\n" + "".join(
+            f"2025-03-{i % 28 + 1:02d},expense,{i + 1}.00,Shop {i},7001\n" for i in range(50)
+        )
+
+        def run_import():
+            return import_statement(user, io.BytesIO(statement.encode()), "march.csv", backend=backend)
+
+        first_inserted = threading.Event()
+        commit_first = threading.Event()
+        results = {}
+        errors = []
+
+        def first():
+            try:
+                with transaction.atomic():
+                    results["first"] = run_import()
+                    first_inserted.set()
+                    commit_first.wait(10)
+            except Exception as e:  # reported by the main thread
+                errors.append(e)
+            finally:
+                first_inserted.set()
+                connection.close()
+
+        def second():
+            try:
+                results["second"] = run_import()
+            except Exception as e:  # reported by the main thread
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        threads[0].start()
+        first_inserted.wait(10)
+        threads[1].start()
+        # Let the second import reach the rows the first one has not committed yet
+        time.sleep(1)
+        commit_first.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual((results["first"]["inserted"], results["second"]["inserted"]), (50, 0))
+        self.assertEqual(results["second"]["skipped"], 50)
+        self.assertEqual(Transaction.objects.filter(user=user).count(), 50)
+        self.assertEqual(stored_balances([account]), expected_balances([account]))
+
+    def test_concurrent_copy_imports(self):
+        self.assertImportedOnce("copy")
+
+    def test_concurrent_bulk_imports(self):
+        self.assertImportedOnce("bulk")
@@ -0,0 +1,263 @@
+import hashlib
+import logging
+import os
+import re
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .forms import STATEMENT_EXTENSIONS, check_statement_file
+from .jobs import queue_import_job
+from .models import ChunkedUpload
+
+logger = logging.getLogger(__name__) #create logger specific to this module
+
+
+"""
+This module receives large statement files in parts, so that an upload interrupted by a flaky
+connection can be resumed instead of restarted.
+
+    1. start_upload: the client announces the file name and size, and gets an upload ID.
+    2. append_part: the client sends the file in parts of at most CHUNKED_UPLOAD_PART_SIZE bytes, each
+       with the offset it starts at and its SHA-256. The parts are streamed to a spool file, never held
+       in memory. After a failure, the client asks for the upload's offset (upload_status) and resumes
+       from there.
+    3. complete_upload: the server checks the size and the header of the assembled file, computes its
+       SHA-256, then queues it for import like a regular upload (see jobs.py).
+
+Browsers can only hash a file by loading it whole into memory, which fails for the multi-gigabyte
+files this API is for. So the client checksums each part instead. Since parts are only accepted at
+the upload's offset, verified parts add up to a verified file. Clients that can hash the whole file
+may still announce its SHA-256 when they start the upload. In that case the parts do not need their
+own checksums, and the assembled file must match.
+"""
+
+# Size of the pieces read from a part's request body and from the spool file
+READ_SIZE = 64 * 1024
+SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+class OffsetMismatch(ValueError):
+    """
+    Raised when a part does not start where the upload stands, e.g. after a retried request.
+    """
+
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+def upload_status(upload):
+    """
+    Returns the state of an upload, which tells a client where to resume.
+
+    Args:
+        upload (ChunkedUpload): The upload.
+
+    Returns:
+        dict: The upload's id, file name, size, checksum, offset, status, part size and import job ID.
+    """
+    return {
+        "id": str(upload.pk),
+        "file_name": upload.file_name,
+        "size": upload.size,
+        "checksum": upload.checksum,
+        "offset": upload.offset,
+        "status": upload.status,
+        "part_size": settings.CHUNKED_UPLOAD_PART_SIZE,
+        "job_id": upload.job_id,
+    }
+
+
+def start_upload(user, file_name, size, checksum=None):
+    """
+    Starts a chunked upload.
+
+    Args:
+        user (User): The user uploading the file.
+        file_name (str): The name of the file.
+        size (int): The size of the file, in bytes.
+        checksum (str, optional): The SHA-256 of the file, as 64 hexadecimal digits. Without it, every
+            part must carry its own checksum.
+
+    Returns:
+        ChunkedUpload: The new upload.
+
+    Raises:
+        ValueError: If the file type, size or checksum is not valid.
+    """
+    file_name = os.path.basename(str(file_name or ""))
+    if os.path.splitext(file_name)[1].lower() not in STATEMENT_EXTENSIONS:
+        raise ValueError("Only CSV, OFX, QFX, QIF and ZIP files are allowed.")
+    if not isinstance(size, int) or size <= 0:
+        raise ValueError("The file size must be a positive number of bytes.")
+    if size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise ValueError(
+            f"The file is too large. Maximum size allowed is {settings.CHUNKED_UPLOAD_MAX_SIZE // (1024 * 1024)} MB."
+        )
+    checksum = str(checksum or "").lower()
+    if checksum and not SHA256_HEX.match(checksum):
+        raise ValueError("The checksum must be the SHA-256 of the file, in hexadecimal.")
+
+    spool_dir = Path(settings.IMPORT_SPOOL_DIR)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    path = spool_dir / f"{uuid.uuid4().hex}.part"
+    path.touch()
+    return ChunkedUpload.objects.create(
+        user=user, file_name=file_name, file_path=str(path), size=size, checksum=checksum
+    )
+
+
+def append_part(upload, offset, stream, length, part_checksum=None):
+    """
+    Appends a part to an upload, streaming it from the request body to the spool file.
+
+    Parts are applied one at a time: the upload row is locked, and a part is only accepted if it starts
+    at the upload's offset. Anything left in the spool file past that offset by an interrupted request is
+    overwritten.
+
+    Args:
+        upload (ChunkedUpload): The upload.
+        offset (int): The position of the part in the file.
+        stream (file-like): The part's bytes, such as the request.
+        length (int): The size of the part, in bytes.
+        part_checksum (str, optional): The SHA-256 of the part, checked before it is accepted. Required
+            unless the client announced the checksum of the whole file.
+
+    Returns:
+        int: The upload's new offset.
+
+    Raises:
+        OffsetMismatch: If the part does not start at the upload's offset.
+        ValueError: If the upload is finished, or the part is too large, incomplete or corrupted.
+    """
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status != "uploading":
+            raise ValueError(f"The upload is {upload.status}.")
+        if offset != upload.offset:
+            raise OffsetMismatch(f"The part must start at byte {upload.offset}.", upload.offset)
+        if length <= 0 or length > settings.CHUNKED_UPLOAD_PART_SIZE:
+            raise ValueError(
+                f"A part must contain between 1 and {settings.CHUNKED_UPLOAD_PART_SIZE} bytes."
+            )
+        if offset + length > upload.size:
+            raise ValueError("The part goes past the end of the file.")
+        if not part_checksum and not upload.checksum:
+            raise ValueError("The part's SHA-256 is required.")
+
+        digest = hashlib.sha256()
+        received = 0
+        with open(upload.file_path, "r+b") as destination:
+            destination.seek(offset)
+            destination.truncate()
+            while received < length:
+                data = stream.read(min(READ_SIZE, length - received))
+                if not data:
+                    break
+                destination.write(data)
+                digest.update(data)
+                received += len(data)
+            if received != length or (part_checksum and digest.hexdigest() != part_checksum.lower()):
+                # Drop the part, the client will send it again
+                destination.truncate(offset)
+                raise ValueError(
+                    "The part is incomplete." if received != length else "The part's checksum does not match."
+                )
+
+        upload.offset = offset + length
+        upload.save(update_fields=["offset", "updated_at"])
+        return upload.offset
+
+
+def _file_checksum(path):
+    """
+    Returns the SHA-256 of a file, read in pieces.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for data in iter(lambda: file.read(READ_SIZE), b""):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def complete_upload(upload):
+    """
+    Verifies an upload whose parts have all been received and queues it for import.
+
+    The SHA-256 of the assembled file is stored on the upload. It must match the checksum announced
+    by the client, if any. Completing an upload twice returns the same job, so a client can safely retry.
+
+    Args:
+        upload (ChunkedUpload): The upload.
+
+    Returns:
+        ImportJob: The import job of the file.
+
+    Raises:
+        ValueError: If parts are missing, or the file's checksum or header is not valid. The upload
+            fails (and its file is removed) in the last two cases.
+    """
+    error = None
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status == "completed":
+            return upload.job
+        if upload.status != "uploading":
+            raise ValueError(f"The upload is {upload.status}.")
+        if not upload.is_complete:
+            raise ValueError(f"Only {upload.offset} of {upload.size} bytes have been received.")
+
+        checksum = _file_checksum(upload.file_path)
+        if upload.checksum and checksum != upload.checksum:
+            error = "The file's checksum does not match, please upload it again."
+        else:
+            try:
+                with open(upload.file_path, "rb") as file:
+                    check_statement_file(file, upload.file_name)
+            except ValidationError as e:
+                error = " ".join(e.messages)
+
+        if error:
+            upload.status = "failed"
+            upload.save(update_fields=["status", "updated_at"])
+        else:
+            upload.job = queue_import_job(upload.user, upload.file_name, upload.file_path)
+            upload.checksum = checksum
+            upload.status = "completed"
+            upload.save(update_fields=["job", "checksum", "status", "updated_at"])
+
+    if error:
+        if os.path.exists(upload.file_path):
+            os.remove(upload.file_path)
+        raise ValueError(error)
+    logger.info("Chunked upload %s of %s bytes queued as import job %s", upload.pk, upload.size, upload.job_id)
+    return upload.job
+
+
+def purge_stale_uploads(hours=None):
+    """
+    Removes the uploads that were abandoned or failed, and their spool files.
+
+    Args:
+        hours (int, optional): How long an upload may go without receiving a part. Defaults to
+            CHUNKED_UPLOAD_EXPIRY_HOURS.
+
+    Returns:
+        int: The number of uploads removed.
+    """
+    hours = settings.CHUNKED_UPLOAD_EXPIRY_HOURS if hours is None else hours
+    stale = ChunkedUpload.objects.filter(
+        status__in=["uploading", "failed"], updated_at__lt=timezone.now() - timedelta(hours=hours)
+    )
+    removed = 0
+    for upload in stale:
+        if os.path.exists(upload.file_path):
+            os.remove(upload.file_path)
+        upload.delete()
+        removed += 1
+    return removed
@@ -5,6 +5,8 @@ from django.contrib.auth import views as auth_views
 urlpatterns = [
     path('', views.landing, name='landing'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('api/dashboard-cache-stats/', views.dashboard_cache_stats, name='dashboard_cache_stats'),
+    path('api/chart-data/', views.chart_data_api, name='chart_data_api'),
     path('login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='landing'), name='logout'),
     path('register/', views.register, name='register'),
@@ -13,7 +15,15 @@ urlpatterns = [
     path('update_transaction/<int:transaction_id>/', views.update_transaction, name='update_transaction'),
     path('delete-transactions/', views.delete_transactions, name='delete_transactions'),
     path('upload_transactions/', views.upload_transactions, name='upload_transactions'),
+    path('upload_transactions/jobs/<int:job_id>/', views.import_job_detail, name='import_job_detail'),
+    path('api/import-jobs/<int:job_id>/', views.import_job_progress, name='import_job_progress'),
+    path('api/uploads/', views.start_chunked_upload, name='start_chunked_upload'),
+    path('api/uploads/<uuid:upload_id>/', views.chunked_upload, name='chunked_upload'),
+    path('api/uploads/<uuid:upload_id>/complete/', views.complete_chunked_upload, name='complete_chunked_upload'),
     path('manage_bank_accounts/', views.manage_bank_accounts, name='manage_bank_accounts'),
+    path('api/accounts/<int:account_id>/balance/', views.account_balance_as_of, name='account_balance_as_of'),
+    path('api/accounts/balance-series/', views.account_balance_series_api, name='account_balance_series_api'),
+    path('api/autocomplete/', views.autocomplete_api, name='autocomplete_api'),
     path('manage_categories/', views.manage_categories, name='manage_categories'),
     path("query-transactions/", views.query_transactions, name="query_transactions"),
     path('password_reset/', auth_views.PasswordResetView.as_view(), name='password_reset'),
@@ -21,11 +31,14 @@ urlpatterns = [
     path('update-subscription/<int:subscription_id>/', views.update_subscription, name='update_subscription'),
     path('update-theme-preference/', views.update_theme_preference, name='update_theme_preference'),
     path('transactions/calendar/', views.transaction_calendar, name='transaction_calendar'),
+    path('api/transactions/calendar-feed/', views.transaction_calendar_feed, name='transaction_calendar_feed'),
     path('transactions/timeline/', views.transaction_timeline, name='transaction_timeline'),
+    path('api/transactions/timeline/', views.transaction_timeline_feed, name='transaction_timeline_feed'),
     path('notifications/', views.notification_settings, name='notification_settings'),
     path('delete-custom-notification/<int:notification_id>/', views.delete_custom_notification, name='delete_custom_notification'),
     path('manage-budgets/', views.manage_budgets, name='manage_budgets'),
     path('transactions/spreadsheet/', views.spreadsheet_transactions, name='spreadsheet_transactions'),
     path('transactions/spreadsheet/save/', views.save_spreadsheet_transactions, name='save_spreadsheet_transactions'),
+    path('api/transactions/spreadsheet-rows/', views.spreadsheet_rows, name='spreadsheet_rows'),
 
 ]
\ No newline at end of file
@@ -8,7 +8,8 @@ logger = logging.getLogger(__name__) #create logger specific to this module
 """
 This module contains validation logic for transaction data in the personal finance tracker application.
 The `validate_transaction_data` function ensures that all transaction fields meet the required constraints
-and business rules before being processed or saved to the database.
+and business rules before being processed or saved to the database, and `validate_transaction_columns`
+applies the same rules to a whole batch of rows at once.
 """
 def validate_transaction_data(data):
     """
@@ -81,5 +82,125 @@ def validate_transaction_data(data):
         logger.error(f"Error validating transaction data: {e}", exc_info=True)
 
 
+# Columns checked by validate_transaction_columns, in the order their messages are reported
+VALIDATED_COLUMNS = ('date', 'transaction_type', 'amount', 'description')
 
 
+def parse_iso_date(value):
+    """
+    Parses a 'YYYY-MM-DD' date string.
+
+    Well-formed strings are converted with a slicing fast path, anything else goes through strptime,
+    so the accepted inputs and the ValueError raised for invalid ones are the same as
+    datetime.strptime(value, "%Y-%m-%d").
+
+    Args:
+        value (str): The date string.
+
+    Returns:
+        datetime.date: The parsed date.
+
+    Raises:
+        ValueError: If the string is not a valid date in the format 'YYYY-MM-DD'.
+    """
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        digits = value[:4] + value[5:7] + value[8:]
+        if digits.isascii() and digits.isdigit():
+            return date(int(value[:4]), int(value[5:7]), int(value[8:]))
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def rows_to_columns(rows):
+    """
+    Converts transaction data dictionaries into the column-oriented layout of validate_transaction_columns.
+
+    Args:
+        rows (list): Transaction data dictionaries, as accepted by validate_transaction_data.
+
+    Returns:
+        dict: Maps each of VALIDATED_COLUMNS to the list of its values, one per row.
+    """
+    return {column: [row.get(column) for row in rows] for column in VALIDATED_COLUMNS}
+
+
+def validate_transaction_columns(columns):
+    """
+    Validates a batch of transactions stored column by column.
+
+    This is the batch counterpart of validate_transaction_data, for imports and spreadsheet saves that
+    validate thousands of rows at once: the date bounds are computed once per batch instead of once per
+    row, dates are parsed with parse_iso_date, and each column is checked in a single pass. The messages
+    and their order are exactly the ones validate_transaction_data would raise for each row.
+
+    Args:
+        columns (dict): Maps date, transaction_type, amount and description to equally long lists of
+            values (see rows_to_columns). A missing column counts as empty for every row.
+
+    Returns:
+        list: One list of error messages per row, empty when the row is valid.
+    """
+    row_count = max((len(values) for values in columns.values()), default=0)
+    errors = [[] for _ in range(row_count)]
+    # Rows on which an unexpected error occurred; like validate_transaction_data, they are logged and not reported
+    failed = set()
+
+    def column(name):
+        return columns.get(name) or [None] * row_count
+
+    today = date.today()
+    latest = today + timedelta(days=365 * 10)
+    earliest = today - timedelta(days=365 * 10)
+
+    # Validate and convert dates
+    for i, transaction_date in enumerate(column('date')):
+        if not transaction_date:
+            errors[i].append("Transaction date is required.")
+            continue
+        try:
+            if isinstance(transaction_date, str):
+                transaction_date = parse_iso_date(transaction_date)
+            if transaction_date > latest or transaction_date < earliest:
+                errors[i].append("Transaction date must be within 10 years from today.")
+        except ValueError:
+            errors[i].append("Transaction date must be in the format 'YYYY-MM-DD'.")
+        except Exception as e:
+            logger.error(f"Error validating transaction data: {e}", exc_info=True)
+            failed.add(i)
+
+    # Validate transaction types
+    for i, transaction_type in enumerate(column('transaction_type')):
+        if not transaction_type:
+            errors[i].append("Transaction type is required.")
+        elif str(transaction_type).lower() not in ('income', 'expense'):
+            errors[i].append("Transaction type must be either 'income' or 'expense'.")
+
+    # Validate and convert amounts
+    for i, amount in enumerate(column('amount')):
+        if not amount:
+            errors[i].append("Transaction amount is required.")
+            continue
+        try:
+            amount = float(amount)
+            if amount > 1_000_000 or amount < -1_000_000:
+                errors[i].append("Amount must be a number between -1,000,000 and 1,000,000.")
+        except ValueError:
+            errors[i].append("Amount must be a valid number with at most two decimal places.")
+        except Exception as e:
+            logger.error(f"Error validating transaction data: {e}", exc_info=True)
+            failed.add(i)
+
+    # Validate descriptions
+    for i, description in enumerate(column('description')):
+        if not description:
+            errors[i].append("Description is required.")
+            continue
+        try:
+            if len(description) > 255:
+                errors[i].append("Description cannot be longer than 255 characters.")
+        except Exception as e:
+            logger.error(f"Error validating transaction data: {e}", exc_info=True)
+            failed.add(i)
+
+    for i in failed:
+        errors[i] = []
+    return errors
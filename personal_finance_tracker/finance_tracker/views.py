@@ -1,18 +1,28 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
-from .models import Transaction, Account, Category, Subscription, Budget, CustomNotification
+from django.views.decorators.http import require_http_methods, require_POST
+from .models import Transaction, Account, Category, Subscription, Budget, CustomNotification, DailyTransactionSummary, ImportJob, ChunkedUpload
+from .aggregation import (
+    GRANULARITIES, bucket_series, build_chart_data, choose_granularity, downsample_series, summarize_daily_rollups,
+)
+from .budgets import evaluate_budgets
+from .caching import get_balance_series, get_cache_stats, get_dashboard_context
+from .deletions import bulk_delete_transactions, purge_user
+from .jobs import create_import_job, get_job_progress
+from .search import autocomplete, search_transactions, similar_transactions
+from .snapshots import balance_as_of, balance_series
+from .spreadsheet import SPREADSHEET_BLOCK_SIZE, account_label, spreadsheet_window, sync_spreadsheet_changes
+from .uploads import OffsetMismatch, append_part, complete_upload, start_upload, upload_status
 from .forms import TransactionForm, CSVUploadForm, BankAccountForm, CategoryForm, UserCreationForm, TransactionQueryForm, AccountManagementForm, SubscriptionForm, BudgetForm, CustomNotificationForm
 from django.contrib.auth import login, update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib import messages
 from datetime import date, timedelta
-from collections import defaultdict
-from django.db.models import Sum, Q
-from django.db.models.functions import TruncMonth
-from decimal import Decimal
+from django.db.models import Min, Q
 from django.utils import timezone
 from django.http import JsonResponse
+from django.urls import reverse
+from django.conf import settings
 from django.core.paginator import Paginator
 import json
 
@@ -31,129 +41,40 @@ def landing(request):
     return render(request, 'finance_tracker/landing.html')
 
 
-@login_required
-def dashboard(request):
+def _build_dashboard_context(user, today):
     """
-    Renders the dashboard page for the logged-in user.
-
-    - Displays a list of all transactions for the user, ordered by date.
-    - Aggregates income and expenses by date to prepare data for the transactions graph.
-    - Passes the transactions and chart data to the template for rendering.
+    Computes the parts of the dashboard context that only change when the user's data changes.
 
     Args:
-        request (HttpRequest): The HTTP request object.
+        user (User): The user whose dashboard is being rendered.
+        today (date): The current date.
 
     Returns:
-        HttpResponse: The rendered dashboard page with the user's transactions and chart data.
+        dict: The chart data, budget progress, accounts, upcoming subscriptions and custom notification rules.
     """
-
-    #Shows all income and all expenses on the same day for each day
-    transactions = Transaction.objects.filter(user=request.user).order_by('date')
-    accounts = list(Account.objects.filter(user=request.user).values(
+    accounts = list(Account.objects.filter(user=user).values(
         'account_number', 'account_type', 'balance'
     ))
-    categories = Category.objects.filter(user=request.user)
 
-    
-    #Total income and expenses for the logged-in user
-    total_income = transactions.filter(transaction_type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-    total_expenses = transactions.filter(transaction_type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-
-    #Monthly aggregation
-    monthly_data = Transaction.objects.filter(user=request.user).annotate(
-        month=TruncMonth('date')
-    ).values('month').annotate(
-        income=Sum('amount', filter=Q(transaction_type='income')),
-        expenses=Sum('amount', filter=Q(transaction_type='expense'))
-    ).order_by('month')
-
-    # Calculate the total income and expenses for each month
-    months = []
-    monthly_income = []
-    monthly_expenses = []
-    for entry in monthly_data:
-        months.append(entry['month'].strftime("%b %Y"))
-        monthly_income.append(float(entry['income'] or 0))
-        monthly_expenses.append(float(entry['expenses'] or 0))
-
-    # Use a dictionary to aggregate income and expenses by date
-    aggregated_data = defaultdict(lambda: {"income": 0, "expenses": 0})
-    for transaction in transactions:
-        date_str = transaction.date.strftime('%Y-%m-%d')
-        if transaction.transaction_type == 'income':
-            aggregated_data[date_str]["income"] += float(transaction.amount)
-        elif transaction.transaction_type == 'expense':
-            aggregated_data[date_str]["expenses"] += float(transaction.amount)
-
-    # Sort the dates and prepare the chart data
-    sorted_dates = sorted(aggregated_data.keys())
-    chart_data = {
-        "dates": sorted_dates,
-        "income": [aggregated_data[date]["income"] for date in sorted_dates],
-        "expenses": [aggregated_data[date]["expenses"] for date in sorted_dates],
-        "total_income": float(total_income),
-        "total_expenses": float(total_expenses),
-        "months": months,
-        "monthly_income": monthly_income,
-        "monthly_expenses": monthly_expenses,
-    }
+    # Totals and monthly series, read from the daily rollup. The per-day series is fetched by the page
+    # from chart_data_api after first paint instead of being inlined.
+    chart_data = build_chart_data(summarize_daily_rollups(user), include_daily=False)
 
-    today = timezone.now().date()
-    
     # Get upcoming subscriptions (due in the next 30 days)
-    upcoming_subscriptions = Subscription.objects.filter(
-        user=request.user,
+    upcoming_subscriptions = list(Subscription.objects.filter(
+        user=user,
         is_active=True,
         next_payment_date__gte=today,
         next_payment_date__lte=today + timedelta(days=30)
-    ).order_by('next_payment_date')[:3]  # Limit to 3 most upcoming
+    ).order_by('next_payment_date')[:3])  # Limit to 3 most upcoming
     
     # Calculate days until due for each subscription
     for subscription in upcoming_subscriptions:
         delta = subscription.next_payment_date - today
         subscription.days_until = delta.days
 
-    # Filtering logic
-    tx_type = request.GET.get("type")
-    if tx_type in ("income", "expense"):
-        transactions = transactions.filter(transaction_type=tx_type)
-    category_id = request.GET.get("category")
-    if category_id:
-        transactions = transactions.filter(category_id=category_id)
-    start = request.GET.get("start")
-    if start:
-        transactions = transactions.filter(date__gte=start)
-    end = request.GET.get("end")
-    if end:
-        transactions = transactions.filter(date__lte=end)
-
-    budgets = Budget.objects.filter(user=request.user)
-    first_of_month = today.replace(day=1)
-
-    budget_data = []
-    
-    for budget in budgets:
-        spent = Transaction.objects.filter(
-            user=request.user,
-            category=budget.category,
-            date__gte=first_of_month,  # for monthly budgets
-            date__lte=today,
-            transaction_type='expense'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        progress = float(spent) / float(budget.amount) if budget.amount else 0
-        budget_data.append({
-            'id': budget.category.id,
-            'name': budget.category.name,
-            'budget': float(budget.amount),
-            'spent': float(spent),
-            'progress': progress * 100,
-            'remaining': float(budget.amount) - float(spent),
-        })
-
-    # Pagination
-    paginator = Paginator(transactions, 20)
-    page_number = request.GET.get('page')
-    transactions_page = paginator.get_page(page_number)
+    # Spending for every budget, windowed by each budget's period, in one grouped query
+    budget_data = evaluate_budgets(user, today=today)
 
     # user_custom_notifications = CustomNotification.objects.filter(user=request.user, enabled=True)
     
@@ -168,7 +89,7 @@ def dashboard(request):
     # for notif_data in custom_notifications_data:
     #     if notif_data['notification_datetime']:
     #         notif_data['notification_datetime'] = notif_data['notification_datetime'].isoformat()
-    custom_notifications_data = CustomNotification.objects.filter(user=request.user)
+    custom_notifications_data = CustomNotification.objects.filter(user=user).select_related('category')
     user_custom_notifications_data = []
     for rule in custom_notifications_data:
         user_custom_notifications_data.append({
@@ -183,17 +104,68 @@ def dashboard(request):
             'recurrence_interval': rule.recurrence_interval,
             'enabled': rule.enabled,
         })
+
+    return {
+        'chart_data': chart_data,
+        'accounts': accounts,
+        'upcoming_subscriptions': upcoming_subscriptions,
+        'budget_data': budget_data,
+        'user_custom_notifications': user_custom_notifications_data,
+    }
+
+
+@login_required
+def dashboard(request):
+    """
+    Renders the dashboard page for the logged-in user.
+
+    - Displays a list of all transactions for the user, ordered by date.
+    - Builds the daily and monthly income/expense chart data from the daily rollup table, so the cost
+      grows with the number of days with activity rather than the number of transactions.
+    - Serves the charts, budgets, accounts, subscriptions and notification rules from the per-user cache
+      until the user's data changes.
+    - Passes the transactions and chart data to the template for rendering.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The rendered dashboard page with the user's transactions and chart data.
+    """
+
+    transactions = Transaction.objects.filter(user=request.user).order_by('date')
+    categories = Category.objects.filter(user=request.user)
+
+    today = timezone.now().date()
+    cached_context = get_dashboard_context(
+        request.user, today, lambda: _build_dashboard_context(request.user, today)
+    )
+
+    # Filtering logic
+    tx_type = request.GET.get("type")
+    if tx_type in ("income", "expense"):
+        transactions = transactions.filter(transaction_type=tx_type)
+    category_id = request.GET.get("category")
+    if category_id:
+        transactions = transactions.filter(category_id=category_id)
+    start = request.GET.get("start")
+    if start:
+        transactions = transactions.filter(date__gte=start)
+    end = request.GET.get("end")
+    if end:
+        transactions = transactions.filter(date__lte=end)
+
+    # Pagination
+    paginator = Paginator(transactions, 20)
+    page_number = request.GET.get('page')
+    transactions_page = paginator.get_page(page_number)
     
     # Return the rendered template with ALL context data
     response = render(request, 'finance_tracker/dashboard.html', {
         'transactions': transactions_page,
-        'chart_data': chart_data,   
-        'accounts': accounts,
         'categories': categories,
-        'upcoming_subscriptions': upcoming_subscriptions,
         'today': today,
-        'budget_data': budget_data,
-        'user_custom_notifications': user_custom_notifications_data,
+        **cached_context,
     })
 
     # Clear the notification flag after rendering
@@ -201,6 +173,73 @@ def dashboard(request):
         del request.session['show_large_transaction_notification']
     return response
 
+
+@login_required
+def dashboard_cache_stats(request):
+    """
+    Returns the hit/miss counters of the dashboard cache for monitoring.
+
+    Only available to staff users.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The number of cache hits and misses and the hit rate.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'status': 'error', 'message': 'Forbidden'}, status=403)
+    return JsonResponse(get_cache_stats())
+
+@login_required
+def chart_data_api(request):
+    """
+    Returns the income/expense series of the logged-in user for the transactions graph.
+
+    - Reads the series from the daily rollup table, optionally limited to a date range.
+    - Buckets it by day, week or month ('auto' picks a granularity from the length of the range).
+    - Downsamples series that are still longer than max_points with LTTB.
+
+    Query parameters:
+        start (str, optional): The first day to include, as YYYY-MM-DD.
+        end (str, optional): The last day to include, as YYYY-MM-DD.
+        granularity (str, optional): 'day', 'week', 'month' or 'auto' (default).
+        max_points (int, optional): The maximum number of points to return (default 365, at most 2000).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The series dates, income and expenses, the granularity used and whether the
+        series was downsampled.
+    """
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+        max_points = min(max(int(request.GET.get('max_points', 365)), 3), 2000)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid start, end or max_points.'}, status=400)
+
+    granularity = request.GET.get('granularity', 'auto')
+    if granularity != 'auto' and granularity not in GRANULARITIES:
+        return JsonResponse({'status': 'error', 'message': 'Invalid granularity.'}, status=400)
+
+    daily = summarize_daily_rollups(request.user, start=start, end=end)['daily']
+    if granularity == 'auto':
+        granularity = choose_granularity(start or daily[0][0], end or daily[-1][0]) if daily else 'day'
+
+    series = bucket_series(daily, granularity)
+    points = downsample_series(series, max_points)
+
+    return JsonResponse({
+        'granularity': granularity,
+        'downsampled': len(points) < len(series),
+        'dates': [day.strftime('%Y-%m-%d') for day, _, _ in points],
+        'income': [float(income) for _, income, _ in points],
+        'expenses': [float(expenses) for _, _, expenses in points],
+    })
+
+
 @login_required
 def add_transaction(request):
     """
@@ -336,10 +375,9 @@ def delete_transactions(request):
         if 'confirm' in request.POST: #confirm is hidden submission in the delete_transactions form
             # User has confirmed deletion
             transactions = Transaction.objects.filter(id__in=transaction_ids, user=request.user)
-            count = transactions.count()
+            count = bulk_delete_transactions(transactions)
             
             if count > 0:
-                transactions.delete()
                 messages.success(request, f"{count} transaction(s) deleted successfully!")
             else:
                 messages.error(request, "No valid transactions found to delete.")
@@ -350,42 +388,171 @@ def delete_transactions(request):
 @login_required
 def upload_transactions(request):
     """
-    Handles the upload of transactions via a CSV file for the logged-in user.
+    Handles the upload of transactions via a statement file (CSV, OFX/QFX or QIF) for the logged-in user.
 
-    - If the request method is POST, processes the uploaded CSV file, validates each row, and saves the transactions if
-       they are all valid.
-    - Displays error messages for invalid rows or issues with the file.
+    - If the request method is POST, checks the uploaded file and queues it as a background import job,
+       returning immediately. The rows are validated and saved by the job, if they are all valid.
+    - Displays error messages for issues with the file.
 
     Args:
         request (HttpRequest): The HTTP request object.
 
     Returns:
         HttpResponse: The rendered upload transactions page with the form.
-        HttpResponseRedirect: Redirects to the dashboard after processing the file.
+        HttpResponseRedirect: Redirects to the import job's results page after queueing the file.
+        JsonResponse: The job id and its progress URL, when the client asks for JSON.
     """
     if request.method == "POST":
         form = CSVUploadForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
-            # Create transactions from validated rows
-            count = 0
-            for row in form.validated_rows:
-                row['amount'] = Decimal(row['amount'])  # Ensure amount is a Decimal
-                Transaction.objects.create(
-                    user=request.user,
-                    **row #unpack the dictionary into the model fields
-                )
-                count += 1
-
-            messages.success(request, f"{count} transactions uploaded successfully!") if count > 1 else messages.success(request, "Transaction uploaded successfully!")
-            return redirect("dashboard")
+            job = create_import_job(request.user, form.cleaned_data["file"])
+            if "application/json" in request.headers.get("Accept", ""):
+                return _job_response(job)
+            messages.info(request, f"{job.file_name} is being imported.")
+            return redirect("import_job_detail", job_id=job.pk)
         else:
-            messages.error(request, "Errors present in CSV. Please review the issues below:")
+            messages.error(request, "Errors present in the uploaded file. Please review the issues below:")
             for error in form.errors.get("__all__", []):
                 messages.error(request, error)
     else:
         form = CSVUploadForm(user=request.user)
 
-    return render(request, "finance_tracker/upload_transactions.html", {"form": form})
+    return render(request, "finance_tracker/upload_transactions.html", {
+        "form": form,
+        # Files above the single upload limit are sent in parts through the resumable upload API
+        "max_upload_size": settings.STATEMENT_UPLOAD_MAX_SIZE,
+        "max_chunked_upload_size": settings.CHUNKED_UPLOAD_MAX_SIZE,
+    })
+
+
+@login_required
+def import_job_detail(request, job_id):
+    """
+    Renders the results page of an import job, which polls the job's progress until it finishes.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        job_id (int): The ID of the import job.
+
+    Returns:
+        HttpResponse: The rendered import results page.
+    """
+    job = get_object_or_404(ImportJob, pk=job_id, user=request.user)
+    return render(request, "finance_tracker/import_job.html", {
+        "job": job,
+        "progress": get_job_progress(job),
+    })
+
+
+@login_required
+def import_job_progress(request, job_id):
+    """
+    Returns the status and progress of an import job: rows parsed, rows inserted and errors so far.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        job_id (int): The ID of the import job.
+
+    Returns:
+        JsonResponse: The job's progress.
+    """
+    job = get_object_or_404(ImportJob, pk=job_id, user=request.user)
+    return JsonResponse(get_job_progress(job))
+
+
+def _job_response(job):
+    """
+    Returns the 202 response of a queued import job, with the URLs to follow its progress.
+    """
+    return JsonResponse({
+        'status': 'success',
+        'job_id': job.pk,
+        'progress_url': reverse('import_job_progress', args=[job.pk]),
+        'results_url': reverse('import_job_detail', args=[job.pk]),
+    }, status=202)
+
+
+@login_required
+@require_POST
+def start_chunked_upload(request):
+    """
+    Starts a resumable upload of a large statement file, sent in parts (see uploads.py).
+
+    Args:
+        request (HttpRequest): The HTTP request object, with a JSON body of the form
+            {"file_name": ..., "size": ..., "checksum": <optional SHA-256 of the file>}.
+
+    Returns:
+        JsonResponse: The state of the new upload (201), or an error message (400).
+    """
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError("Invalid JSON data.")
+        upload = start_upload(request.user, data.get('file_name'), data.get('size'), data.get('checksum'))
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON data.'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse(upload_status(upload), status=201)
+
+
+@login_required
+@require_http_methods(["GET", "PUT"])
+def chunked_upload(request, upload_id):
+    """
+    Returns the state of a resumable upload (GET), or appends a part to it (PUT).
+
+    - A part is the raw request body. Its position in the file is given by the Upload-Offset header,
+      and its X-Part-SHA256 header is checked before the part is accepted. The header is optional only
+      if the upload was started with the checksum of the whole file.
+    - After a failure, GET tells the client the offset to resume from.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        upload_id (UUID): The ID of the upload.
+
+    Returns:
+        JsonResponse: The upload's state, an error message (400), or the expected offset when the
+        part does not start where the upload stands (409).
+    """
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    if request.method == "GET":
+        return JsonResponse(upload_status(upload))
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.headers.get('Content-Length') or 0)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid Upload-Offset or Content-Length header.'}, status=400)
+    try:
+        offset = append_part(upload, offset, request, length, request.headers.get('X-Part-SHA256'))
+    except OffsetMismatch as e:
+        return JsonResponse({'status': 'error', 'message': str(e), 'offset': e.offset}, status=409)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({'status': 'success', 'offset': offset})
+
+
+@login_required
+@require_POST
+def complete_chunked_upload(request, upload_id):
+    """
+    Verifies a fully received upload and queues the file for import.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        upload_id (UUID): The ID of the upload.
+
+    Returns:
+        JsonResponse: The import job and its progress URLs (202), or an error message (400).
+    """
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    try:
+        job = complete_upload(upload)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return _job_response(job)
     
 
 @login_required
@@ -496,14 +663,18 @@ def query_transactions(request):
     """
     form = TransactionQueryForm(request.GET or None)
     transactions = Transaction.objects.filter(user=request.user)
+    ordering = ['-date', '-id']
 
     if form.is_valid():
         # Keyword Search
         keyword = form.cleaned_data.get("keyword")
         if keyword:
-            transactions = transactions.filter(
-                Q(description__icontains=keyword) | Q(category__name__icontains=keyword)
-            )
+            if form.cleaned_data.get("search_mode") == "similar":
+                transactions = similar_transactions(transactions, keyword)
+            else:
+                transactions = search_transactions(transactions, keyword)
+            # Best matches first
+            ordering.insert(0, '-rank')
 
         # Date Range
         date_range = form.cleaned_data.get("date_range")
@@ -541,7 +712,7 @@ def query_transactions(request):
         
 
     # Pagination
-    transactions = transactions.order_by('-date', '-id')
+    transactions = transactions.order_by(*ordering)
 
     paginator = Paginator(transactions, 20)
     page_number = request.GET.get('page')
@@ -552,6 +723,120 @@ def query_transactions(request):
     })
 
 
+@login_required
+def autocomplete_api(request):
+    """
+    Suggests transaction descriptions and category names that start with the text being typed.
+
+    Query parameters:
+        q (str): The text typed so far.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The most used matching descriptions and the matching category names.
+    """
+    return JsonResponse(autocomplete(request.user, request.GET.get('q', '')[:255]))
+
+
+@login_required
+def account_balance_as_of(request, account_id):
+    """
+    Returns the balance of one of the logged-in user's accounts at the end of a day.
+
+    Query parameters:
+        date (str, optional): The day, as YYYY-MM-DD. Defaults to today.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        account_id (int): The ID of the account.
+
+    Returns:
+        JsonResponse: The account ID, the day and the balance, or an error message (400).
+    """
+    account = get_object_or_404(Account, id=account_id, user=request.user)
+    try:
+        day = date.fromisoformat(request.GET['date']) if request.GET.get('date') else timezone.localdate()
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid date.'}, status=400)
+
+    return JsonResponse({
+        'account_id': account.pk,
+        'date': day.strftime('%Y-%m-%d'),
+        'balance': float(balance_as_of(account, day)),
+    })
+
+
+@login_required
+def account_balance_series_api(request):
+    """
+    Returns the balance over time of the logged-in user's accounts, for the chart of the bank accounts page.
+
+    - Computes the running balance of every account in the database (see snapshots.balance_series),
+      bucketed by day, week or month ('auto' picks a granularity from the length of the range).
+    - Serves the series of each account from the cache until one of its transactions changes.
+    - Aligns the accounts on the same dates, carrying each balance forward over the buckets in which
+      the account has no transactions.
+
+    Query parameters:
+        account (int, optional): Only return the series of this account.
+        start (str, optional): The first day to include, as YYYY-MM-DD.
+        end (str, optional): The last day to include, as YYYY-MM-DD.
+        granularity (str, optional): 'day', 'week', 'month' or 'auto' (default).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The granularity used, the bucket dates and the balances of every account at the
+        end of each bucket, or an error message (400).
+    """
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+        account_id = int(request.GET['account']) if request.GET.get('account') else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid start, end or account.'}, status=400)
+
+    granularity = request.GET.get('granularity', 'auto')
+    if granularity != 'auto' and granularity not in GRANULARITIES:
+        return JsonResponse({'status': 'error', 'message': 'Invalid granularity.'}, status=400)
+
+    accounts = Account.objects.filter(user=request.user).order_by('account_number')
+    if account_id is not None:
+        accounts = accounts.filter(id=account_id)
+    accounts = list(accounts)
+
+    if granularity == 'auto':
+        first_day = start or Transaction.objects.filter(account__in=accounts).aggregate(first=Min('date'))['first']
+        granularity = choose_granularity(first_day, end or timezone.localdate()) if first_day else 'day'
+
+    series = get_balance_series(
+        accounts, granularity, start, end, lambda missing: balance_series(missing, granularity, start, end)
+    )
+
+    dates = sorted({day for account_series in series.values() for day, _ in account_series['points']})
+    datasets = []
+    for account in accounts:
+        balances = []
+        points = iter(series[account.pk]['points'])
+        point = next(points, None)
+        balance = series[account.pk]['start_balance']
+        for day in dates:
+            if point and point[0] == day:
+                balance = point[1]
+                point = next(points, None)
+            balances.append(float(balance))
+        datasets.append({'id': account.pk, 'label': account_label(account), 'balances': balances})
+
+    return JsonResponse({
+        'granularity': granularity,
+        'dates': [day.strftime('%Y-%m-%d') for day in dates],
+        'accounts': datasets,
+    })
+
+
 @login_required
 def manage_account(request):
     """
@@ -594,7 +879,7 @@ def manage_account(request):
             else:
                 messages.error(request, "Error changing password. Please try again.")
         elif "delete_account" in request.POST:
-            user.delete()
+            purge_user(user)
             messages.success(request, "Your account and all associated data have been deleted.")
             return redirect("landing")
     else:
@@ -707,8 +992,8 @@ def transaction_calendar(request):
     """
     Renders a calendar view of transactions for the logged-in user.
     
-    - Prepares transaction data for display in a calendar format
-    - Passes the data as JSON for the JavaScript calendar library
+    - The calendar loads the transactions of the visible range from transaction_calendar_feed
+      as the user navigates, instead of receiving every transaction with the page
     
     Args:
         request (HttpRequest): The HTTP request object.
@@ -716,26 +1001,92 @@ def transaction_calendar(request):
     Returns:
         HttpResponse: The rendered calendar view page.
     """
-    transactions = Transaction.objects.filter(user=request.user).select_related('account', 'category').order_by('-date')
-    
-    # Prepare transaction data for the calendar
-    transaction_data = []
-    for t in transactions:
-        transaction_data.append({
-            'id': t.id,
-            'date': t.date.strftime('%Y-%m-%d'),
-            'description': t.description or f"{t.get_transaction_type_display()} transaction",
-            'amount': float(t.amount),
-            'transaction_type': t.transaction_type,
-            'category_name': t.category.name if t.category else 'Uncategorized',
-            'account_number': t.account.account_number if t.account else 'N/A',
-            'account_type': t.account.get_account_type_display() if t.account else 'N/A',
-            'account_balance': float(t.account.balance) if t.account else 0.0
+    return render(request, 'finance_tracker/transaction_calendar.html')
+
+
+def _parse_feed_date(value):
+    """
+    Parses a date sent by the calendar, which may be a date or an ISO 8601 datetime with an offset.
+    """
+    return date.fromisoformat(value[:10])
+
+
+@login_required
+def transaction_calendar_feed(request):
+    """
+    Returns the calendar events of the logged-in user for a date range.
+
+    - Scans only the requested range, using the (user, date) index.
+    - In the default mode, returns one event per transaction with only the fields the calendar shows.
+    - In 'daily' mode (used by the year view), returns one event per day and transaction type with the
+      day's total, read from the daily rollup table.
+
+    Query parameters:
+        start (str): The first day of the range (inclusive), as sent by FullCalendar.
+        end (str): The last day of the range (exclusive), as sent by FullCalendar.
+        mode (str, optional): 'transactions' (default) or 'daily'.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: A list of FullCalendar event objects, or an error (400) when start or end is
+        missing or invalid, or the range is empty.
+    """
+    try:
+        start = _parse_feed_date(request.GET['start'])
+        end = _parse_feed_date(request.GET['end'])
+    except (KeyError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'start and end dates are required.'}, status=400)
+    if end <= start:
+        return JsonResponse({'status': 'error', 'message': 'end must be after start.'}, status=400)
+
+    events = []
+    if request.GET.get('mode') == 'daily':
+        summaries = DailyTransactionSummary.objects.filter(
+            user=request.user, date__gte=start, date__lt=end
+        ).values_list('date', 'transaction_type', 'total', 'count')
+        for day, transaction_type, total, count in summaries:
+            events.append({
+                'id': f"{day.isoformat()}-{transaction_type}",
+                'title': f"{count} {transaction_type} - ${float(total):.2f}",
+                'start': day.isoformat(),
+                'allDay': True,
+                'className': 'income-event' if transaction_type == 'income' else 'expense-event',
+                'extendedProps': {'aggregated': True, 'type': transaction_type, 'count': count, 'amount': float(total)},
+            })
+        return JsonResponse(events, safe=False)
+
+    account_types = dict(Account.ACCOUNT_TYPES)
+    transaction_types = dict(Transaction.TRANSACTION_TYPES)
+    rows = Transaction.objects.filter(
+        user=request.user, date__gte=start, date__lt=end
+    ).values_list(
+        'id', 'date', 'description', 'amount', 'transaction_type',
+        'category__name', 'account__account_number', 'account__account_type', 'account__balance',
+    )
+    for (transaction_id, day, description, amount, transaction_type,
+         category_name, account_number, account_type, account_balance) in rows:
+        description = description or f"{transaction_types.get(transaction_type, transaction_type)} transaction"
+        events.append({
+            'id': transaction_id,
+            'title': f"{description} - ${float(amount)}",
+            'start': day.isoformat(),
+            'allDay': True,
+            'className': 'income-event' if transaction_type == 'income' else 'expense-event',
+            'extendedProps': {
+                'transactionId': transaction_id,
+                'description': description,
+                'amount': float(amount),
+                'type': transaction_type,
+                'category': category_name or 'Uncategorized',
+                'account': account_number or 'N/A',
+                'accountType': account_types.get(account_type, 'N/A'),
+                'accountBalance': float(account_balance) if account_balance is not None else 0.0,
+                'date': day.isoformat(),
+            },
         })
-    
-    return render(request, 'finance_tracker/transaction_calendar.html', {
-        'transaction_data': transaction_data
-    })
+    return JsonResponse(events, safe=False)
 
 
 @login_required
@@ -744,6 +1095,7 @@ def transaction_timeline(request):
     Renders a timeline view of transactions for the logged-in user.
     
     - Displays transactions in chronological order in a visual timeline
+    - The cards are loaded page by page from the timeline feed as the user scrolls
     
     Args:
         request (HttpRequest): The HTTP request object.
@@ -751,26 +1103,103 @@ def transaction_timeline(request):
     Returns:
         HttpResponse: The rendered timeline view page.
     """
-    transactions = Transaction.objects.filter(user=request.user).select_related('account', 'category').order_by('-date')
-
-    transaction_data = []
-    for t in transactions:
-        transaction_data.append({
-            'id': t.id,
-            'date': t.date.strftime('%Y-%m-%d'),
-            'description': t.description or f"{t.get_transaction_type_display()} transaction",
-            'amount': float(t.amount),
-            'transaction_type': t.transaction_type,
-            'category_name': t.category.name if t.category else 'Uncategorized',
-            'account_number': t.account.account_number if t.account else 'N/A',
-            'account_type': t.account.get_account_type_display() if t.account else 'N/A',
-            'account_balance': float(t.account.balance) if t.account else 0.0
+    return render(request, 'finance_tracker/transaction_timeline.html')
+
+
+TIMELINE_PAGE_SIZE = 30
+TIMELINE_MAX_PAGE_SIZE = 100
+
+
+def _parse_timeline_cursor(value):
+    """
+    Parses a timeline cursor of the form 'YYYY-MM-DD.id' into a (date, id) pair.
+    """
+    day, _, transaction_id = value.partition('.')
+    return date.fromisoformat(day), int(transaction_id)
+
+
+@login_required
+def transaction_timeline_feed(request):
+    """
+    Returns one page of the logged-in user's transactions for the timeline, newest first.
+
+    - Uses keyset pagination on (date, id): each page continues strictly after the last card of the
+      previous page, so every page costs the same no matter how far back the user has scrolled.
+    - Includes a summary header (income and expenses) for every month the page starts, read from the
+      daily rollup table. The month a page continues from already got its header on an earlier page.
+
+    Query parameters:
+        cursor (str, optional): The next_cursor returned by the previous page.
+        limit (int, optional): The number of transactions per page (default 30, at most 100).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The transactions of the page, the month headers and the cursor of the next page
+        (null on the last page).
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', TIMELINE_PAGE_SIZE)), 1), TIMELINE_MAX_PAGE_SIZE)
+        cursor = request.GET.get('cursor')
+        cursor = _parse_timeline_cursor(cursor) if cursor else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor or limit.'}, status=400)
+
+    transactions = Transaction.objects.filter(user=request.user)
+    if cursor:
+        cursor_date, cursor_id = cursor
+        transactions = transactions.filter(Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id))
+
+    # Fetch one extra row to know whether there is a next page
+    rows = list(transactions.order_by('-date', '-id').values_list(
+        'id', 'date', 'description', 'amount', 'transaction_type',
+        'category__name', 'account__account_number', 'account__account_type', 'account__balance',
+    )[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    account_types = dict(Account.ACCOUNT_TYPES)
+    transaction_types = dict(Transaction.TRANSACTION_TYPES)
+    page = []
+    for (transaction_id, day, description, amount, transaction_type,
+         category_name, account_number, account_type, account_balance) in rows:
+        page.append({
+            'id': transaction_id,
+            'date': day.strftime('%Y-%m-%d'),
+            'month': day.strftime('%Y-%m'),
+            'description': description or f"{transaction_types.get(transaction_type, transaction_type)} transaction",
+            'amount': float(amount),
+            'transaction_type': transaction_type,
+            'category_name': category_name or 'Uncategorized',
+            'account_number': account_number or 'N/A',
+            'account_type': account_types.get(account_type, 'N/A'),
+            'account_balance': float(account_balance) if account_balance is not None else 0.0,
         })
-    
-    return render(request, 'finance_tracker/transaction_timeline.html', {
-        'transactions': transactions,
-        'transaction_data': transaction_data,
-    })
+
+    months = []
+    if rows:
+        # The page is sorted newest first, so it spans from the month of its last row to the month of its first
+        first_month = rows[-1][1].replace(day=1)
+        last_month = rows[0][1].replace(day=1)
+        month_end = (last_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        summary = summarize_daily_rollups(request.user, start=first_month, end=month_end)
+        for month, income, expenses in reversed(summary['monthly']):
+            if cursor and month == cursor[0].replace(day=1):
+                continue
+            months.append({
+                'month': month.strftime('%Y-%m'),
+                'label': month.strftime('%B %Y'),
+                'income': float(income),
+                'expenses': float(expenses),
+            })
+
+    next_cursor = None
+    if has_more:
+        last = page[-1]
+        next_cursor = f"{last['date']}.{last['id']}"
+
+    return JsonResponse({'transactions': page, 'months': months, 'next_cursor': next_cursor})
 
 
 @login_required
@@ -825,7 +1254,27 @@ def delete_custom_notification(request, notification_id):
 
 @login_required
 def manage_budgets(request):
-    budgets = Budget.objects.filter(user=request.user).select_related('category')
+    """
+    Displays a page where users can view, add, or delete their budgets.
+
+    - Handles budget deletion if the request method is POST and includes delete_budget.
+    - Handles budget addition if the request method is POST and includes form data.
+    - Shows the live progress of every budget for its current period.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The rendered manage budgets page.
+    """
+    budgets = list(Budget.objects.filter(user=request.user).select_related('category'))
+
+    # Attach the spending of the current period to each budget for display
+    for budget, evaluation in zip(budgets, evaluate_budgets(request.user, budgets)):
+        budget.spent = evaluation['spent']
+        budget.remaining = evaluation['remaining']
+        budget.progress = evaluation['progress']
+
     if request.method == 'POST':
         if 'delete_budget' in request.POST:
             budget_id = request.POST.get('budget_id')
@@ -849,193 +1298,137 @@ def manage_budgets(request):
 
 @login_required
 def spreadsheet_transactions(request):
+    """
+    Renders the spreadsheet editor.
+
+    The rows themselves are not rendered into the page; the editor loads them in blocks from
+    spreadsheet_rows as it scrolls.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The rendered spreadsheet page.
+    """
     user = request.user
     accounts = Account.objects.filter(user=user)
     categories = Category.objects.filter(user=user)
-    
-    accounts_list_for_json = []
-    for acc in accounts:
-        display_name = str(acc.institution_number) if acc.institution_number else f"Account ending in {acc.account_number[-4:] if acc.account_number and len(acc.account_number) >= 4 else acc.account_number}"
-        accounts_list_for_json.append({
-            'id': acc.id,
-            'name': display_name, 
-            'account_number': acc.account_number 
-        })
-
-    # Fetch existing transactions for the user
-    existing_transactions = Transaction.objects.filter(user=user).select_related('account', 'category').order_by('-date', '-id')
-    
-    initial_data_structure = []
-    for t in existing_transactions:
-        account_name_display = None
-        if t.account:
-            # Find the matching display name from accounts_list_for_json
-            matching_account = next((acc_json for acc_json in accounts_list_for_json if acc_json['id'] == t.account.id), None)
-            if matching_account:
-                account_name_display = matching_account['name']
-            else: # Fallback if account somehow not in the list (should not happen if data is consistent)
-                account_name_display = str(t.account.institution_number) if t.account.institution_number else f"Account ending in {t.account.account_number[-4:] if t.account.account_number and len(t.account.account_number) >=4 else t.account.account_number}"
-
-
-        initial_data_structure.append({
-            'id': t.id, # Crucial for identifying existing transactions
-            'date': t.date.strftime('%Y-%m-%d') if t.date else None,
-            'account_name': account_name_display,
-            'category_name': t.category.name if t.category else None,
-            'description': t.description,
-            'amount': float(t.amount) if t.amount is not None else None,
-            'transaction_type_name': t.get_transaction_type_display() # 'Income' or 'Expense'
-        })
-    
-    # If no existing transactions, you might still want a blank row for new entries.
-    # Handsontable's minSpareRows will handle adding new blank rows anyway.
 
     context = {
-        'accounts_json': accounts_list_for_json,
+        'accounts_json': [{'id': acc.id, 'name': account_label(acc)} for acc in accounts],
         'categories_json': list(categories.values('id', 'name', 'type')), 
         'transaction_types_json': [{'id': 'expense', 'name': 'Expense'}, {'id': 'income', 'name': 'Income'}],
-        'initial_data_json': initial_data_structure,
+        'block_size': SPREADSHEET_BLOCK_SIZE,
     }
     return render(request, 'finance_tracker/spreadsheet_transactions.html', context)
 
+
+@login_required
+def spreadsheet_rows(request):
+    """
+    Returns one block of the spreadsheet's rows.
+
+    Query parameters:
+        offset (int, optional): The index of the first row (default 0).
+        limit (int, optional): The number of rows (default 200, at most 1000).
+        sort (str, optional): date (default), amount, description, account, category or type.
+        order (str, optional): 'desc' (default) or 'asc'.
+        q, account, category, type, start, end (optional): Filters, see spreadsheet.spreadsheet_window.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The block of rows with its account and category labels.
+    """
+    params = request.GET
+    try:
+        filters = {
+            'q': params.get('q', '').strip(),
+            'account': int(params['account']) if params.get('account') else None,
+            'category': params.get('category') if params.get('category') == 'none' else (
+                int(params['category']) if params.get('category') else None),
+            'type': params.get('type') or None,
+            'start': date.fromisoformat(params['start']) if params.get('start') else None,
+            'end': date.fromisoformat(params['end']) if params.get('end') else None,
+        }
+        window = spreadsheet_window(
+            request.user,
+            offset=int(params.get('offset', 0)),
+            limit=int(params.get('limit', SPREADSHEET_BLOCK_SIZE)),
+            sort=params.get('sort', 'date'),
+            order=params.get('order', 'desc'),
+            filters=filters,
+        )
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': f'Invalid parameters: {str(e)}'}, status=400)
+    return JsonResponse(window)
+
+
 @login_required
 @require_POST
 def save_spreadsheet_transactions(request):
+    """
+    Applies the changes made in the spreadsheet editor.
+
+    - The body only contains the inserted, updated and deleted rows. Updated and deleted rows carry
+      the version of the transaction they were loaded with.
+    - The changes are applied in bulk, inside a single database transaction, with one aggregated
+      balance change per affected account.
+    - Nothing is saved if any row is invalid, or if any row is stale because its transaction was
+      changed or deleted in another session; stale rows are returned as a conflict list.
+
+    Args:
+        request (HttpRequest): The HTTP request object, with a JSON body of the form
+            {"inserted": [...], "updated": [...], "deleted": [...]}.
+
+    Returns:
+        JsonResponse: A success message with the created IDs and new versions, an error (400) when the
+        body is not JSON or a list of changes is not a list of row objects, the list of row errors (400),
+        or the list of conflicts (409).
+    """
     try:
         data = json.loads(request.body)
-        transactions_to_create = []
-        transactions_to_update = []
-        updated_transaction_ids = [] 
-        errors = []
-
-        for i, row_data in enumerate(data):
-            # received_ids.add(row_data.get('id'))
-
-            # Basic validation and data cleaning
-            if not row_data or not row_data.get('date') or row_data.get('amount') is None: # Amount can be 0
-                if row_data.get('id') and not (row_data.get('date') or row_data.get('amount') is not None):
-                     
-                    pass
-                elif not row_data.get('id') and not (row_data.get('date') or row_data.get('amount') is not None):
-                    # Truly empty new row, skip
-                    continue
-                else: # Incomplete data for a new or existing row
-                    errors.append(f"Row {i+1}: Missing required fields (date, amount).")
-                    continue
-            
-            transaction_id = row_data.get('id')
-            
-            try:
-                account_id = row_data.get('account_id')
-                category_id = row_data.get('category_id')
-                
-                account = Account.objects.get(id=account_id, user=request.user) if account_id else None
-                category = Category.objects.get(id=category_id, user=request.user) if category_id else None
-                
-                transaction_date = row_data.get('date')
-                description = row_data.get('description', '')
-                amount = Decimal(row_data.get('amount'))
-                transaction_type = row_data.get('transaction_type', 'expense').lower()
-
-                # from .validation import validate_transaction_data
-                # try:
-                #     validate_transaction_data({
-                #         'date': transaction_date, 'transaction_type': transaction_type, 
-                #         'amount': amount, 'description': description, 'category': category
-                #     })
-                # except ValidationError as e_val:
-                #     errors.append(f"Row {i+1}: Validation Error - {', '.join(e_val.messages)}")
-                #     continue
-
-
-                if transaction_id: # Existing transaction, try to update
-                    updated_transaction_ids.append(transaction_id)
-                    try:
-                        t_instance = Transaction.objects.get(id=transaction_id, user=request.user)
-                        
-                        # Check if anything actually changed to avoid unnecessary updates
-                        if (t_instance.date.strftime('%Y-%m-%d') != transaction_date or
-                            t_instance.account_id != account_id or
-                            t_instance.category_id != category_id or
-                            t_instance.description != description or
-                            t_instance.amount != amount or
-                            t_instance.transaction_type != transaction_type):
-                            
-                            # Important: Revert old balance impact before applying new
-                            if t_instance.account:
-                                if t_instance.transaction_type == "income":
-                                    t_instance.account.balance -= t_instance.amount
-                                else: # expense
-                                    t_instance.account.balance += t_instance.amount
-                            
-                            t_instance.date = transaction_date
-                            t_instance.account = account
-                            t_instance.category = category
-                            t_instance.description = description
-                            t_instance.amount = amount
-                            t_instance.transaction_type = transaction_type
-                            transactions_to_update.append(t_instance) 
-                            # Note: t_instance.save() will be called later to handle new balance
-                        
-                    except Transaction.DoesNotExist:
-                        errors.append(f"Row {i+1}: Transaction ID '{transaction_id}' not found for update.")
-                        continue
-                else: # New transaction
-                    transactions_to_create.append(Transaction(
-                        user=request.user, date=transaction_date, account=account, category=category,
-                        description=description, amount=amount, transaction_type=transaction_type
-                    ))
-
-            except Account.DoesNotExist:
-                errors.append(f"Row {i+1}: Account ID '{account_id}' not found or does not belong to you.")
-            except Category.DoesNotExist:
-                errors.append(f"Row {i+1}: Category ID '{category_id}' not found or does not belong to you.")
-            except (ValueError, TypeError) as e:
-                errors.append(f"Row {i+1}: Invalid data - {str(e)} for data: {row_data}")
-            except Exception as e:
-                 errors.append(f"Row {i+1}: An unexpected error occurred processing this row - {str(e)}")
-
-        if errors:
-            return JsonResponse({'status': 'error', 'errors': errors}, status=400)
-
-        # Process creations
-        created_count = 0
-        if transactions_to_create:
-            # For simplicity and to trigger signals/save logic, save individually
-            for t_new in transactions_to_create:
-                t_new.save() # This will also update account balance via model's save()
-                created_count += 1
-            # Alternatively, for bulk with manual balance update:
-            # Transaction.objects.bulk_create(transactions_to_create)
-            # created_count = len(transactions_to_create)
-            # Then manually update balances for these new transactions
-
-        # Process updates
-        updated_count = 0
-        accounts_to_recalculate_balance = set()
-        if transactions_to_update:
-            for t_upd in transactions_to_update:
-                t_upd.save() # This will also update account balance via model's save()
-                updated_count += 1
-                if t_upd.account:
-                    accounts_to_recalculate_balance.add(t_upd.account)
-            # Alternatively, for bulk_update:
-            # Transaction.objects.bulk_update(transactions_to_update, ['date', 'account', 'category', 'description', 'amount', 'transaction_type'])
-            # updated_count = len(transactions_to_update)
-            # Then manually update balances for these updated transactions
+        if not isinstance(data, dict):
+            return JsonResponse({'status': 'error', 'message': 'Invalid JSON data.'}, status=400)
+
+        changes = {key: data.get(key) or [] for key in ('inserted', 'updated', 'deleted')}
+        for key, rows in changes.items():
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                return JsonResponse(
+                    {'status': 'error', 'message': f"'{key}' must be a list of rows."}, status=400
+                )
+
+        result = sync_spreadsheet_changes(request.user, **changes)
+
+        if result['errors']:
+            return JsonResponse({'status': 'error', 'errors': result['errors']}, status=400)
+        if result['conflicts']:
+            return JsonResponse({
+                'status': 'conflict',
+                'message': 'Some rows were changed in another session. Reload the spreadsheet to get the latest data.',
+                'conflicts': result['conflicts'],
+            }, status=409)
 
         message_parts = []
-        if created_count > 0:
-            message_parts.append(f"{created_count} new transaction(s) saved.")
-        if updated_count > 0:
-            message_parts.append(f"{updated_count} transaction(s) updated.")
-        
+        if result['created']:
+            message_parts.append(f"{len(result['created'])} new transaction(s) saved.")
+        if result['versions']:
+            message_parts.append(f"{len(result['versions'])} transaction(s) updated.")
+        if result['deleted']:
+            message_parts.append(f"{result['deleted']} transaction(s) deleted.")
+
         if not message_parts:
             final_message = "No changes detected or no valid transactions to save."
         else:
             final_message = " ".join(message_parts)
 
-        return JsonResponse({'status': 'success', 'message': final_message})
+        return JsonResponse({
+            'status': 'success',
+            'message': final_message,
+            'created': result['created'],
+            'versions': result['versions'],
+        })
 
     except json.JSONDecodeError:
         return JsonResponse({'status': 'error', 'message': 'Invalid JSON data.'}, status=400)
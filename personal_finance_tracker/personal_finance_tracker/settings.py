@@ -96,6 +96,50 @@ DATABASES = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Used for the per-user dashboard cache. The local memory cache is per process, so when running
+# several worker processes switch to a shared backend, e.g. the file based cache:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#         'LOCATION': BASE_DIR / '../cache',
+#     }
+# }
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'personal-finance-tracker',
+    }
+}
+
+# Seconds a computed dashboard may be served before it is rebuilt, even without any writes
+DASHBOARD_CACHE_TIMEOUT = 60 * 10
+
+# Background imports
+# Uploaded statement files are spooled to this directory until a worker imports them
+IMPORT_SPOOL_DIR = BASE_DIR / '../import_spool'
+# When True, imports run in a thread pool inside the web process. Set it to False to leave them to
+# `python3 manage.py process_import_jobs` instead (live progress then needs a shared cache backend).
+IMPORT_JOBS_IN_PROCESS = True
+IMPORT_WORKERS = 2
+# A job still running this many seconds after it started is taken for dead (its worker was restarted or
+# killed) and re-queued by `process_import_jobs`, until it has been started IMPORT_JOB_MAX_ATTEMPTS times.
+# Keep it well above the duration of the largest import.
+IMPORT_JOB_TIMEOUT = 2 * 60 * 60
+IMPORT_JOB_MAX_ATTEMPTS = 2
+# Processes that parse the files of an uploaded zip archive in parallel (None uses every CPU core)
+IMPORT_PARSE_WORKERS = None
+# Largest statement file accepted in a single upload. Uploads are streamed to a temporary file, never
+# held in memory, so this only bounds the length of one request.
+STATEMENT_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+# Larger files are sent in parts of at most CHUNKED_UPLOAD_PART_SIZE bytes through the resumable upload API
+CHUNKED_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+CHUNKED_UPLOAD_PART_SIZE = 5 * 1024 * 1024
+# Unfinished chunked uploads are removed after this many hours (see `python3 manage.py purge_stale_uploads`)
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 